@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import sys
 
-from . import auto_load
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / 'libs'))
@@ -18,10 +17,17 @@ bl_info = {
     "category": "Object",
     "tracker_url": "https://github.com/SpectrumQT/WWMI-Tools",
 }
-auto_load.init()
 
-import bpy
-from .addon import settings
+try:
+    import bpy
+except ImportError:
+    # Package is imported outside of Blender by headless extraction (see extract.py)
+    bpy = None
+
+if bpy is not None:
+    from . import auto_load
+    auto_load.init()
+    from .addon import settings
 
 
 def trigger_mod_export():
@@ -1,9 +1,8 @@
-import bpy
-
-
 class ConfigError(Exception):
     def __init__(self, setting_name, error_message, cfg = None):
         if cfg is None:
+            # Imported here to keep exception usable in headless mode, where cfg is always provided
+            import bpy
             cfg = bpy.context.scene.wwmi_tools_settings
         cfg.last_error_setting_name = setting_name
         cfg.last_error_text = error_message
@@ -29,11 +29,13 @@ class WWMI_Settings(bpy.types.PropertyGroup):
 
     vertex_ids_cache: bpy.props.StringProperty(
         name = "Vertex Ids Cache",
+        description = "Key of binary file with cached vertex ids of the last exported collection",
         default = ""
     ) # type: ignore
 
     index_data_cache: bpy.props.StringProperty(
         name = "Index Data Cache",
+        description = "Key of binary file with cached index data of the last exported collection",
         default = ""
     ) # type: ignore
     
@@ -67,6 +69,30 @@ class WWMI_Settings(bpy.types.PropertyGroup):
         update=lambda self, context: self.on_update_clear_error('frame_dump_folder'),
     ) # type: ignore
 
+    use_frame_dump_cache: BoolProperty(
+        name="Cache Parsed Dump",
+        description="Store parsed frame dump data and resource hashes in cache file next to log.txt. Allows to skip dump parsing on the next extraction from the same dump folder",
+        default=True,
+    ) # type: ignore
+
+    use_frame_dump_prefilter: BoolProperty(
+        name="Prefilter Dump Files",
+        description="Skip parsing of dump files from calls that have no resources in slots used by extraction (UI, post-processing, shadows and so on). Speeds up parsing of large dumps",
+        default=False,
+    ) # type: ignore
+
+    extract_target_vb_hashes: StringProperty(
+        name="Target VB Hashes",
+        description="Comma-separated list of VB hashes of objects to extract. Calls of other objects will be skipped before any data processing. Leave empty to extract all objects",
+        default='',
+    ) # type: ignore
+
+    extract_target_ib_hashes: StringProperty(
+        name="Target IB Hashes",
+        description="Comma-separated list of IB hashes of components to extract. Calls of other components will be skipped before any data processing. Leave empty to extract all components",
+        default='',
+    ) # type: ignore
+
     allow_missing_shapekeys: BoolProperty(
         name="Extract Objects With Missing Shapekeys",
         description="Do not skip extraction of objects with missing shapekeys data (normally user should re-dump during some facial animation).",
@@ -205,6 +231,12 @@ class WWMI_Settings(bpy.types.PropertyGroup):
         default=False,
     ) # type: ignore
 
+    incremental_export: BoolProperty(
+        name="Incremental Export",
+        description="Keep exported data of every component in memory and export again only components with changed objects, modifier settings, evaluated meshes and vertex group weights or export settings. Speeds up repeated exports of the same collection",
+        default=False,
+    ) # type: ignore
+
     export_index: BoolProperty(
         name="Index Buffer",
         description="Contains data that associates vertices with faces",
@@ -277,6 +309,12 @@ class WWMI_Settings(bpy.types.PropertyGroup):
         default=False,
     ) # type: ignore
 
+    merge_mesh_data: BoolProperty(
+        name="Merge Mesh Data",
+        description="Build merged object from mesh data of components without temporary copies of objects. Works only for triangulated objects without modifiers, parents, mirroring transforms and non-uniform scale, others are merged via temporary copies",
+        default=False,
+    ) # type: ignore
+
     copy_textures: BoolProperty(
         name="Copy Textures",
         description="Copy texture files to export folder",
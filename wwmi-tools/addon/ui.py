@@ -122,6 +122,8 @@ class WWMI_TOOLS_PT_SIDEBAR(bpy.types.Panel):
         layout.row().prop(cfg, 'partial_export')
 
         if not cfg.partial_export:
+            layout.row().prop(cfg, 'incremental_export')
+
             layout.row()
 
             layout.row().prop(cfg, 'mirror_mesh')
@@ -138,6 +140,7 @@ class WWMI_TOOLS_PT_SIDEBAR(bpy.types.Panel):
             layout.row()
             
             layout.row().prop(cfg, 'apply_all_modifiers')
+            layout.row().prop(cfg, 'merge_mesh_data')
             layout.row().prop(cfg, 'copy_textures')
 
             col = layout.column(align=True)
@@ -183,6 +186,9 @@ class WWMI_TOOLS_PT_SIDEBAR(bpy.types.Panel):
 
         layout.row().prop(cfg, 'extract_output_folder')
 
+        layout.row().prop(cfg, 'extract_target_vb_hashes')
+        layout.row().prop(cfg, 'extract_target_ib_hashes')
+
         layout.row()
 
         col = layout.column(align=True)
@@ -609,5 +615,7 @@ class DebugPanel(bpy.types.Panel):
         cfg = context.scene.wwmi_tools_settings
 
         layout.row().prop(cfg, 'allow_missing_shapekeys')
+        layout.row().prop(cfg, 'use_frame_dump_cache')
+        layout.row().prop(cfg, 'use_frame_dump_prefilter')
         layout.row().prop(cfg, 'remove_temp_object')
         layout.row().prop(cfg, 'export_on_reload')
\ No newline at end of file
@@ -1,7 +1,7 @@
 import time
 import shutil
 
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Optional
 from dataclasses import dataclass, field
 
 from ..addon.exceptions import ConfigError
@@ -12,10 +12,14 @@ from ..migoto_io.blender_interface.objects import *
 from ..migoto_io.blender_interface.mesh import *
 from ..migoto_io.data_model.byte_buffer import NumpyBuffer
 from ..migoto_io.data_model.data_model import DataModel
+from ..migoto_io.data_model.mesh_data import MeshDataObject
 
 from ..extract_frame_data.metadata_format import read_metadata, ExtractedObject
 
-from .object_merger import ObjectMerger, SkeletonType, MergedObject
+from .object_merger import ObjectMerger, SkeletonType, MergedObject, collect_component_objects
+from .mesh_merger import MeshMerger, get_mesh_merge_issue
+from .component_cache import (ComponentCache, ComponentFragment, get_export_fingerprint, get_component_fingerprint, 
+                              split_merged_object, merge_fragment_buffers, build_merged_object)
 from .metadata_collector import Version, ModInfo
 from .texture_collector import Texture, get_textures
 from .ini_maker import IniMaker
@@ -30,6 +34,9 @@ data_models: Dict[str, DataModel] = {
 }
 
 
+component_cache = ComponentCache()
+
+
 # TODO: Add support of export of unhandled semantics from vertex attributes
 class ModExporter:
     extracted_object: ExtractedObject
@@ -71,21 +78,31 @@ class ModExporter:
 
         user_context = get_user_context(self.context)
 
-        try:
-            self.build_merged_object()
-        except ConfigError as e:
-            raise e
-        except Exception as e:
-            raise ConfigError('component_collection', f'Failed to create merged object from collection:\n{e}')
+        global component_cache
 
-        try:
-            self.build_data_buffers()
-        except Exception as e:
-            raise e
-        finally:
-            if self.cfg.remove_temp_object:
-                remove_mesh(self.merged_object.object.data)
-            set_user_context(self.context, user_context)
+        if self.cfg.incremental_export and not self.cfg.partial_export:
+            try:
+                self.build_data_buffers_incremental()
+            finally:
+                set_user_context(self.context, user_context)
+        else:
+            component_cache.clear()
+
+            try:
+                self.build_merged_object()
+            except ConfigError as e:
+                raise e
+            except Exception as e:
+                raise ConfigError('component_collection', f'Failed to create merged object from collection:\n{e}')
+
+            try:
+                self.build_data_buffers()
+            except Exception as e:
+                raise e
+            finally:
+                if self.cfg.remove_temp_object:
+                    self.remove_merged_object()
+                set_user_context(self.context, user_context)
 
         if not self.cfg.partial_export:
             self.textures = get_textures(self.object_source_folder)
@@ -115,35 +132,72 @@ class ModExporter:
         if self.cfg.component_collection not in list(get_scene_collections()):
             raise ConfigError('component_collection', f'Collection "{self.cfg.component_collection.name}" is not a member of "Scene Collection"!')
 
-    def build_merged_object(self):
+    def build_merged_object(self, component_ids: Optional[List[int]] = None):
         start_time = time.time()
-        object_merger = ObjectMerger(
+        merger_args = dict(
             extracted_object=self.extracted_object,
             ignore_nested_collections=self.cfg.ignore_nested_collections,
             ignore_hidden_collections=self.cfg.ignore_hidden_collections,
             ignore_hidden_objects=self.cfg.ignore_hidden_objects,
             ignore_muted_shape_keys=self.cfg.ignore_muted_shape_keys,
-            apply_modifiers=self.cfg.apply_all_modifiers,
             context=self.context,
             collection=self.cfg.component_collection,
-            skeleton_type=SkeletonType.Merged if self.cfg.mod_skeleton_type == 'MERGED' else SkeletonType.PerComponent,
+            skeleton_type=self.get_skeleton_type(),
             mesh_scale=0.01,
             mesh_rotation=(0, 0, 180),
+            component_ids=component_ids,
         )
+        merge_issue = 'disabled'
+        if self.cfg.merge_mesh_data:
+            objects = [obj for component_id, objects in enumerate(self.collect_component_objects())
+                       if component_ids is None or component_id in component_ids for obj in objects]
+            merge_issue = get_mesh_merge_issue(objects, self.cfg.apply_all_modifiers)
+            if merge_issue is not None:
+                print(f'Mesh data merge is not possible, falling back to merge of temp objects: {merge_issue}')
+        if merge_issue is None:
+            object_merger = MeshMerger(**merger_args)
+        else:
+            object_merger = ObjectMerger(apply_modifiers=self.cfg.apply_all_modifiers, **merger_args)
         self.merged_object = object_merger.merged_object
         print(f'Merged object build time: {time.time() - start_time :.3f}s ({self.merged_object.vertex_count} vertices, {self.merged_object.index_count} indices)')
 
-    def build_data_buffers(self):
-        start_time = time.time()
+    def collect_component_objects(self) -> List[List[bpy.types.Object]]:
+        collection = self.cfg.component_collection
+        collection_was_hidden = collection_is_hidden(collection)
+        unhide_collection(collection)
+        try:
+            return collect_component_objects(collection, len(self.extracted_object.components),
+                                             ignore_nested_collections=self.cfg.ignore_nested_collections,
+                                             ignore_hidden_collections=self.cfg.ignore_hidden_collections,
+                                             ignore_hidden_objects=self.cfg.ignore_hidden_objects)
+        finally:
+            if collection_was_hidden:
+                hide_collection(collection)
 
-        global data_models
-        data_model = data_models['WWMI']
+    def remove_merged_object(self):
+        # Merged object built by MeshMerger has no Blender mesh to remove
+        if isinstance(self.merged_object.object, MeshDataObject):
+            return
+        remove_mesh(self.merged_object.object.data)
 
+    def get_skeleton_type(self):
+        return SkeletonType.Merged if self.cfg.mod_skeleton_type == 'MERGED' else SkeletonType.PerComponent
+
+    def get_buffers_format(self):
         buffers_format = None
         if self.extracted_object.export_format is not None and len(self.extracted_object.export_format) > 0:
             buffers_format = {}
             for buffer_name, buffer_layout in self.extracted_object.export_format.items():
                 buffers_format[buffer_name] = buffer_layout.get_layout()
+        return buffers_format
+
+    def build_data_buffers(self):
+        start_time = time.time()
+
+        global data_models
+        data_model = data_models['WWMI']
+
+        buffers_format = self.get_buffers_format()
 
         index_layout = None
         if len(self.merged_object.object.vertex_groups) > 256:
@@ -165,23 +219,119 @@ class ModExporter:
         self.merged_object.vertex_count = vertex_count
         self.merged_object.shapekeys.vertex_count = len(self.buffers.get('ShapeKeyVertexId', []))
 
-        remapped_vgs_counts = self.buffers.pop('BlendRemapLayout', None)
-        if remapped_vgs_counts is not None:
-            remap_id = 0
-            for component_id, vg_count in enumerate(remapped_vgs_counts.data.tolist()):
-                if vg_count == 0:
-                    continue
-                component = self.merged_object.components[component_id]
-                if vg_count > 256:            
-                    raise ConfigError('component_collection', f'Component{component_id} 256 VG limit exceeded!\n'
-                                      f'Currently it consists of {len(component.objects)} object(s) using total of {vg_count} VGs with non-zero weights.\n'
-                                      f'Please reduce the number of non-empty VGs or split objects between different components.')
-                component.blend_remap_id = remap_id
-                component.blend_remap_vg_count = vg_count
-                remap_id += 1
-            self.merged_object.blend_remap_count = remap_id
+        self.set_blend_remaps(self.buffers.pop('BlendRemapLayout', None))
+
+        print(f'Total mesh data collection time: {time.time() - start_time :.3f}s')
+
+    def build_data_buffers_incremental(self):
+        """
+        Builds buffers from per-component fragments, only components with changed inputs are exported again
+        Components are exported via the same merged object, so concatenated fragments match output of full export
+        """
+        start_time = time.time()
+
+        global data_models, component_cache
+        data_model = data_models['WWMI']
+
+        collection = self.cfg.component_collection
+
+        # Loop data cache of partial export is cleared by full export and must be cleared here as well
+        if self.context.scene.wwmi_tools_settings.vertex_ids_cache:
+            data_model.clear_loop_data_cache(self.context.scene.wwmi_tools_settings)
+
+        buffers_format = self.get_buffers_format()
+        if buffers_format is None:
+            buffers_format = dict(data_model.buffers_format)
+
+        component_objects = self.collect_component_objects()
+
+        if sum(len(objects) for objects in component_objects) == 0:
+            raise ConfigError('component_collection', f'Failed to create merged object from collection:\nNo eligible `Component` objects found!')
+
+        # Lookup cached fragments of components with the same inputs
+        export_fingerprint = get_export_fingerprint(self.cfg, self.excluded_buffers, self.object_source_folder / 'Metadata.json')
+        fingerprints, fragments, dirty_component_ids = [], {}, []
+        for component_id, objects in enumerate(component_objects):
+            fingerprint = get_component_fingerprint(self.context, objects, export_fingerprint)
+            fingerprints.append(fingerprint)
+            fragment = component_cache.get_fragment(collection.name, component_id, fingerprint)
+            if fragment is not None:
+                fragments[component_id] = fragment
+            elif len(objects) == 0:
+                fragments[component_id] = ComponentFragment(fingerprint=fingerprint)
+            else:
+                dirty_component_ids.append(component_id)
+
+        print(f'Components fingerprint time: {time.time() - start_time :.3f}s ({len(dirty_component_ids)} of {len(component_objects)} components changed)')
+
+        # Export changed components
+        if len(dirty_component_ids) > 0:
+            try:
+                self.build_merged_object(dirty_component_ids)
+            except ConfigError as e:
+                raise e
+            except Exception as e:
+                raise ConfigError('component_collection', f'Failed to create merged object from collection:\n{e}')
+
+            try:
+                buffers, vertex_ids = data_model.get_mesh_buffers(
+                    self.context, 
+                    collection, 
+                    self.merged_object.mesh, 
+                    self.excluded_buffers, 
+                    buffers_format, 
+                    self.cfg.mirror_mesh, 
+                    with_blend_remap_vgs='Blend' not in self.excluded_buffers)
+                vertex_counts = [self.merged_object.components[component_id].vertex_count for component_id in dirty_component_ids]
+                shapekey_groups = data_model.get_shapekey_groups(self.merged_object.object, vertex_ids, vertex_counts)
+            finally:
+                if self.cfg.remove_temp_object:
+                    self.remove_merged_object()
+
+            dirty_fingerprints = [fingerprints[component_id] for component_id in dirty_component_ids]
+            dirty_fragments = split_merged_object(self.merged_object, dirty_component_ids, dirty_fingerprints, buffers, vertex_ids, shapekey_groups)
+            fragments.update(dirty_fragments)
+            component_cache.set_fragments(collection.name, dirty_fragments)
+
+        # Assemble buffers from fragments
+        fragments = [fragments[component_id] for component_id in range(len(component_objects))]
+
+        self.merged_object = build_merged_object(fragments, self.get_skeleton_type())
+
+        self.buffers, vertex_offsets = merge_fragment_buffers(fragments, buffers_format)
+
+        vg_buffer = self.buffers.pop('BlendRemapVertexVG', None)
+        if self.merged_object.vg_count > 256 and 'Blend' in self.buffers:
+            self.buffers['BlendRemapVertexVG'] = vg_buffer
+            index_layout = [component.index_count for component in self.merged_object.components if component.index_count > 0]
+            blend_remaps = data_model.build_blend_remap(self.context, index_layout, self.buffers.get('Index', None), self.buffers['Blend'], vg_buffer)
+            self.buffers.update(blend_remaps)
+
+        shapekey_groups = [fragment.shapekey_groups for fragment in fragments]
+        self.buffers.update(data_model.build_shapekey_buffers(shapekey_groups, vertex_offsets, self.excluded_buffers, self.cfg.mirror_mesh))
+
+        self.merged_object.shapekeys.vertex_count = len(self.buffers.get('ShapeKeyVertexId', []))
+
+        self.set_blend_remaps(self.buffers.pop('BlendRemapLayout', None))
 
         print(f'Total mesh data collection time: {time.time() - start_time :.3f}s')
+
+    def set_blend_remaps(self, remapped_vgs_counts: Optional[NumpyBuffer]):
+        if remapped_vgs_counts is None:
+            return
+        remap_id = 0
+        for component_id, vg_count in enumerate(remapped_vgs_counts.data.tolist()):
+            if vg_count == 0:
+                continue
+            component = self.merged_object.components[component_id]
+            if vg_count > 256:            
+                raise ConfigError('component_collection', f'Component{component_id} 256 VG limit exceeded!\n'
+                                  f'Currently it consists of {len(component.objects)} object(s) using total of {vg_count} VGs with non-zero weights.\n'
+                                  f'Please reduce the number of non-empty VGs or split objects between different components.')
+            component.blend_remap_id = remap_id
+            component.blend_remap_vg_count = vg_count
+            remap_id += 1
+        self.merged_object.blend_remap_count = remap_id
     
     def build_mod_ini(self):
         start_time = time.time()
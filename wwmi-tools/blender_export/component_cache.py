@@ -0,0 +1,275 @@
+import hashlib
+import numpy
+import bpy
+
+from pathlib import Path
+from typing import List, Dict, Set, Tuple, Optional
+from dataclasses import dataclass, field
+
+from ..migoto_io.data_model.byte_buffer import AbstractSemantic, Semantic, BufferLayout, NumpyBuffer
+from ..migoto_io.data_model.data_extractor import BlenderDataExtractor
+
+from .object_merger import TempObject, MergedObjectComponent, MergedObjectShapeKeys, MergedObject, SkeletonType
+from .data_models.data_model_wwmi import ShapeKeyGroups
+
+
+@dataclass
+class ComponentFragment:
+    """
+    Exported data of single component, Index buffer references its vertices starting from 0
+    """
+    fingerprint: str
+    objects: List[TempObject] = field(default_factory=list)
+    vertex_count: int = 0
+    index_count: int = 0
+    export_vertex_count: int = 0
+    vg_names: Set[str] = field(default_factory=set)
+    buffers: Dict[str, NumpyBuffer] = field(default_factory=dict)
+    shapekey_groups: Optional[ShapeKeyGroups] = None
+
+
+class ComponentCache:
+    """
+    Keeps fragments of the last exported collection for the whole Blender session
+    """
+    def __init__(self):
+        self.collection_name: Optional[str] = None
+        self.fragments: Dict[int, ComponentFragment] = {}
+
+    def get_fragment(self, collection_name: str, component_id: int, fingerprint: str) -> Optional[ComponentFragment]:
+        """
+        Returns cached fragment of the component or None if there's none or its inputs have changed
+        """
+        if collection_name != self.collection_name:
+            return None
+        fragment = self.fragments.get(component_id, None)
+        if fragment is None or fragment.fingerprint != fingerprint:
+            return None
+        return fragment
+
+    def set_fragments(self, collection_name: str, fragments: Dict[int, ComponentFragment]):
+        if collection_name != self.collection_name:
+            self.clear()
+            self.collection_name = collection_name
+        self.fragments.update(fragments)
+
+    def clear(self):
+        self.collection_name = None
+        self.fragments = {}
+
+
+def get_export_fingerprint(cfg, excluded_buffers: List[str], metadata_path: Path) -> str:
+    """
+    Returns hash of export settings and object metadata that affect data of every component
+    """
+    fingerprint = hashlib.sha1(metadata_path.read_bytes())
+    fingerprint.update(repr((
+        cfg.wwmi_tools_version,
+        cfg.mod_skeleton_type,
+        cfg.mirror_mesh,
+        cfg.ignore_muted_shape_keys,
+        cfg.apply_all_modifiers,
+        cfg.merge_mesh_data,
+        sorted(excluded_buffers),
+    )).encode())
+    return fingerprint.hexdigest()
+
+
+def get_component_fingerprint(context: bpy.types.Context, objects: List[bpy.types.Object], export_fingerprint: str) -> str:
+    """
+    Returns hash of all inputs of the component: export settings, names, transforms, modifier stacks,
+    VG names and weights, shapekeys and evaluated meshes of its objects
+    """
+    fingerprint = hashlib.sha1(export_fingerprint.encode())
+    for obj in sorted(objects, key=lambda obj: obj.name):
+        update_object_fingerprint(context, fingerprint, obj)
+    return fingerprint.hexdigest()
+
+
+def update_object_fingerprint(context: bpy.types.Context, fingerprint, obj: bpy.types.Object):
+    fingerprint.update(obj.name.encode())
+    fingerprint.update(numpy.array(obj.matrix_world, dtype=numpy.float32).tobytes())
+    # Settings of modifiers, their results are covered by evaluated mesh as well
+    for modifier in obj.modifiers:
+        fingerprint.update(repr(get_modifier_settings(modifier)).encode())
+    # VG names
+    fingerprint.update(repr([vg.name for vg in obj.vertex_groups]).encode())
+    # Shapekeys
+    if obj.data.shape_keys is not None:
+        for shapekey in obj.data.shape_keys.key_blocks:
+            fingerprint.update(repr((shapekey.name, shapekey.mute, shapekey.relative_key.name)).encode())
+            update_data_fingerprint(fingerprint, shapekey.data, 'co', numpy.float32, 3)
+    # Mesh with modifiers applied
+    evaluated_obj = obj.evaluated_get(context.evaluated_depsgraph_get())
+    mesh = evaluated_obj.to_mesh()
+    try:
+        if bpy.app.version < (4, 1):
+            mesh.calc_normals_split()
+        # VG weights, modifiers like Data Transfer or Vertex Weight Edit change them without moving vertices
+        triplets, _, _ = BlenderDataExtractor().get_vertex_groups(mesh)
+        fingerprint.update(triplets.tobytes())
+        update_data_fingerprint(fingerprint, mesh.vertices, 'co', numpy.float32, 3)
+        update_data_fingerprint(fingerprint, mesh.vertices, 'undeformed_co', numpy.float32, 3)
+        update_data_fingerprint(fingerprint, mesh.polygons, 'loop_total', numpy.int32, 1)
+        update_data_fingerprint(fingerprint, mesh.loops, 'vertex_index', numpy.int32, 1)
+        update_data_fingerprint(fingerprint, mesh.loops, 'normal', numpy.float32, 3)
+        for uv_layer in mesh.uv_layers:
+            fingerprint.update(uv_layer.name.encode())
+            update_data_fingerprint(fingerprint, uv_layer.data, 'uv', numpy.float32, 2)
+        for vertex_color in mesh.vertex_colors:
+            fingerprint.update(vertex_color.name.encode())
+            update_data_fingerprint(fingerprint, vertex_color.data, 'color', numpy.float32, 4)
+    finally:
+        evaluated_obj.to_mesh_clear()
+
+
+def get_modifier_settings(modifier: bpy.types.Modifier) -> List[Tuple]:
+    """
+    Returns values of all properties of the modifier, referenced datablocks are represented by their names
+    Nested structs like curve mappings are skipped, their changes are caught only via evaluated mesh
+    """
+    settings = [(modifier.name, modifier.type)]
+    for prop in modifier.bl_rna.properties:
+        if prop.identifier in ['rna_type', 'name', 'type']:
+            continue
+        value = getattr(modifier, prop.identifier, None)
+        if isinstance(value, bpy.types.ID):
+            value = value.name_full
+        elif prop.type in ['POINTER', 'COLLECTION']:
+            continue
+        elif prop.type == 'ENUM' and prop.is_enum_flag:
+            value = tuple(sorted(value))
+        elif getattr(prop, 'is_array', False):
+            value = tuple(value)
+        settings.append((prop.identifier, value))
+    return settings
+
+
+def update_data_fingerprint(fingerprint, data_source, data_name: str, data_type: numpy.dtype, num_values: int):
+    data = numpy.empty(len(data_source) * num_values, dtype=data_type)
+    data_source.foreach_get(data_name, data)
+    fingerprint.update(data.tobytes())
+
+
+def get_index_field(buffer: NumpyBuffer) -> Optional[str]:
+    semantic = buffer.layout.get_element(AbstractSemantic(Semantic.Index))
+    if semantic is None:
+        return None
+    return semantic.get_name()
+
+
+def split_merged_object(merged_object: MergedObject,
+                        component_ids: List[int],
+                        fingerprints: List[str],
+                        buffers: Dict[str, NumpyBuffer],
+                        vertex_ids: numpy.ndarray,
+                        shapekey_groups: List[ShapeKeyGroups]) -> Dict[int, ComponentFragment]:
+    """
+    Splits data exported from merged object of given components into per-component fragments
+    Merged object holds vertices and faces of its components in order of component ids, so does exported data
+    """
+    components = [merged_object.components[component_id] for component_id in component_ids]
+
+    # Locate ranges of Blender vertices, exported vertices and triangles of every component
+    vertex_starts = numpy.cumsum([0] + [component.vertex_count for component in components])
+    export_starts = numpy.searchsorted(numpy.sort(vertex_ids), vertex_starts)
+    triangle_starts = numpy.cumsum([0] + [component.index_count // 3 for component in components])
+
+    vertex_components = numpy.searchsorted(vertex_starts, vertex_ids, side='right') - 1
+    if numpy.any(numpy.diff(vertex_components) < 0):
+        raise ValueError(f'exported vertices of merged object are not ordered by components')
+
+    fragments = {}
+
+    for part_id, component_id in enumerate(component_ids):
+        component = components[part_id]
+        export_start, export_end = int(export_starts[part_id]), int(export_starts[part_id+1])
+
+        fragment_buffers = {}
+        for buffer_name, buffer in buffers.items():
+            index_field = get_index_field(buffer)
+            if index_field is None:
+                data = buffer.get_data(slice(export_start, export_end)).copy()
+            else:
+                data = buffer.get_data(slice(triangle_starts[part_id], triangle_starts[part_id+1])).copy()
+                data[index_field] -= export_start
+            fragment_buffers[buffer_name] = NumpyBuffer(buffer.layout, data)
+
+        fragments[component_id] = ComponentFragment(
+            fingerprint=fingerprints[part_id],
+            objects=[TempObject(name=obj.name, object=None, vertex_count=obj.vertex_count, index_count=obj.index_count)
+                     for obj in component.objects],
+            vertex_count=component.vertex_count,
+            index_count=component.index_count,
+            export_vertex_count=export_end - export_start,
+            vg_names=set(component.vg_names),
+            buffers=fragment_buffers,
+            shapekey_groups=shapekey_groups[part_id],
+        )
+
+    return fragments
+
+
+def merge_fragment_buffers(fragments: List[ComponentFragment],
+                           buffers_format: Dict[str, BufferLayout]) -> Tuple[Dict[str, NumpyBuffer], List[int]]:
+    """
+    Returns buffers concatenated from fragments along with ids of first exported vertices of fragments
+    Buffers are ordered as in buffers_format, extra buffers of fragments go last
+    """
+    vertex_offsets = numpy.cumsum([0] + [fragment.export_vertex_count for fragment in fragments]).tolist()
+
+    buffer_names = list(buffers_format.keys())
+    for fragment in fragments:
+        for buffer_name in fragment.buffers.keys():
+            if buffer_name not in buffer_names:
+                buffer_names.append(buffer_name)
+
+    buffers = {}
+    for buffer_name in buffer_names:
+        parts = []
+        for fragment, vertex_offset in zip(fragments, vertex_offsets):
+            buffer = fragment.buffers.get(buffer_name, None)
+            if buffer is None:
+                continue
+            data = buffer.get_data()
+            index_field = get_index_field(buffer)
+            if index_field is not None and vertex_offset != 0:
+                data = data.copy()
+                data[index_field] += vertex_offset
+            parts.append((buffer.layout, data))
+        if len(parts) == 0:
+            continue
+        buffers[buffer_name] = NumpyBuffer(parts[0][0], numpy.concatenate([data for _, data in parts]))
+
+    return buffers, vertex_offsets[:-1]
+
+
+def build_merged_object(fragments: List[ComponentFragment], skeleton_type: SkeletonType) -> MergedObject:
+    """
+    Returns description of merged object built from fragments, it has no Blender object and mesh
+    """
+    components = []
+    index_offset = 0
+    for fragment in fragments:
+        objects = []
+        for obj in fragment.objects:
+            objects.append(TempObject(name=obj.name, object=None, vertex_count=obj.vertex_count,
+                                      index_count=obj.index_count, index_offset=index_offset))
+            index_offset += obj.index_count
+        components.append(MergedObjectComponent(
+            objects=objects,
+            vertex_count=fragment.vertex_count,
+            index_count=fragment.index_count,
+            vg_names=set(fragment.vg_names),
+        ))
+
+    return MergedObject(
+        object=None,
+        mesh=None,
+        components=components,
+        shapekeys=MergedObjectShapeKeys(),
+        skeleton_type=skeleton_type,
+        vertex_count=sum(fragment.export_vertex_count for fragment in fragments),
+        index_count=index_offset,
+        vg_count=len(set().union(*[fragment.vg_names for fragment in fragments])),
+    )
@@ -0,0 +1,212 @@
+import re
+import sys
+import time
+import types
+import numpy
+import importlib
+import importlib.util
+
+from pathlib import Path
+
+
+def import_data_model_wwmi():
+    """
+    Returns data_model_wwmi module imported outside of Blender with stub bpy and mathutils modules
+    """
+    # Package must be registered before stubs are added, otherwise its __init__ would treat stub as Blender and register addon
+    package_path = Path(__file__).parents[2]
+    if 'wwmi_tools' not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            'wwmi_tools', package_path / '__init__.py', submodule_search_locations=[str(package_path)])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['wwmi_tools'] = module
+        spec.loader.exec_module(module)
+
+    class StubTypes(types.SimpleNamespace):
+        # Blender types are used only in annotations
+        def __getattr__(self, name):
+            return object
+
+    bpy = types.ModuleType('bpy')
+    bpy.types = StubTypes()
+    bpy.app = types.SimpleNamespace(version=(4, 2, 0), tempdir='')
+    sys.modules.setdefault('bpy', bpy)
+    sys.modules.setdefault('mathutils', types.ModuleType('mathutils'))
+
+    return importlib.import_module('wwmi_tools.blender_export.data_models.data_model_wwmi')
+
+
+data_model_wwmi = import_data_model_wwmi()
+
+
+class ShapeKeyData:
+    def __init__(self, co):
+        self.co = co
+
+    def __len__(self):
+        return len(self.co)
+
+    def foreach_get(self, data_name, data):
+        data[...] = self.co.ravel()
+
+
+class KeyBlock:
+    def __init__(self, name, co, mute=False):
+        self.name = name
+        self.data = ShapeKeyData(co)
+        self.mute = mute
+
+
+class KeyBlocks(list):
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for key_block in self:
+                if key_block.name == key:
+                    return key_block
+            raise KeyError(key)
+        return super().__getitem__(key)
+
+
+def main():
+    test_export_matches_loop()
+    test_export_of_parts()
+    benchmark_export()
+
+
+def make_object(num_vertices, num_shapekeys, seed=0):
+    """
+    Returns object with Basis and shapekeys moving random 10% of vertices, every 3rd shapekey has values within threshold
+    """
+    rng = numpy.random.default_rng(seed)
+    basis = rng.random((num_vertices, 3), dtype=numpy.float32)
+    key_blocks = KeyBlocks([KeyBlock('Basis', basis)])
+    for shapekey_id in range(num_shapekeys):
+        co = basis.copy()
+        moved = rng.random(num_vertices) < 0.1
+        scale = 1e-9 if shapekey_id % 3 == 2 else 0.1
+        co[moved] += rng.random((numpy.count_nonzero(moved), 3), dtype=numpy.float32) * scale
+        key_blocks.append(KeyBlock(f'Deform {shapekey_id}' if shapekey_id % 2 else f'Custom {shapekey_id}', co))
+    key_blocks.append(KeyBlock('Unrelated', basis + 1))
+    data = types.SimpleNamespace(
+        vertices=range(num_vertices),
+        shape_keys=types.SimpleNamespace(key_blocks=key_blocks),
+    )
+    return types.SimpleNamespace(name='TEST_OBJECT', data=data)
+
+
+def make_vertex_ids(num_vertices, seed=0):
+    # Exported vertices cover all Blender vertices and some of them are exported multiple times
+    rng = numpy.random.default_rng(seed)
+    return numpy.concatenate([numpy.arange(num_vertices), rng.integers(0, num_vertices, num_vertices // 3)]).astype(numpy.uint32)
+
+
+def make_data_model():
+    data_model = data_model_wwmi.DataModelWWMI()
+    data_model.data_extractor.blender_data_formats = data_model.blender_data_formats
+    return data_model
+
+
+def export_shapekeys_loop(data_model, obj, vertex_ids, mirror_mesh=False):
+    """
+    Reference export of shapekeys via loop over shapekey groups, the way DataModelWWMI used to do it
+    """
+    buffers = data_model.get_shapekey_buffers([])
+
+    shapekey_offsets, shapekey_vertex_ids, shapekey_vertex_offsets = [], [], []
+
+    shapekey_pattern = re.compile(r'.*(?:deform|custom)[_ -]*(\d+).*')
+    shapekey_ids = {}
+    for shapekey in obj.data.shape_keys.key_blocks:
+        match = shapekey_pattern.findall(shapekey.name.lower())
+        if len(match) == 0:
+            continue
+        shapekey_ids[int(match[0])] = shapekey.name
+
+    shapekeys = data_model.data_extractor.get_shapekey_data(obj, names_filter=list(shapekey_ids.values()), deduct_basis=True)
+
+    shapekey_verts_count = 0
+    for group_id in range(128):
+        shapekey = shapekeys.get(shapekey_ids.get(group_id, -1), None)
+        shapekey_offsets.extend([shapekey_verts_count])
+        if shapekey is None or not (-0.00000001 > numpy.min(shapekey) or numpy.max(shapekey) > 0.00000001):
+            continue
+        shapekey = shapekey[vertex_ids]
+        shapekey_vert_ids = numpy.where(numpy.any(shapekey != 0, axis=1))[0]
+        shapekey_vertex_ids.extend(shapekey_vert_ids)
+        shapekey_vertex_offsets.extend(shapekey[shapekey_vert_ids])
+        shapekey_verts_count += len(shapekey_vert_ids)
+
+    if len(shapekey_vertex_ids) == 0:
+        return {}
+
+    shapekey_vertex_offsets_np = numpy.zeros(len(shapekey_vertex_offsets), dtype=(numpy.float16, 6))
+    shapekey_vertex_offsets_np[:, 0:3] = shapekey_vertex_offsets
+    if mirror_mesh:
+        shapekey_vertex_offsets_np[:, 0] *= -1
+
+    buffers['ShapeKeyOffset'].set_data(numpy.array(shapekey_offsets))
+    buffers['ShapeKeyVertexId'].set_data(numpy.array(shapekey_vertex_ids, dtype=numpy.uint32))
+    buffers['ShapeKeyVertexOffset'].set_data(shapekey_vertex_offsets_np)
+
+    return buffers
+
+
+def assert_buffers_equal(expected, result):
+    assert expected.keys() == result.keys(), f'buffers {list(result.keys())} != {list(expected.keys())}'
+    for buffer_name in expected.keys():
+        assert expected[buffer_name].get_bytes() == result[buffer_name].get_bytes(), f'{buffer_name} buffer mismatch'
+
+
+def test_export_matches_loop():
+    for num_shapekeys in [0, 3, 40]:
+        for mirror_mesh in [False, True]:
+            obj = make_object(5000, num_shapekeys, seed=num_shapekeys)
+            vertex_ids = make_vertex_ids(5000, seed=num_shapekeys)
+            data_model = make_data_model()
+            expected = export_shapekeys_loop(data_model, obj, vertex_ids, mirror_mesh)
+            result = data_model.export_shapekeys(obj, vertex_ids, [], mirror_mesh)
+            assert_buffers_equal(expected, result)
+
+
+def test_export_of_parts():
+    # Buffers assembled from parts of object exported separately must match export of the whole object
+    obj = make_object(5000, 40)
+    vertex_counts = [1500, 0, 2000, 1500]
+    vertex_starts = numpy.cumsum([0] + vertex_counts)
+    vertex_ids = make_vertex_ids(5000)
+    vertex_ids = vertex_ids[numpy.argsort(numpy.searchsorted(vertex_starts, vertex_ids, side='right'), kind='stable')]
+    export_starts = numpy.searchsorted(numpy.sort(vertex_ids), vertex_starts)[:-1].tolist()
+
+    data_model = make_data_model()
+    expected = export_shapekeys_loop(data_model, obj, vertex_ids)
+    shapekey_groups = data_model.get_shapekey_groups(obj, vertex_ids, vertex_counts)
+    assert_buffers_equal(expected, data_model.build_shapekey_buffers(shapekey_groups, export_starts, []))
+    # Fragments of components without objects have no shapekey groups
+    shapekey_groups[1] = None
+    assert_buffers_equal(expected, data_model.build_shapekey_buffers(shapekey_groups, export_starts, []))
+
+
+def benchmark_export(num_vertices=60000, num_shapekeys=150, repeat=3):
+    obj = make_object(num_vertices, num_shapekeys)
+    vertex_ids = make_vertex_ids(num_vertices)
+    data_model = make_data_model()
+
+    def measure(func):
+        best_time = None
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            result = func()
+            elapsed_time = time.perf_counter() - start_time
+            best_time = elapsed_time if best_time is None else min(best_time, elapsed_time)
+        return result, best_time
+
+    expected, loop_time = measure(lambda: export_shapekeys_loop(data_model, obj, vertex_ids))
+    result, numpy_time = measure(lambda: data_model.export_shapekeys(obj, vertex_ids, []))
+    assert_buffers_equal(expected, result)
+
+    print(f'shapekeys export: loop {loop_time :.3f}s, numpy {numpy_time :.3f}s '
+          f'(x{loop_time / numpy_time :.1f}, {num_shapekeys} shapekeys, {num_vertices} vertices)')
+
+
+if __name__ == '__main__':
+    main()
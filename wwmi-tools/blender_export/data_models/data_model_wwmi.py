@@ -2,15 +2,29 @@ import time
 import re
 import numpy
 import bpy
-import json
 
 
 from typing import Tuple, List, Dict, Optional
+from dataclasses import dataclass
 
 
 from ...migoto_io.data_model.dxgi_format import DXGIFormat, DXGIType
 from ...migoto_io.data_model.byte_buffer import Semantic, AbstractSemantic, BufferSemantic, BufferLayout, NumpyBuffer
 from ...migoto_io.data_model.data_model import DataModel
+from ...migoto_io.data_model.array_cache import load_array
+
+
+@dataclass
+class ShapeKeyGroups:
+    """
+    Offsets of exported vertices moved by shapekeys of all groups, stored as flat arrays of entries
+    Entries are sorted by group id and then by vertex id
+    """
+    group_ids: numpy.ndarray
+    vertex_ids: numpy.ndarray
+    vertex_offsets: numpy.ndarray
+    # Ids of groups with values above threshold for any Blender vertex, including ones skipped by export
+    significant_group_ids: numpy.ndarray
 
 
 class DataModelWWMI(DataModel):
@@ -82,19 +96,7 @@ class DataModelWWMI(DataModel):
 
         build_blend_remaps = object_index_layout is not None and 'Blend' not in excluded_buffers
 
-        # Request 16-bit VG ids for Blend Remap system
-        if build_blend_remaps:
-            # Number of VGs per vertex may vary based on buffers_format, we should respect it
-            num_vgs = buffers_format['Blend'].get_element(AbstractSemantic(Semantic.Blendindices, 0)).get_num_values()
-            buffers_format['BlendRemapVertexVG'] = BufferLayout([
-                BufferSemantic(AbstractSemantic(Semantic.Blendindices, 1), DXGIFormat.R16_UINT, stride=num_vgs*2),
-            ])
-
-        index_data, vertex_buffer = self.export_data(context, collection, mesh, excluded_buffers, buffers_format, mirror_mesh, build_blend_remaps)
-
-        buffers = self.build_buffers(index_data, vertex_buffer, excluded_buffers, buffers_format)
-
-        vertex_ids = vertex_buffer.get_field(AbstractSemantic(Semantic.VertexId).get_name())
+        buffers, vertex_ids = self.get_mesh_buffers(context, collection, mesh, excluded_buffers, buffers_format, mirror_mesh, build_blend_remaps)
 
         if build_blend_remaps:
             blend_buffer = buffers.get('Blend', None)
@@ -109,18 +111,52 @@ class DataModelWWMI(DataModel):
 
         return buffers, len(vertex_ids)
 
+    def get_mesh_buffers(self, 
+                         context: bpy.types.Context, 
+                         collection: bpy.types.Collection, 
+                         mesh: bpy.types.Mesh, 
+                         excluded_buffers: List[str],
+                         buffers_format: Dict[str, BufferLayout],
+                         mirror_mesh: bool = False,
+                         with_blend_remap_vgs: bool = False) -> Tuple[Dict[str, NumpyBuffer], numpy.ndarray]:
+        """
+        Returns buffers with mesh data and Blender ids of exported vertices
+        """
+        # Request 16-bit VG ids for Blend Remap system
+        if with_blend_remap_vgs:
+            # Number of VGs per vertex may vary based on buffers_format, we should respect it
+            num_vgs = buffers_format['Blend'].get_element(AbstractSemantic(Semantic.Blendindices, 0)).get_num_values()
+            buffers_format['BlendRemapVertexVG'] = BufferLayout([
+                BufferSemantic(AbstractSemantic(Semantic.Blendindices, 1), DXGIFormat.R16_UINT, stride=num_vgs*2),
+            ])
+
+        index_data, vertex_buffer = self.export_data(context, collection, mesh, excluded_buffers, buffers_format, mirror_mesh, with_blend_remap_vgs)
+
+        buffers = self.build_buffers(index_data, vertex_buffer, excluded_buffers, buffers_format)
+
+        vertex_ids = vertex_buffer.get_field(AbstractSemantic(Semantic.VertexId).get_name())
+
+        return buffers, vertex_ids
+
     def export_shapekeys(self, 
                          obj: bpy.types.Object,  
                          vertex_ids: numpy.ndarray, 
                          excluded_buffers: List[str],
                          mirror_mesh: bool = False) -> Dict[str, NumpyBuffer]:
-        
-        start_time = time.time()
 
         if obj.data.shape_keys is None or len(getattr(obj.data.shape_keys, 'key_blocks', [])) == 0:
             print(f'No shapekeys found to process!')
             return {}
 
+        if len(self.get_shapekey_buffers(excluded_buffers)) == 0:
+            print(f'Skipped shapekeys fetching!')
+            return {}
+
+        shapekey_groups = self.get_shapekey_groups(obj, vertex_ids)
+
+        return self.build_shapekey_buffers(shapekey_groups, [0], excluded_buffers, mirror_mesh)
+
+    def get_shapekey_buffers(self, excluded_buffers: List[str]) -> Dict[str, NumpyBuffer]:
         buffers = {}
         for buffer_name, buffer_layout in self.buffers_format.items():
             if buffer_name in excluded_buffers:
@@ -129,56 +165,126 @@ class DataModelWWMI(DataModel):
                 if semantic.abstract.enum == Semantic.ShapeKey:
                     buffers[buffer_name] = NumpyBuffer(buffer_layout)
                     break
+        return buffers
+
+    def get_shapekey_groups(self, 
+                            obj: bpy.types.Object,  
+                            vertex_ids: numpy.ndarray,
+                            vertex_counts: Optional[List[int]] = None) -> List[ShapeKeyGroups]:
+        """
+        Returns offsets of exported vertices for all shapekey groups of every part of the object
+        Parts are consecutive ranges of Blender vertices with given counts, by default whole object is a single part
+        Exported vertices of every part must follow exported vertices of previous parts
+        """
+        if vertex_counts is None:
+            vertex_counts = [len(obj.data.vertices)]
+
+        shapekey_pattern = re.compile(r'.*(?:deform|custom)[_ -]*(\d+).*')
+        shapekey_ids = {}
+
+        if obj.data.shape_keys is not None:
+            for shapekey in obj.data.shape_keys.key_blocks:
+                match = shapekey_pattern.findall(shapekey.name.lower())
+                if len(match) == 0:
+                    continue
+                shapekey_id = int(match[0])
+                shapekey_ids[shapekey_id] = shapekey.name
+
+        group_ids = numpy.array(sorted(group_id for group_id in shapekey_ids.keys() if group_id < 128), dtype=numpy.int64)
+
+        if len(group_ids) == 0:
+            return [ShapeKeyGroups(
+                group_ids=numpy.zeros(0, dtype=numpy.int64),
+                vertex_ids=numpy.zeros(0, dtype=numpy.int64),
+                vertex_offsets=numpy.zeros((0, 3), dtype=numpy.float32),
+                significant_group_ids=numpy.zeros(0, dtype=numpy.int64),
+            ) for _ in vertex_counts]
+
+        shapekeys = self.data_extractor.get_stacked_shapekey_data(obj, [shapekey_ids[group_id] for group_id in group_ids], deduct_basis=True)
+
+        # Flag vertices moved by every shapekey, comparison of separate coords is much faster than any() along short axis
+        is_moved = (shapekeys[:, :, 0] != 0) | (shapekeys[:, :, 1] != 0) | (shapekeys[:, :, 2] != 0)
+
+        # Locate ranges of Blender and exported vertices of every part
+        vertex_starts = numpy.cumsum([0] + list(vertex_counts))
+        export_starts = numpy.searchsorted(numpy.sort(vertex_ids), vertex_starts)
+
+        result = []
+
+        for part_id in range(len(vertex_counts)):
+            part_vertex_ids = vertex_ids[export_starts[part_id]:export_starts[part_id+1]]
+
+            # Flat ids of nonzero entries are sorted by group id and then by vertex id
+            entry_ids = numpy.flatnonzero(is_moved[:, part_vertex_ids])
+            stack_ids, shapekey_vert_ids = numpy.divmod(entry_ids, len(part_vertex_ids))
+
+            # Values within threshold still get exported, but don't make shapekey significant
+            part_shapekeys = shapekeys[:, vertex_starts[part_id]:vertex_starts[part_id+1]]
+            if part_shapekeys.shape[1] > 0:
+                part_is_significant = (part_shapekeys.min(axis=(1, 2)) < -0.00000001) | (part_shapekeys.max(axis=(1, 2)) > 0.00000001)
+            else:
+                part_is_significant = numpy.zeros(len(group_ids), dtype=bool)
+
+            result.append(ShapeKeyGroups(
+                group_ids=group_ids[stack_ids],
+                vertex_ids=shapekey_vert_ids,
+                vertex_offsets=shapekeys[stack_ids, part_vertex_ids[shapekey_vert_ids]],
+                significant_group_ids=group_ids[part_is_significant],
+            ))
+
+        return result
+
+    def build_shapekey_buffers(self, 
+                               shapekey_groups: List[Optional[ShapeKeyGroups]],
+                               vertex_offsets: List[int],
+                               excluded_buffers: List[str],
+                               mirror_mesh: bool = False) -> Dict[str, NumpyBuffer]:
+        """
+        Returns shapekey buffers built from shapekey groups of consecutive parts of exported mesh
+        Ids of vertices in groups are local to their part, vertex_offsets hold ids of first vertices of parts
+        Shapekey is exported if it has values above threshold in any part
+        """
+        start_time = time.time()
+
+        buffers = self.get_shapekey_buffers(excluded_buffers)
 
         if len(buffers) == 0:
             print(f'Skipped shapekeys fetching!')
             return {}
 
-        shapekey_offsets, shapekey_vertex_ids, shapekey_vertex_offsets = [], [], []
+        parts = [(groups, vertex_offset) for groups, vertex_offset in zip(shapekey_groups, vertex_offsets) if groups is not None]
 
-        shapekey_pattern = re.compile(r'.*(?:deform|custom)[_ -]*(\d+).*')
-        shapekey_ids = {}
-        
-        for shapekey in obj.data.shape_keys.key_blocks:
-            match = shapekey_pattern.findall(shapekey.name.lower())
-            if len(match) == 0:
-                continue
-            shapekey_id = int(match[0])
-            shapekey_ids[shapekey_id] = shapekey.name
+        if len(parts) == 0:
+            return {}
 
-        shapekeys = self.data_extractor.get_shapekey_data(obj, names_filter=list(shapekey_ids.values()), deduct_basis=True)
+        is_significant = numpy.zeros(128, dtype=bool)
+        for groups, _ in parts:
+            is_significant[groups.significant_group_ids] = True
 
-        shapekey_verts_count = 0
-        for group_id in range(128):
+        group_ids = numpy.concatenate([groups.group_ids for groups, _ in parts])
 
-            shapekey = shapekeys.get(shapekey_ids.get(group_id, -1), None)
-            if shapekey is None or not (-0.00000001 > numpy.min(shapekey) or numpy.max(shapekey) > 0.00000001):
-                shapekey_offsets.extend([shapekey_verts_count if shapekey_verts_count != 0 else 0])
-                continue
+        entry_ids = numpy.flatnonzero(is_significant[group_ids])
 
-            shapekey_offsets.extend([shapekey_verts_count])
+        if len(entry_ids) == 0:
+            return {}
 
-            shapekey = shapekey[vertex_ids]
+        # Stable sort by group id puts entries of all parts of each group together, parts keep their order
+        entry_ids = entry_ids[numpy.argsort(group_ids[entry_ids], kind='stable')]
 
-            shapekey_vert_ids = numpy.where(numpy.any(shapekey != 0, axis=1))[0]
+        shapekey_vertex_ids = numpy.concatenate([groups.vertex_ids + vertex_offset for groups, vertex_offset in parts])
+        shapekey_vertex_ids = shapekey_vertex_ids[entry_ids].astype(numpy.uint32)
 
-            shapekey_vertex_ids.extend(shapekey_vert_ids)
-            shapekey_vertex_offsets.extend(shapekey[shapekey_vert_ids])
-            shapekey_verts_count += len(shapekey_vert_ids)
-            
-        if len(shapekey_vertex_ids) == 0:
-            return {}
+        shapekey_verts_count = len(shapekey_vertex_ids)
 
-        shapekey_offsets = numpy.array(shapekey_offsets)
-        
-        shapekey_vertex_offsets_np = numpy.zeros(len(shapekey_vertex_offsets), dtype=(numpy.float16, 6))
-        # shapekey_vertex_offsets = numpy.zeros(len(shapekey_vertex_offsets), dtype=numpy.float16)
-        shapekey_vertex_offsets_np[:, 0:3] = shapekey_vertex_offsets
+        shapekey_vertex_offsets_np = numpy.zeros(shapekey_verts_count, dtype=(numpy.float16, 6))
+        shapekey_vertex_offsets_np[:, 0:3] = numpy.concatenate([groups.vertex_offsets for groups, _ in parts])[entry_ids]
 
         if mirror_mesh:
             shapekey_vertex_offsets_np[:, 0] *= -1
 
-        shapekey_vertex_ids = numpy.array(shapekey_vertex_ids, dtype=numpy.uint32)
+        # Offset of every group is the number of entries of preceding groups
+        group_counts = numpy.bincount(group_ids[entry_ids], minlength=128)
+        shapekey_offsets = numpy.cumsum(group_counts) - group_counts
 
         buffers['ShapeKeyOffset'].set_data(shapekey_offsets)
         buffers['ShapeKeyVertexId'].set_data(shapekey_vertex_ids)
@@ -199,9 +305,10 @@ class DataModelWWMI(DataModel):
 
         remapped_vgs_counts = []
 
-        if context.scene.wwmi_tools_settings.index_data_cache:
-            # Partial export is enabled and index buffer cache exists, lets load it
-            index_data = numpy.array(json.loads(context.scene.wwmi_tools_settings.index_data_cache)).ravel()
+        index_data = load_array(context.scene.wwmi_tools_settings.index_data_cache)
+        if index_data is not None:
+            # Partial export is enabled and index buffer cache exists
+            index_data = index_data.ravel()
         else:
             if index_buffer is None:
                 raise ValueError(f'Failed to build blend remap: `Index` buffer does not exist!')
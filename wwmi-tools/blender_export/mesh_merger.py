@@ -0,0 +1,290 @@
+import numpy
+import mathutils
+import bpy
+
+from typing import List, Dict, Tuple, Optional
+from dataclasses import dataclass, field
+
+from ..migoto_io.blender_interface.utility import to_radians
+from ..migoto_io.blender_interface.collections import *
+from ..migoto_io.data_model.data_extractor import BlenderDataExtractor
+from ..migoto_io.data_model.mesh_data import ArrayCollection, MeshLayer, KeyBlock, KeyBlocks, ShapeKeys, MeshData, MeshDataObject
+
+from ..extract_frame_data.metadata_format import ExtractedObject
+
+from .object_merger import (SkeletonType, TempObject, MergedObjectComponent, MergedObjectShapeKeys, MergedObject,
+                            collect_component_objects, get_ignored_vertex_groups)
+
+
+def get_mesh_merge_issue(objects: List[bpy.types.Object], apply_modifiers: bool) -> Optional[str]:
+    """
+    Returns reason why objects cannot be merged by MeshMerger or None if they can
+    MeshMerger reproduces vertex order of ObjectMerger only for objects that need no operators to be merged
+    """
+    uv_names, color_names = None, None
+    for obj in objects:
+        if obj.parent is not None:
+            return f'object {obj.name} has parent'
+        if len(obj.modifiers) > 0 and (apply_modifiers or any(modifier.show_viewport for modifier in obj.modifiers)):
+            return f'object {obj.name} has modifiers'
+        if obj.matrix_world.to_3x3().determinant() <= 0:
+            return f'object {obj.name} has mirroring transform'
+        if not is_similarity_transform(obj.matrix_world):
+            return f'object {obj.name} has non-uniform scale'
+        loop_totals = fetch_data(obj.data.polygons, 'loop_total', numpy.int32)
+        if numpy.any(loop_totals != 3):
+            return f'object {obj.name} has non-triangle faces'
+        if uv_names is None:
+            uv_names = {uv_layer.name for uv_layer in obj.data.uv_layers}
+            color_names = {vertex_color.name for vertex_color in obj.data.vertex_colors}
+        elif uv_names != {uv_layer.name for uv_layer in obj.data.uv_layers}:
+            return f'object {obj.name} has different UV maps'
+        elif color_names != {vertex_color.name for vertex_color in obj.data.vertex_colors}:
+            return f'object {obj.name} has different color attributes'
+    return None
+
+
+def is_similarity_transform(matrix: mathutils.Matrix) -> bool:
+    """
+    Returns whether matrix only rotates, moves and uniformly scales
+    Normals and tangents of other transforms must be recalculated for transformed mesh, so they can't be transformed directly
+    """
+    matrix = numpy.array(matrix.to_3x3(), dtype=numpy.float64)
+    gram = matrix.T @ matrix
+    scale = numpy.trace(gram) / 3
+    return scale > 0 and numpy.allclose(gram / scale, numpy.identity(3), rtol=0, atol=1e-5)
+
+
+def fetch_data(data_source, data_name: str, data_type: numpy.dtype, num_values: int = 1) -> numpy.ndarray:
+    result = numpy.empty(len(data_source) * num_values, dtype=data_type)
+    data_source.foreach_get(data_name, result)
+    return result.reshape(-1, num_values) if num_values > 1 else result
+
+
+def normalize_vectors(vectors: numpy.ndarray) -> numpy.ndarray:
+    lengths = numpy.linalg.norm(vectors, axis=1, keepdims=True)
+    lengths[lengths == 0] = 1
+    return vectors / lengths
+
+
+@dataclass
+class MeshPart:
+    positions: numpy.ndarray
+    vertex_ids: numpy.ndarray
+    normals: numpy.ndarray
+    tangents: numpy.ndarray
+    bitangent_signs: numpy.ndarray
+    uvs: Dict[str, numpy.ndarray]
+    colors: Dict[str, numpy.ndarray]
+    vertex_group_weights: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    shapekeys: Dict[str, numpy.ndarray]
+
+
+@dataclass
+class MeshMerger:
+    """
+    Builds merged object from evaluated meshes of component objects, reads their data with foreach_get
+    and applies transforms via numpy, so there are no temporary objects and no operator calls
+    Objects must pass get_mesh_merge_issue check, then vertices and faces are in the same order as of ObjectMerger
+    """
+    # Input
+    context: bpy.types.Context
+    extracted_object: ExtractedObject
+    ignore_nested_collections: bool
+    ignore_hidden_collections: bool
+    ignore_hidden_objects: bool
+    ignore_muted_shape_keys: bool
+    collection: str
+    skeleton_type: SkeletonType
+    mesh_scale: float = 1.0
+    mesh_rotation: Tuple[float] = (0.0, 0.0, 0.0)
+    # Ids of components to build merged object from, objects of other components are skipped
+    component_ids: Optional[List[int]] = None
+    # Output
+    merged_object: MergedObject = field(init=False)
+
+    def __post_init__(self):
+        collection_was_hidden = collection_is_hidden(self.collection)
+        unhide_collection(self.collection)
+
+        try:
+            self.components = [MergedObjectComponent(objects=[]) for _ in self.extracted_object.components]
+            self.vg_ids: Dict[str, int] = {}
+            self.shapekey_names: List[str] = []
+            self.mesh_parts: List[MeshPart] = []
+            self.import_objects_from_collection()
+            self.build_merged_object()
+        finally:
+            if collection_was_hidden:
+                hide_collection(self.collection)
+
+    def get_export_matrix(self) -> mathutils.Matrix:
+        """
+        Returns matrix that ObjectMerger applies to merged mesh to compensate transforms of merged object
+        """
+        matrix = mathutils.Matrix.Identity(4)
+        if self.mesh_rotation != (0.0, 0.0, 0.0):
+            inverted_rotation = tuple([360 - r if r != 0 else 0 for r in self.mesh_rotation])
+            matrix = mathutils.Euler(to_radians(inverted_rotation)).to_matrix().to_4x4()
+        if self.mesh_scale != 1.0:
+            matrix = matrix @ mathutils.Matrix.Scale(1 / self.mesh_scale, 4)
+        return matrix
+
+    def import_objects_from_collection(self):
+
+        component_objects = collect_component_objects(self.collection, len(self.components),
+                                                      ignore_nested_collections=self.ignore_nested_collections,
+                                                      ignore_hidden_collections=self.ignore_hidden_collections,
+                                                      ignore_hidden_objects=self.ignore_hidden_objects)
+
+        export_matrix = self.get_export_matrix()
+        index_offset = 0
+
+        for component_id, objects in enumerate(component_objects):
+
+            if self.component_ids is not None and component_id not in self.component_ids:
+                continue
+
+            component = self.components[component_id]
+
+            for obj in sorted(objects, key=lambda obj: obj.name):
+                mesh_part = self.get_mesh_part(obj, component_id, component, export_matrix @ obj.matrix_world)
+                self.mesh_parts.append(mesh_part)
+
+                temp_object = TempObject(
+                    name=obj.name,
+                    object=None,
+                    vertex_count=len(mesh_part.positions),
+                    index_count=len(mesh_part.vertex_ids),
+                    index_offset=index_offset,
+                )
+                component.objects.append(temp_object)
+
+                index_offset += temp_object.index_count
+                component.vertex_count += temp_object.vertex_count
+                component.index_count += temp_object.index_count
+
+        if len(self.mesh_parts) == 0:
+            raise ValueError(f'No eligible `Component` objects found!')
+
+    def get_mesh_part(self, obj: bpy.types.Object, component_id: int, component: MergedObjectComponent, matrix: mathutils.Matrix) -> MeshPart:
+        matrix = numpy.array(matrix, dtype=numpy.float64)
+        rotation, translation = matrix[:3, :3], matrix[:3, 3]
+        # Normals are transformed by inverse transpose matrix, so rows are multiplied by inverse one
+        normal_rotation = numpy.linalg.inv(rotation)
+
+        def transform_points(points):
+            return (points @ rotation.T + translation).astype(numpy.float32)
+
+        evaluated_obj = obj.evaluated_get(self.context.evaluated_depsgraph_get())
+        mesh = evaluated_obj.to_mesh()
+        try:
+            if bpy.app.version < (4, 1):
+                mesh.calc_normals_split()
+            mesh.calc_tangents()
+
+            positions = transform_points(fetch_data(mesh.vertices, 'undeformed_co', numpy.float32, 3))
+            vertex_ids = fetch_data(mesh.loops, 'vertex_index', numpy.int64)
+            normals = normalize_vectors(fetch_data(mesh.loops, 'normal', numpy.float32, 3) @ normal_rotation)
+            tangents = normalize_vectors(fetch_data(mesh.loops, 'tangent', numpy.float32, 3) @ rotation.T)
+            bitangent_signs = fetch_data(mesh.loops, 'bitangent_sign', numpy.float32)
+            uvs = {uv_layer.name: fetch_data(uv_layer.data, 'uv', numpy.float32, 2) for uv_layer in mesh.uv_layers}
+            colors = {vertex_color.name: fetch_data(vertex_color.data, 'color', numpy.float32, 4) for vertex_color in mesh.vertex_colors}
+        finally:
+            evaluated_obj.to_mesh_clear()
+
+        # Remove ignored or unexpected VGs and rename remaining ones to their new indices, like ObjectMerger does
+        # Merged object lists VGs in order of their first occurrence, so ids of VGs are remapped to positions in this list
+        ignored_vg_ids = {vg.index for vg in get_ignored_vertex_groups(list(obj.vertex_groups), self.extracted_object, self.skeleton_type, component_id)}
+        vg_remap = numpy.full(len(obj.vertex_groups), -1, dtype=numpy.int64)
+        vg_index = 0
+        for vg in obj.vertex_groups:
+            if vg.index in ignored_vg_ids:
+                continue
+            vg_name = str(vg_index)
+            vg_index += 1
+            component.vg_names.add(vg_name)
+            vg_remap[vg.index] = self.vg_ids.setdefault(vg_name, len(self.vg_ids))
+
+        vg_vertex_ids, vg_ids, vg_weights = BlenderDataExtractor.get_vertex_group_weights(obj.data.vertices)
+        vg_ids = vg_remap[vg_ids]
+        selected = vg_ids >= 0
+
+        shapekeys = {}
+        if obj.data.shape_keys is not None:
+            for shapekey in obj.data.shape_keys.key_blocks:
+                if self.ignore_muted_shape_keys and shapekey.mute:
+                    continue
+                shapekeys[shapekey.name] = transform_points(fetch_data(shapekey.data, 'co', numpy.float32, 3))
+                if shapekey.name not in self.shapekey_names:
+                    self.shapekey_names.append(shapekey.name)
+
+        return MeshPart(
+            positions=positions,
+            vertex_ids=vertex_ids,
+            normals=normals.astype(numpy.float32),
+            tangents=tangents.astype(numpy.float32),
+            bitangent_signs=bitangent_signs,
+            uvs=uvs,
+            colors=colors,
+            vertex_group_weights=(vg_vertex_ids[selected], vg_ids[selected], vg_weights[selected]),
+            shapekeys=shapekeys,
+        )
+
+    def build_merged_object(self):
+
+        vertex_offsets = numpy.cumsum([0] + [len(mesh_part.positions) for mesh_part in self.mesh_parts])
+        vertex_count, index_count = int(vertex_offsets[-1]), sum(len(mesh_part.vertex_ids) for mesh_part in self.mesh_parts)
+
+        def concatenate(arrays):
+            return numpy.concatenate(arrays) if len(arrays) > 1 else arrays[0]
+
+        positions = concatenate([mesh_part.positions for mesh_part in self.mesh_parts])
+        vertices = ArrayCollection(vertex_count, {'co': positions, 'undeformed_co': positions})
+
+        loops = ArrayCollection(index_count, {
+            'vertex_index': concatenate([mesh_part.vertex_ids + vertex_offsets[part_id] for part_id, mesh_part in enumerate(self.mesh_parts)]),
+            'normal': concatenate([mesh_part.normals for mesh_part in self.mesh_parts]),
+            'tangent': concatenate([mesh_part.tangents for mesh_part in self.mesh_parts]),
+            'bitangent_sign': concatenate([mesh_part.bitangent_signs for mesh_part in self.mesh_parts]),
+        })
+
+        uv_layers = {}
+        for uv_name in self.mesh_parts[0].uvs.keys():
+            uv_data = ArrayCollection(index_count, {'uv': concatenate([mesh_part.uvs[uv_name] for mesh_part in self.mesh_parts])})
+            uv_layers[uv_name] = MeshLayer(uv_name, uv_data)
+
+        vertex_colors = {}
+        for color_name in self.mesh_parts[0].colors.keys():
+            color_data = ArrayCollection(index_count, {'color': concatenate([mesh_part.colors[color_name] for mesh_part in self.mesh_parts])})
+            vertex_colors[color_name] = MeshLayer(color_name, color_data)
+
+        vertex_group_weights = tuple(
+            concatenate([mesh_part.vertex_group_weights[i] + (vertex_offsets[part_id] if i == 0 else 0)
+                         for part_id, mesh_part in enumerate(self.mesh_parts)])
+            for i in range(3)
+        )
+
+        # Objects without some shapekey get their basis coords for it, the same way as joined ones do
+        shape_keys = None
+        if len(self.shapekey_names) > 0:
+            key_blocks = KeyBlocks()
+            for shapekey_name in self.shapekey_names:
+                shapekey_data = concatenate([mesh_part.shapekeys.get(shapekey_name, mesh_part.positions) for mesh_part in self.mesh_parts])
+                key_blocks.append(KeyBlock(shapekey_name, ArrayCollection(vertex_count, {'co': shapekey_data})))
+            shape_keys = ShapeKeys(key_blocks)
+
+        mesh = MeshData('TEMP_EXPORT_OBJECT', vertices, loops, uv_layers, vertex_colors, vertex_group_weights, shape_keys)
+
+        obj = MeshDataObject('TEMP_EXPORT_OBJECT', mesh, list(self.vg_ids.keys()))
+
+        self.merged_object = MergedObject(
+            object=obj,
+            mesh=mesh,
+            components=self.components,
+            vertex_count=vertex_count,
+            index_count=index_count,
+            vg_count=len(self.vg_ids),
+            shapekeys=MergedObjectShapeKeys(),
+            skeleton_type=self.skeleton_type,
+        )
@@ -1,7 +1,7 @@
 import re
 import bpy
 
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Optional, Set
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -36,6 +36,7 @@ class MergedObjectComponent:
     index_count: int = 0
     blend_remap_id: int = -1
     blend_remap_vg_count: int = 0
+    vg_names: Set[str] = field(default_factory=set)
     
     def get_object(self, object_name):
         for obj in self.objects:
@@ -61,6 +62,55 @@ class MergedObject:
     blend_remap_count: int = 0
 
 
+def collect_component_objects(collection: bpy.types.Collection,
+                              num_components: int,
+                              ignore_nested_collections: bool,
+                              ignore_hidden_collections: bool,
+                              ignore_hidden_objects: bool) -> List[List[bpy.types.Object]]:
+    """
+    Returns lists of eligible objects of every component, component id is parsed from object name
+    """
+    component_objects = [[] for _ in range(num_components)]
+
+    component_pattern = re.compile(r'.*component[_ -]*(\d+).*')
+
+    for obj in get_collection_objects(collection, 
+                                      recursive = not ignore_nested_collections, 
+                                      skip_hidden_collections = ignore_hidden_collections):
+
+        if ignore_hidden_objects and object_is_hidden(obj):
+            continue
+
+        if obj.name.startswith('TEMP_'):
+            continue
+        
+        match = component_pattern.findall(obj.name.lower())
+        if len(match) == 0:
+            continue
+        component_id = int(match[0])
+
+        if component_id >= num_components:
+            raise ConfigError('object_source_folder', f'Metadata.json in specified folder is missing Component {component_id}!\nMost likely it contains sources for other object.')
+
+        component_objects[component_id].append(obj)
+
+    return component_objects
+
+
+def get_ignored_vertex_groups(vertex_groups: List[bpy.types.VertexGroup],
+                              extracted_object: ExtractedObject,
+                              skeleton_type: SkeletonType,
+                              component_id: int) -> List[bpy.types.VertexGroup]:
+    if skeleton_type == SkeletonType.Merged:
+        # Exclude VGs with 'ignore' tag or with higher id VG count from Metadata.ini for current component
+        total_vg_count = sum([component.vg_count for component in extracted_object.components])
+    elif skeleton_type == SkeletonType.PerComponent:
+        # Exclude VGs with 'ignore' tag or with higher id VG count from Metadata.ini for current component
+        extracted_component = extracted_object.components[component_id]
+        total_vg_count = len(extracted_component.vg_map)
+    return [vg for vg in vertex_groups if 'ignore' in vg.name.lower() or vg.index >= total_vg_count]
+
+
 @dataclass
 class ObjectMerger:
     # Input
@@ -75,6 +125,8 @@ class ObjectMerger:
     skeleton_type: SkeletonType
     mesh_scale: float = 1.0
     mesh_rotation: Tuple[float] = (0.0, 0.0, 0.0)
+    # Ids of components to build merged object from, objects of other components are skipped
+    component_ids: Optional[List[int]] = None
     # Output
     merged_object: MergedObject = field(init=False)
 
@@ -107,35 +159,27 @@ class ObjectMerger:
     def import_objects_from_collection(self):
 
         num_objects = 0
-        
-        component_pattern = re.compile(r'.*component[_ -]*(\d+).*')
 
-        for obj in get_collection_objects(self.collection, 
-                                          recursive = not self.ignore_nested_collections, 
-                                          skip_hidden_collections = self.ignore_hidden_collections):
+        component_objects = collect_component_objects(self.collection, len(self.components),
+                                                      ignore_nested_collections=self.ignore_nested_collections,
+                                                      ignore_hidden_collections=self.ignore_hidden_collections,
+                                                      ignore_hidden_objects=self.ignore_hidden_objects)
 
-            if self.ignore_hidden_objects and object_is_hidden(obj):
-                continue
+        for component_id, objects in enumerate(component_objects):
 
-            if obj.name.startswith('TEMP_'):
-                continue
-            
-            match = component_pattern.findall(obj.name.lower())
-            if len(match) == 0:
+            if self.component_ids is not None and component_id not in self.component_ids:
                 continue
-            component_id = int(match[0])
 
-            if component_id >= len(self.components):
-                raise ConfigError('object_source_folder', f'Metadata.json in specified folder is missing Component {component_id}!\nMost likely it contains sources for other object.')
+            for obj in objects:
 
-            temp_obj = copy_object(self.context, obj, name=f'TEMP_{obj.name}', collection=self.collection)
+                temp_obj = copy_object(self.context, obj, name=f'TEMP_{obj.name}', collection=self.collection)
 
-            self.components[component_id].objects.append(TempObject(
-                name=obj.name,
-                object=temp_obj,
-            ))
+                self.components[component_id].objects.append(TempObject(
+                    name=obj.name,
+                    object=temp_obj,
+                ))
 
-            num_objects += 1
+                num_objects += 1
 
         if num_objects == 0:
             raise ValueError(f'No eligible `Component` objects found!')
@@ -172,19 +216,12 @@ class ObjectMerger:
                 # Handle Vertex Groups
                 vertex_groups = get_vertex_groups(temp_obj)
                 # Remove ignored or unexpected vertex groups
-                if self.skeleton_type == SkeletonType.Merged:
-                    # Exclude VGs with 'ignore' tag or with higher id VG count from Metadata.ini for current component
-                    total_vg_count = sum([component.vg_count for component in self.extracted_object.components])
-                    ignore_list = [vg for vg in vertex_groups if 'ignore' in vg.name.lower() or vg.index >= total_vg_count]
-                elif self.skeleton_type == SkeletonType.PerComponent:
-                    # Exclude VGs with 'ignore' tag or with higher id VG count from Metadata.ini for current component
-                    extracted_component = self.extracted_object.components[component_id]
-                    total_vg_count = len(extracted_component.vg_map)
-                    ignore_list = [vg for vg in vertex_groups if 'ignore' in vg.name.lower() or vg.index >= total_vg_count]
+                ignore_list = get_ignored_vertex_groups(vertex_groups, self.extracted_object, self.skeleton_type, component_id)
                 remove_vertex_groups(temp_obj, ignore_list)
                 # Rename VGs to their indicies to merge ones of different components together
                 for vg in get_vertex_groups(temp_obj):
                     vg.name = str(vg.index)
+                    component.vg_names.add(vg.name)
                 # Calculate vertex count of temporary object
                 temp_object.vertex_count = len(temp_obj.data.vertices)
                 # Calculate index count of temporary object, IB stores 3 indices per triangle
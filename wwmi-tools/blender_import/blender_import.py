@@ -15,6 +15,7 @@ from ..migoto_io.blender_interface.collections import *
 from ..migoto_io.blender_interface.objects import *
 from ..migoto_io.data_model.data_model import DataModel
 from ..migoto_io.data_model.byte_buffer import NumpyBuffer, MigotoFmt
+from ..migoto_io.data_model.converters import ConverterPlanner
 
 from ..extract_frame_data.metadata_format import read_metadata
 
@@ -33,6 +34,9 @@ class ObjectImporter:
         print(f"Object import started for '{object_source_folder.stem}' folder")
 
         imported_objects = []
+
+        # Components share converter chains, so plans compiled for the first one are reused by the rest
+        converter_planner = ConverterPlanner()
         
         for filename in os.listdir(object_source_folder):
             if not filename.endswith('fmt'):
@@ -47,7 +51,7 @@ class ObjectImporter:
             if not vb_path.is_file():
                 raise ConfigError('object_source_folder', f'Specified folder is missing .fmt file for {fmt_path.stem}!')
 
-            obj = self.import_component(operator, context, cfg, fmt_path, ib_path, vb_path)
+            obj = self.import_component(operator, context, cfg, fmt_path, ib_path, vb_path, converter_planner=converter_planner)
 
             # from .import_old import import_3dmigoto_vb_ib
             # obj = import_3dmigoto_vb_ib(operator, context, cfg, [((vb_path, fmt_path), (ib_path, fmt_path), True, None)], flip_mesh=cfg.mirror_mesh, flip_winding=True)
@@ -63,18 +67,19 @@ class ObjectImporter:
 
         print(f'Total import time: {time.time() - start_time :.3f}s')
 
-    def import_component(self, operator, context, cfg, fmt_path: Path, ib_path: Path, vb_path: Path, axis_forward='Y', axis_up='Z'):
+    def import_component(self, operator, context, cfg, fmt_path: Path, ib_path: Path, vb_path: Path, axis_forward='Y', axis_up='Z', converter_planner=None):
 
         start_time = time.time()
 
-        with open(fmt_path, 'r') as fmt, open(ib_path, 'rb') as ib, open(vb_path, 'rb') as vb:
+        with open(fmt_path, 'r') as fmt:
             migoto_fmt = MigotoFmt(fmt)
 
+            # Map buffer files instead of reading them, so importer would hold only one chunk of raw data at a time
             index_buffer = NumpyBuffer(migoto_fmt.ib_layout)
-            index_buffer.import_raw_data(ib.read())
+            index_buffer.import_file(ib_path)
 
             vertex_buffer = NumpyBuffer(migoto_fmt.vb_layout)
-            vertex_buffer.import_raw_data(vb.read())
+            vertex_buffer.import_file(vb_path)
 
             object_source_folder = resolve_path(cfg.object_source_folder)
             try:
@@ -102,11 +107,14 @@ class ObjectImporter:
             model.flip_winding = True
             model.flip_texcoord_v = True
 
-            model.set_data(obj, mesh, index_buffer, vertex_buffer, vg_remap, mirror_mesh=cfg.mirror_mesh, mesh_scale=0.01, mesh_rotation=(0, 0, 180))
+            model.set_data(obj, mesh, index_buffer, vertex_buffer, vg_remap, mirror_mesh=cfg.mirror_mesh, mesh_scale=0.01, mesh_rotation=(0, 0, 180), converter_planner=converter_planner)
 
             num_shapekeys = 0 if obj.data.shape_keys is None else len(getattr(obj.data.shape_keys, 'key_blocks', []))
 
-            print(f'{fmt_path.stem} import time: {time.time()-start_time :.3f}s ({len(obj.data.vertices)} vertices, {len(obj.data.loops)} indices, {num_shapekeys} shapekeys)')
+            peak_memory_usage = get_peak_memory_usage()
+            peak_memory_usage = f', peak RSS {peak_memory_usage / 1024 / 1024 :.1f}MB' if peak_memory_usage is not None else ''
+
+            print(f'{fmt_path.stem} import time: {time.time()-start_time :.3f}s ({len(obj.data.vertices)} vertices, {len(obj.data.loops)} indices, {num_shapekeys} shapekeys{peak_memory_usage})')
 
             return obj
 
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Headless frame dump extraction, runs without Blender
+
+Usage:
+    python extract.py <frame dump folder> <output folder> [options]
+    python -m <addon package>.extract <frame dump folder> <output folder> [options]
+"""
+import sys
+import argparse
+import importlib.util
+
+from pathlib import Path
+from argparse import Namespace
+
+
+if not __package__:
+    # Started as script, so register addon folder as package to make its relative imports work
+    # It runs on module level to let process pool workers unpickle jobs in spawned processes as well
+    package_path = Path(__file__).parent
+    if 'wwmi_tools' not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            'wwmi_tools', package_path / '__init__.py', submodule_search_locations=[str(package_path)])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['wwmi_tools'] = module
+        spec.loader.exec_module(module)
+    __package__ = 'wwmi_tools'
+
+from .addon.exceptions import ConfigError
+from .extract_frame_data.extract_frame_data import extract_frame_data_headless
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description='Extract WWMI objects from frame dump without Blender')
+
+    parser.add_argument('frame_dump_folder', type=Path,
+                        help='Frame dump files directory')
+    parser.add_argument('extract_output_folder', type=Path,
+                        help='Extracted WWMI objects export directory')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of processes to build and write objects with. Default is number of CPUs')
+    parser.add_argument('--no-cache', dest='use_frame_dump_cache', action='store_false',
+                        help='Do not store parsed frame dump data and resource hashes in cache file next to log.txt')
+    parser.add_argument('--prefilter', dest='use_frame_dump_prefilter', action='store_true',
+                        help='Skip parsing of dump files from calls that have no resources in slots used by extraction')
+    parser.add_argument('--vb-hashes', dest='extract_target_vb_hashes', default='',
+                        help='Comma-separated list of VB hashes of objects to extract')
+    parser.add_argument('--ib-hashes', dest='extract_target_ib_hashes', default='',
+                        help='Comma-separated list of IB hashes of components to extract')
+    parser.add_argument('--allow-missing-shapekeys', dest='allow_missing_shapekeys', action='store_true',
+                        help='Do not skip extraction of objects with missing shapekeys data')
+    parser.add_argument('--min-texture-size', dest='skip_small_textures_size', type=int, default=256,
+                        help='Minimal texture size in KB, 0 disables filtering. Default is 256KB')
+    parser.add_argument('--keep-jpg-textures', dest='skip_jpg_textures', action='store_false',
+                        help='Do not skip textures with .jpg extension')
+    parser.add_argument('--skip-same-slot-hash-textures', dest='skip_same_slot_hash_textures', action='store_true',
+                        help='Skip texture if its hash is found in same slot of all components')
+
+    return parser.parse_args(args)
+
+
+def get_cfg(args):
+    """
+    Returns config with the same attributes as extraction settings of Blender addon
+    """
+    return Namespace(
+        frame_dump_folder=str(args.frame_dump_folder),
+        extract_output_folder=str(args.extract_output_folder),
+        use_frame_dump_cache=args.use_frame_dump_cache,
+        use_frame_dump_prefilter=args.use_frame_dump_prefilter,
+        extract_target_vb_hashes=args.extract_target_vb_hashes,
+        extract_target_ib_hashes=args.extract_target_ib_hashes,
+        allow_missing_shapekeys=args.allow_missing_shapekeys,
+        skip_small_textures=args.skip_small_textures_size > 0,
+        skip_small_textures_size=args.skip_small_textures_size,
+        skip_jpg_textures=args.skip_jpg_textures,
+        skip_same_slot_hash_textures=args.skip_same_slot_hash_textures,
+        last_error_setting_name='',
+        last_error_text='',
+    )
+
+
+def main(args=None):
+    args = parse_args(args)
+    cfg = get_cfg(args)
+
+    try:
+        results = extract_frame_data_headless(
+            cfg, args.frame_dump_folder.resolve(), args.extract_output_folder.resolve(), args.workers)
+    except ConfigError:
+        # Error message is already printed by ConfigError
+        return 1
+
+    objects_missing_shapekeys = [object_hash for object_hash, is_missing_shapekeys in results if is_missing_shapekeys]
+
+    num_extracted = len(results) if cfg.allow_missing_shapekeys else len(results) - len(objects_missing_shapekeys)
+
+    print(f'Extracted {num_extracted} objects to {args.extract_output_folder}')
+    if len(objects_missing_shapekeys) > 0:
+        action = 'extracted with _MISSING_SHAPEKEYS suffix' if cfg.allow_missing_shapekeys else 'skipped'
+        print(f'Objects {", ".join(objects_missing_shapekeys)} were {action}: frame dump is missing shapekeys data!')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import logging
 import copy
+import numpy
 
 from dataclasses import dataclass, field
 from typing import List, Dict
@@ -8,6 +9,7 @@ from collections import OrderedDict
 
 from ..migoto_io.data_model.byte_buffer import ByteBuffer, IndexBuffer, BufferLayout, BufferSemantic, AbstractSemantic, Semantic
 from ..migoto_io.dump_parser.filename_parser import ResourceDescriptor
+from ..migoto_io.dump_parser.resource_collector import LazyResource
 
 from .data_extractor import ShapeKeyData, DrawData
 from .shapekey_builder import ShapeKeys
@@ -31,6 +33,14 @@ class MeshComponent:
     vertex_buffer: ByteBuffer
     skeleton_buffer: ByteBuffer
     textures: Dict[str, List[ResourceDescriptor]]
+    # VG id indexed array of VG ids of merged skeleton, VGs linked to zero-valued bones are set to -1
+    vg_map: numpy.ndarray = None
+
+    def get_vg_map(self):
+        """
+        Returns {VG id: merged skeleton VG id} dict of VGs linked to non-zero bones
+        """
+        return {vg_id: merged_vg_id for vg_id, merged_vg_id in enumerate(self.vg_map.tolist()) if merged_vg_id != -1}
 
 
 @dataclass()
@@ -67,7 +77,10 @@ class MeshObject:
             if component.draw_data.cb4_hash != common_cb4_hash:
                 if component.draw_data.cb3_hash != common_cb4_hash:
                     raise ValueError(f'component %d CB4 hash mismatch for object %s (common hash: %s)' % (component_id, self.vb0_hash, common_cb4_hash))
-                component.draw_data.skeleton_data = component.draw_data.skeleton_data_cb3
+                skeleton_data_cb3 = component.draw_data.skeleton_data_cb3
+                if isinstance(skeleton_data_cb3, LazyResource):
+                    skeleton_data_cb3 = skeleton_data_cb3.get()
+                component.draw_data.skeleton_data = skeleton_data_cb3
 
         self.cb4_hash = common_cb4_hash
 
@@ -148,10 +161,7 @@ class MeshObject:
             vb.import_buffer(shapekey_buffer)
 
         # Decrease vertex ids in IB by component offset to make them start from 0
-        draw_data.index_buffer.faces = [
-            tuple(vertex_index - draw_data.vertex_offset for vertex_index in face)
-            for face in draw_data.index_buffer.faces
-        ]
+        draw_data.index_buffer.faces = draw_data.index_buffer.faces - draw_data.vertex_offset
 
         textures = {}
         for texture in draw_data.textures:
@@ -176,53 +186,66 @@ class MeshObject:
     def get_merged_vg_map(self):
         """
         Concatenates VGs of components and remaps duplicate VGs based on bone values from skeleton buffers
+        Bone owner is the first component containing it, VGs of other components are remapped to the last
+        VG of owner component linked to the same bone, duplicate VGs within the same component are kept as is
         """
         vg_offset = 0
-        vg_map = {}
-        unique_bones = {}
+        bones, bones_component_ids, bones_vg_ids = [], [], []
 
         for component_id, component in enumerate(self.components):
-            vg_map[component_id] = {}
-            # Fetch joined list of all VG ids of all vertices of the component (4 VG ids per vertex)
-            vertex_groups = component.vertex_buffer.get_values(AbstractSemantic(Semantic.Blendindices))
             # For remapping purposes, VG count is the highest used VG id among all vertices of the component
             # It allows to efficiently construct merged skeleton buffer in-game via vg_offset & vg_count of components
             component.vg_offset = vg_offset
-            component.vg_count = max(vertex_groups) + 1
+            component.vg_count = int(component.vertex_buffer.get_array(AbstractSemantic(Semantic.Blendindices)).max()) + 1
             # Ensure frame dump data integrity
             if component.skeleton_buffer.num_elements < component.vg_count:
                 raise ValueError('skeleton of Component_%d has only %d bones, while there are %d VGs declared' % (
                     component_id, component.skeleton_buffer.num_elements, component.vg_count))
-            # Build VG map
-            for vg_id in range(component.vg_count):
-                # Fetch data floats of bone which VG is linked to
-                buffer_element = component.skeleton_buffer.get_element(vg_id)
-                bone_data = tuple(buffer_element.get_value(AbstractSemantic(Semantic.RawData)))
-                # Skip zero-valued bone (garbage data)
-                if all(v == 0 for v in bone_data):
-                    continue
-                # Get desc object of already registered unique bone data
-                unique_bone_data = unique_bones.get(bone_data, None)
-                # Register VG in VG map
-                if unique_bone_data is None or unique_bone_data['component_id'] == component_id:
-                    # Handle new VG or duplicate VG within same component
-                    shifted_vg_id = vg_offset + vg_id  # Remap VG to VG of merged skeleton
-                    vg_map[component_id][vg_id] = shifted_vg_id  # Remap VG to VG of merged skeleton
-                    unique_bones[bone_data] = {  # Register unique bone data
-                        'component_id': component_id,
-                        'vg_id': shifted_vg_id
-                    }
-                else:
-                    # Handle duplicate VG across different components
-                    vg_map[component_id][vg_id] = unique_bone_data['vg_id']  # Remap VG to VG of already registered bone
-                    log.info(f'Remapped duplicate VG %d of Component_%d to VG %d of Component_%s' % (
-                        vg_id, component_id, vg_map[component_id][vg_id], unique_bone_data["component_id"]))
-                    
+            # Fetch data floats of bones which VGs are linked to
+            skeleton = component.skeleton_buffer.get_array(AbstractSemantic(Semantic.RawData))
+            bones.append(skeleton.reshape(component.skeleton_buffer.num_elements, -1)[:component.vg_count])
+            bones_component_ids.append(numpy.full(component.vg_count, component_id))
+            bones_vg_ids.append(numpy.arange(component.vg_count))
             vg_offset += component.vg_count
 
+        # Adding zero turns -0.0 into 0.0, so rows compared bytewise by unique match the same way floats do
+        bones = numpy.concatenate(bones) + 0
+        bones_component_ids = numpy.concatenate(bones_component_ids)
+        bones_vg_ids = numpy.concatenate(bones_vg_ids)
+        # Remap VGs to VGs of merged skeleton
+        shifted_vg_ids = numpy.arange(len(bones))
+        merged_vg_ids = numpy.full(len(bones), -1)
+
+        # Skip zero-valued bones (garbage data)
+        is_valid = numpy.any(bones != 0, axis=1)
+        valid_bones_ids = numpy.flatnonzero(is_valid)
+
+        if len(valid_bones_ids) > 0:
+            _, first_bone_ids, unique_bone_ids = numpy.unique(
+                bones[valid_bones_ids], axis=0, return_index=True, return_inverse=True)
+            unique_bone_ids = unique_bone_ids.reshape(-1)
+            valid_component_ids = bones_component_ids[valid_bones_ids]
+            # Owner of unique bone is the first component containing it
+            owner_component_ids = valid_component_ids[first_bone_ids]
+            is_owned = valid_component_ids == owner_component_ids[unique_bone_ids]
+            # Bone is registered by the last VG of owner component linked to it
+            registered_vg_ids = numpy.full(len(first_bone_ids), -1)
+            numpy.maximum.at(registered_vg_ids, unique_bone_ids[is_owned], valid_bones_ids[is_owned])
+            merged_vg_ids[valid_bones_ids] = numpy.where(
+                is_owned, shifted_vg_ids[valid_bones_ids], registered_vg_ids[unique_bone_ids])
+
+            for bone_id in valid_bones_ids[~is_owned].tolist():
+                log.info(f'Remapped duplicate VG %d of Component_%d to VG %d of Component_%s' % (
+                    bones_vg_ids[bone_id], bones_component_ids[bone_id], merged_vg_ids[bone_id],
+                    bones_component_ids[merged_vg_ids[bone_id]]))
+
         log.info(f'Build Merged VG Map for {vg_offset} Vertex Groups')
 
-        return dict(sorted(vg_map.items()))
+        vg_map = {}
+        for component_id, component in enumerate(self.components):
+            vg_map[component_id] = merged_vg_ids[component.vg_offset:component.vg_offset + component.vg_count]
+
+        return vg_map
 
     # def merge_vertex_groups(self):
     #         # Remap VG ids based on map we've constructed
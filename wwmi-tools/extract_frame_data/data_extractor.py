@@ -6,7 +6,7 @@ from enum import Enum
 from ..migoto_io.data_model.byte_buffer import ByteBuffer, IndexBuffer, BufferLayout, BufferSemantic, AbstractSemantic, Semantic
 from ..migoto_io.dump_parser.log_parser import CallParameters
 from ..migoto_io.dump_parser.filename_parser import ResourceDescriptor
-from ..migoto_io.dump_parser.resource_collector import ShaderCallBranch
+from ..migoto_io.dump_parser.resource_collector import ShaderCallBranch, LazyResource
 
 
 class PoseConstantBufferFormat(Enum):
@@ -40,7 +40,8 @@ class DrawData:
     color_buffer: ByteBuffer
     blend_buffer: ByteBuffer
     skeleton_data: ByteBuffer
-    skeleton_data_cb3: ByteBuffer
+    # Parsed only if component builder picks CB3 skeleton layout for this draw call
+    skeleton_data_cb3: Union[ByteBuffer, LazyResource]
     shapekey_hash: Union[str, None]
     textures: List[ResourceDescriptor]
 
@@ -140,9 +141,8 @@ class DataExtractor:
 
                 vb_hash = branch_call.resources['POSE_INPUT_0'].hash
 
-                vertex_indices = [x for y in index_buffer.faces for x in y]
-                vertex_offset = min(vertex_indices)
-                vertex_count = max(vertex_indices) - vertex_offset + 1
+                vertex_offset = int(index_buffer.faces.min())
+                vertex_count = int(index_buffer.faces.max()) - vertex_offset + 1
 
                 draw_guid = (vertex_offset, vertex_count, vb_hash)
 
@@ -201,7 +201,7 @@ class DataExtractor:
                     color_buffer=color_buffer,
                     blend_buffer=blend_buffer.get_fragment(vertex_offset, vertex_count),
                     skeleton_data=branch_call.resources['SKELETON_DATA_BUFFER'],
-                    skeleton_data_cb3=branch_call.resources['SKELETON_DATA_BUFFER_CB3'],
+                    skeleton_data_cb3=branch_call.resources.get_lazy('SKELETON_DATA_BUFFER_CB3'),
                     textures=textures,
                     shapekey_hash=shapekey_hash,
                 )
@@ -5,21 +5,22 @@ import json
 import shutil
 
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Set
 from dataclasses import dataclass
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 from ..addon.exceptions import ConfigError
 
-from ..migoto_io.blender_interface.utility import *
-
 from ..migoto_io.data_model.dxgi_format import DXGIFormat
 from ..migoto_io.data_model.byte_buffer import BufferLayout, BufferSemantic, AbstractSemantic, Semantic, ByteBuffer
 
 from ..migoto_io.dump_parser.filename_parser import ShaderType, SlotType, SlotId
 from ..migoto_io.dump_parser.dump_parser import Dump
+from ..migoto_io.dump_parser.dump_prefilter import DumpPrefilter
+from ..migoto_io.dump_parser.resource_hasher import ResourceHasher
 from ..migoto_io.dump_parser.resource_collector import Source
-from ..migoto_io.dump_parser.calls_collector import ShaderMap, Slot
+from ..migoto_io.dump_parser.calls_collector import ShaderMap, Slot, ShaderCallBranch
 from ..migoto_io.dump_parser.data_collector import DataMap, DataCollector
 
 from .data_extractor import DataExtractor
@@ -217,6 +218,72 @@ configuration = Configuration(
 )
 
 
+@dataclass
+class TargetFilter:
+    """
+    Narrows down extraction to objects with listed VB hashes and components with listed IB hashes
+    Applied to resolved call branches, so calls of other objects are never hashed, parsed or written
+    """
+    vb_hashes: Set[str]
+    ib_hashes: Set[str]
+
+    @staticmethod
+    def parse_hashes(raw_hashes: str) -> Set[str]:
+        return set(raw_hash.strip().lower() for raw_hash in raw_hashes.replace(',', ' ').split())
+
+    @staticmethod
+    def get_resource_hash(call, filter_attributes):
+        resource = call.get_filtered_resource(filter_attributes)
+        return resource.hash if resource is not None else None
+
+    def is_target_draw_call(self, call):
+        if len(self.vb_hashes) > 0:
+            if self.get_resource_hash(call, {'slot_type': SlotType.VertexBuffer, 'slot_id': SlotId(0)}) not in self.vb_hashes:
+                return False
+        if len(self.ib_hashes) > 0:
+            if self.get_resource_hash(call, {'slot_type': SlotType.IndexBuffer}) not in self.ib_hashes:
+                return False
+        return True
+
+    def filter_branches(self, call_branches: List[ShaderCallBranch], shader_id, call_filter):
+        """
+        Returns copy of call branches with calls of given shader filtered, branches are shared between parents so
+        they must stay intact
+        """
+        result = []
+        for call_branch in call_branches:
+            calls = call_branch.calls
+            if call_branch.shader_id == shader_id:
+                calls = [branch_call for branch_call in calls if call_filter(branch_call.call)]
+            result.append(ShaderCallBranch(
+                shader_id=call_branch.shader_id,
+                calls=calls,
+                nested_branches=self.filter_branches(call_branch.nested_branches, shader_id, call_filter),
+            ))
+        return result
+
+    def filter_call_branches(self, call_branches: Dict[str, ShaderCallBranch]):
+        draw_branches = self.filter_branches(list(call_branches.values()), 'DRAW_VS', self.is_target_draw_call)
+
+        num_calls = sum(len(branch.calls) for branch in call_branches.values() if branch.shader_id == 'DRAW_VS')
+        num_target_calls = sum(len(branch.calls) for branch in draw_branches if branch.shader_id == 'DRAW_VS')
+
+        # Keep only shape key calls that output data to VB6 of target draw calls
+        shapekey_hashes = set()
+        for branch in draw_branches:
+            if branch.shader_id == 'DRAW_VS':
+                for branch_call in branch.calls:
+                    shapekey_hashes.add(self.get_resource_hash(branch_call.call, {'slot_type': SlotType.VertexBuffer, 'slot_id': SlotId(6)}))
+        shapekey_hashes.discard(None)
+
+        result = self.filter_branches(draw_branches, 'SHAPEKEY_CS_1', lambda call:
+            self.get_resource_hash(call, {'slot_type': SlotType.UAV, 'slot_id': SlotId(0)}) in shapekey_hashes)
+
+        print(f'Targeted extraction: {num_target_calls} of {num_calls} draw calls kept')
+
+        return {call_branch.shader_id: call_branch for call_branch in result}
+
+
 def write_objects(output_directory, objects: Dict[str, ObjectData], allow_missing_shapekeys = False):
     output_directory = Path(output_directory)
 
@@ -281,27 +348,36 @@ def write_objects(output_directory, objects: Dict[str, ObjectData], allow_missin
             f.write(object_data.metadata)
 
 
-def extract_frame_data(cfg):
-
-    start_time = time.time()
-
-    dump_path = resolve_path(cfg.frame_dump_folder)
-
+def validate_dump_path(cfg, dump_path: Path):
     if not dump_path.is_dir():
-        raise ConfigError('frame_dump_folder', 'Specified dump folder does not exist!')
+        raise ConfigError('frame_dump_folder', 'Specified dump folder does not exist!', cfg)
     if not Path(dump_path / 'log.txt').is_file():
-        raise ConfigError('frame_dump_folder', 'Specified dump folder is missing log.txt file!')
-    
+        raise ConfigError('frame_dump_folder', 'Specified dump folder is missing log.txt file!', cfg)
+
+
+def collect_frame_data(cfg, dump_path: Path, resource_hasher: ResourceHasher):
+    """
+    Parses frame dump and extracts draw calls and shape keys data of WWMI-compatible objects
+    """
     # Create data model of the frame dump
     dump = Dump(
-        dump_directory=dump_path
+        dump_directory=dump_path,
+        use_cache=cfg.use_frame_dump_cache,
+        prefilter=DumpPrefilter(configuration.shader_data_pattern) if cfg.use_frame_dump_prefilter else None,
+    )
+
+    target_filter = TargetFilter(
+        vb_hashes=TargetFilter.parse_hashes(cfg.extract_target_vb_hashes),
+        ib_hashes=TargetFilter.parse_hashes(cfg.extract_target_ib_hashes),
     )
 
     # Get data view from dump data model
     frame_data = DataCollector(
         dump=dump,
         shader_data_pattern=configuration.shader_data_pattern,
-        shader_resources=configuration.shader_resources
+        shader_resources=configuration.shader_resources,
+        resource_hasher=resource_hasher,
+        branch_filter=target_filter.filter_call_branches if target_filter.vb_hashes or target_filter.ib_hashes else None,
     )
 
     # Extract mesh objects data from data view
@@ -309,17 +385,24 @@ def extract_frame_data(cfg):
         call_branches=frame_data.call_branches
     )
 
+    return dump, data_extractor
+
+
+def build_objects(cfg, shader_hashes, shape_key_data, draw_data, resource_hasher: ResourceHasher = None):
+    """
+    Builds output data of mesh objects from extracted draw calls and shape keys data
+    """
     # Build shape keys index from byte buffers
     shapekeys = ShapeKeyBuilder(
-        shapekey_data=data_extractor.shape_key_data
+        shapekey_data=shape_key_data
     )
 
     # Build components from byte buffers
     component_builder = ComponentBuilder(
         output_vb_layout=configuration.output_vb_layout,
-        shader_hashes=data_extractor.shader_hashes,
+        shader_hashes=shader_hashes,
         shapekeys=shapekeys.shapekeys,
-        draw_data=data_extractor.draw_data
+        draw_data=draw_data
     )
 
     # Build output data object
@@ -330,8 +413,33 @@ def extract_frame_data(cfg):
             min_file_size=cfg.skip_small_textures_size*1024 if cfg.skip_small_textures else 0,
             exclude_extensions=['jpg'] if cfg.skip_jpg_textures else [],
             exclude_same_slot_hash_textures=cfg.skip_same_slot_hash_textures,
-        )
+        ),
+        resource_hasher=resource_hasher,
     )
+
+    return output_builder
+
+
+def extract_frame_data(cfg):
+    # Blender-specific path resolution, imported here to keep module usable in headless mode
+    from ..migoto_io.blender_interface.utility import resolve_path
+
+    start_time = time.time()
+
+    dump_path = resolve_path(cfg.frame_dump_folder)
+
+    validate_dump_path(cfg, dump_path)
+
+    # Hashing service shared by all consumers of dump resources
+    resource_hasher = ResourceHasher()
+
+    dump, data_extractor = collect_frame_data(cfg, dump_path, resource_hasher)
+
+    output_builder = build_objects(cfg, data_extractor.shader_hashes, data_extractor.shape_key_data,
+                                   data_extractor.draw_data, resource_hasher)
+
+    # Store parsed dump along with resource hashes calculated by DataCollector and OutputBuilder
+    dump.save_cache()
     
     write_objects(resolve_path(cfg.extract_output_folder), output_builder.objects, cfg.allow_missing_shapekeys)
 
@@ -340,29 +448,54 @@ def extract_frame_data(cfg):
     return output_builder
 
 
-def get_dir_path():
-    dir_path = ""
+def build_and_write_objects(cfg, output_path, shader_hashes, shape_key_data, draw_data):
+    """
+    Worker of headless extraction, builds and writes mesh objects in separate process
+    Returns list of written object hashes along with flag of missing shape keys data
+    """
+    output_builder = build_objects(cfg, shader_hashes, shape_key_data, draw_data)
+
+    write_objects(output_path, output_builder.objects, cfg.allow_missing_shapekeys)
 
-    if len(sys.argv) > 1:
-        dir_path = sys.argv[1]
+    return [
+        (object_hash, bool(object_data.shapekeys.offsets_hash and not object_data.shapekeys.shapekey_offsets))
+        for object_hash, object_data in output_builder.objects.items()
+    ]
 
-    if not os.path.exists(dir_path):
-        print('Enter the name of frame dump folder:')
-        dir_path = input()
 
-    dir_path = os.path.abspath(dir_path)
+def extract_frame_data_headless(cfg, dump_path: Path, output_path: Path, max_workers: int = None):
+    """
+    Runs extraction without Blender, objects are built and written in parallel by process pool
+    Dump parsing and data collection run in the main process, as they share the dump data model
+    """
+    start_time = time.time()
+
+    validate_dump_path(cfg, dump_path)
 
-    if not os.path.exists(dir_path):
-        raise ValueError(f'Folder not found: {dir_path}!')
-    if not os.path.isdir(dir_path):
-        raise ValueError(f'Not a folder: {dir_path}!')
+    dump, data_extractor = collect_frame_data(cfg, dump_path, ResourceHasher())
 
-    return dir_path
+    dump.save_cache()
 
+    # Split draw calls data into per-object jobs, each of them gets only shape keys data it references
+    jobs = {}
+    for draw_guid, draw_data in data_extractor.draw_data.items():
+        jobs.setdefault(draw_guid[2], {})[draw_guid] = draw_data
+
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for vb_hash, draw_data in jobs.items():
+            shapekey_hashes = set(data.shapekey_hash for data in draw_data.values())
+            shape_key_data = {
+                shapekey_hash: data for shapekey_hash, data in data_extractor.shape_key_data.items()
+                if shapekey_hash in shapekey_hashes
+            }
+            futures.append(executor.submit(build_and_write_objects, cfg, output_path,
+                                           data_extractor.shader_hashes, shape_key_data, draw_data))
+        for future in futures:
+            results.extend(future.result())
+
+    print(f"Execution time: %s seconds" % (time.time() - start_time))
 
-if __name__ == "__main__":
-    # try:
-    extract_frame_data(configuration.dump_dir_path, configuration.output_path)
-    # except Exception as e:
-    #     print(f'Error: {e}')
-    #     input()
+    return results
@@ -1,5 +1,3 @@
-import hashlib
-
 from dataclasses import dataclass, field
 from typing import List, Dict
 from pathlib import Path
@@ -7,6 +5,7 @@ from pathlib import Path
 from ..migoto_io.data_model.dxgi_format import DXGIFormat
 from ..migoto_io.data_model.byte_buffer import Semantic, AbstractSemantic
 from ..migoto_io.dump_parser.filename_parser import ResourceDescriptor
+from ..migoto_io.dump_parser.resource_hasher import ResourceHasher
 
 from .shapekey_builder import ShapeKeys
 from .component_builder import MeshObject
@@ -41,11 +40,14 @@ class OutputBuilder:
     shapekeys: Dict[str, ShapeKeys]
     mesh_objects: Dict[str, MeshObject]
     texture_filter: TextureFilter
+    resource_hasher: ResourceHasher = None
     # Output
     objects: Dict[str, ObjectData] = field(init=False)
 
     def __post_init__(self):
         self.objects = {}
+        if self.resource_hasher is None:
+            self.resource_hasher = ResourceHasher()
         for vb_hash, mesh_object in self.mesh_objects.items():
 
             shapekeys = self.shapekeys.get(mesh_object.shapekey_hash, ShapeKeys(offsets_hash=mesh_object.shapekey_hash or ''))
@@ -86,7 +88,9 @@ class OutputBuilder:
 
                 num_slot_hash_entries[slot_hash] += 1
 
-        for component in mesh_object.components:
+        filtered_textures = {}
+
+        for component_id, component in enumerate(mesh_object.components):
 
             textures = []
 
@@ -111,15 +115,20 @@ class OutputBuilder:
                         if num_slot_hash_entries[slot_hash] == num_components:
                             continue
 
-                # Exclude known garbage textures
-                with open(texture.path, 'rb') as f:
-                    data_hash = hashlib.sha256(f.read()).hexdigest()
-                    if data_hash in garbage_list:
-                        continue
-
                 textures.append(texture)
 
-            component.textures = textures
+            filtered_textures[component_id] = textures
+
+        # Hash remaining textures in one batch, already known hashes are reused
+        self.resource_hasher.hash_resources([
+            texture for textures in filtered_textures.values() for texture in textures
+        ])
+
+        for component_id, component in enumerate(mesh_object.components):
+            # Exclude known garbage textures
+            component.textures = [
+                texture for texture in filtered_textures[component_id] if texture.get_sha256() not in garbage_list
+            ]
 
     @staticmethod
     def build_metadata(mesh_object: MeshObject, shapekeys):
@@ -193,7 +202,7 @@ class OutputBuilder:
                     index_count=component.index_count,
                     vg_offset=component.vg_offset,
                     vg_count=component.vg_count,
-                    vg_map=component.vg_map,
+                    vg_map=component.get_vg_map(),
                 ) for component in mesh_object.components
             ],
 
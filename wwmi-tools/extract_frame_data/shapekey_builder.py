@@ -1,3 +1,5 @@
+import numpy
+
 from dataclasses import dataclass, field
 
 from typing import List, Dict
@@ -14,52 +16,50 @@ class ShapeKeys:
     scale_hash: str = ''
     dispatch_y: int = 0
     shapekey_offsets: list = field(default_factory=lambda: [])
-    # ShapeKey ID based indexed list of {VertexID: VertexOffsets}
-    shapekeys_index: List[Dict[int, List[float]]] = field(default_factory=lambda: [])
-    # Vertex ID based indexed dict of {ShapeKeyID: VertexOffsets}
-    indexed_shapekeys: Dict[int, Dict[int, List[float]]] = field(default_factory=lambda: {})
+    # Sparse CSR-style store of shapekey entries sorted by (VertexID, ShapeKeyID), one entry per unique pair
+    # Entries of vertex are located via binary search of its VertexID range in sorted vertex_ids
+    vertex_ids: numpy.ndarray = field(default_factory=lambda: numpy.zeros(0, dtype=numpy.uint32))
+    shapekey_ids: numpy.ndarray = field(default_factory=lambda: numpy.zeros(0, dtype=numpy.int64))
+    # Float16 XYZ offsets of entries, (num_entries, 3) array
+    vertex_offsets: numpy.ndarray = field(default_factory=lambda: numpy.zeros((0, 3), dtype=numpy.float16))
+
+    def get_entries_range(self, vertex_offset, vertex_count):
+        """
+        Returns slice of entries of provided range of vertices
+        """
+        first_entry_id, last_entry_id = numpy.searchsorted(self.vertex_ids, [vertex_offset, vertex_offset + vertex_count])
+        return slice(first_entry_id, last_entry_id)
 
     def get_shapekey_ids(self, vertex_offset, vertex_count):
         """
         Returns sorted list of shapekey ids applied to provided range of vertices
         """
-        shapekey_ids = []
-        for vertex_id in range(vertex_offset, vertex_offset + vertex_count):
-            shapekeys = self.indexed_shapekeys.get(vertex_id, None)
-            if shapekeys is None:
-                continue
-            for shapekey_id in shapekeys.keys():
-                if shapekey_id not in shapekey_ids:
-                    shapekey_ids.append(shapekey_id)
-        shapekey_ids.sort()
-        return shapekey_ids
+        entries = self.get_entries_range(vertex_offset, vertex_count)
+        return numpy.unique(self.shapekey_ids[entries]).tolist()
 
     def build_shapekey_buffer(self, vertex_offset, vertex_count):
         """
         Returns Blender-importable ByteBuffer for shapekeys within provided range of vertices
         """
-        shapekey_ids = self.get_shapekey_ids(vertex_offset, vertex_count)
+        entries = self.get_entries_range(vertex_offset, vertex_count)
+
+        shapekey_ids = numpy.unique(self.shapekey_ids[entries])
 
         if len(shapekey_ids) == 0:
             return None
 
         layout = BufferLayout([
             BufferSemantic(AbstractSemantic(Semantic.ShapeKey, shapekey_id), DXGIFormat.R16G16B16_FLOAT)
-            for shapekey_id in shapekey_ids
+            for shapekey_id in shapekey_ids.tolist()
         ])
 
-        shapekey_buffer = ByteBuffer(layout)
-        shapekey_buffer.extend(vertex_count)
+        # Scatter entries to (vertex, shapekey) cells of zero-filled interleaved buffer data
+        data = numpy.zeros((vertex_count, len(shapekey_ids), 3), dtype=numpy.float16)
+        element_ids = self.vertex_ids[entries].astype(numpy.int64) - vertex_offset
+        semantic_ids = numpy.searchsorted(shapekey_ids, self.shapekey_ids[entries])
+        data[element_ids, semantic_ids] = self.vertex_offsets[entries]
 
-        for vertex_id in range(vertex_offset, vertex_offset + vertex_count):
-            indexed_vertex_shapekeys = self.indexed_shapekeys.get(vertex_id, None)
-            element_id = vertex_id - vertex_offset
-            for semantic in shapekey_buffer.layout.semantics:
-                shapekey_id = semantic.abstract.index
-                if indexed_vertex_shapekeys is None or shapekey_id not in indexed_vertex_shapekeys:
-                    shapekey_buffer.get_element(element_id).set_value(semantic, [0, 0, 0])
-                else:
-                    shapekey_buffer.get_element(element_id).set_value(semantic, indexed_vertex_shapekeys[shapekey_id])
+        shapekey_buffer = ByteBuffer(layout, data.tobytes())
 
         return shapekey_buffer
 
@@ -77,50 +77,51 @@ class ShapeKeyBuilder:
         for shapekey_hash, shapekey_data in self.shapekey_data.items():
 
             shapekey_offsets = shapekey_data.shapekey_offset_buffer.get_values(AbstractSemantic(Semantic.RawData))[0:128]
-            vertex_ids = shapekey_data.shapekey_vertex_id_buffer.get_values(AbstractSemantic(Semantic.RawData))
-            vertex_offsets = shapekey_data.shapekey_vertex_offset_buffer.get_values(AbstractSemantic(Semantic.RawData))
-
-            # Detect last non-zero entry in the vertex_offsets buffer consisting of 3 floats and 3 zeroes per row
-            # vertex_offsets_len = int(len(vertex_offsets) / 6)
-            # last_data_entry_id = vertex_offsets_len - 1
-            # for entry_id in reversed(range(vertex_offsets_len)):
-            #     vertex_offset = vertex_offsets[entry_id * 6:entry_id * 6 + 6]
-            #     if any(v != 0 for v in vertex_offset):
-            #         break
-            #     last_data_entry_id = entry_id
-
-            # Original buffer doesn't contain offset for 129th group, but we'll need it for the loop below
-            # last_shapekey_offset = shapekey_offsets[-1]
-            # if last_shapekey_offset > last_data_entry_id:
-            #     shapekey_offsets.append(last_shapekey_offset)
-            # else:
-            #     shapekey_offsets.append(last_data_entry_id + 1)
-
-            last_data_entry_id = shapekey_offsets[-1]
-
-            # Process shapekey entries, we'll build both VertexID and ShapeKeyID based outputs for fast indexing
-            shapekeys_index = []
-            indexed_shapekeys = {}
-            for shapekey_id, first_entry_id in enumerate(shapekey_offsets):
-                # Stop processing if next entries have no data
-                if first_entry_id >= last_data_entry_id:
-                    break
-                # Process all entries from current shapekey offset 'till offset of the next shapekey
-                entries = {}
-                for entry_id in range(first_entry_id, shapekey_offsets[shapekey_id + 1]):
-                    vertex_id = vertex_ids[entry_id]
-                    vertex_offset = vertex_offsets[entry_id * 6:entry_id * 6 + 3]
-                    entries[vertex_id] = vertex_offset
-                    if vertex_id not in indexed_shapekeys:
-                        indexed_shapekeys[vertex_id] = {}
-                    indexed_shapekeys[vertex_id][shapekey_id] = vertex_offset
-                shapekeys_index.append(entries)
-
-            self.shapekeys[shapekey_hash] = ShapeKeys(
+            vertex_ids = shapekey_data.shapekey_vertex_id_buffer.get_array(AbstractSemantic(Semantic.RawData))
+            vertex_offsets = shapekey_data.shapekey_vertex_offset_buffer.get_array(AbstractSemantic(Semantic.RawData))
+
+            shapekeys = ShapeKeys(
                 offsets_hash=shapekey_data.shapekey_hash,
                 scale_hash=shapekey_data.shapekey_scale_hash,
                 dispatch_y=shapekey_data.dispatch_y,
                 shapekey_offsets=shapekey_offsets,
-                shapekeys_index=shapekeys_index,
-                indexed_shapekeys=indexed_shapekeys,
             )
+
+            if len(shapekey_offsets) > 0:
+                self.build_entries(shapekeys, numpy.array(shapekey_offsets, dtype=numpy.int64), vertex_ids, vertex_offsets)
+
+            self.shapekeys[shapekey_hash] = shapekeys
+
+    @staticmethod
+    def build_entries(shapekeys, shapekey_offsets, vertex_ids, vertex_offsets):
+        """
+        Fills sparse entries store of shapekeys from raw offsets, vertex ids and vertex offsets buffers
+        Entries of shapekey N are located between offsets N and N+1 of the vertex ids buffer
+        Entry of the vertex offsets buffer consists of 3 floats and 3 zeroes
+        """
+        # Stop processing at the first shapekey starting at or after the last offset, as next entries have no data
+        last_data_entry_id = shapekey_offsets[-1]
+        num_shapekeys = int(numpy.argmax(shapekey_offsets >= last_data_entry_id))
+
+        first_entry_ids = shapekey_offsets[:num_shapekeys]
+        entries_counts = numpy.maximum(shapekey_offsets[1:num_shapekeys + 1] - first_entry_ids, 0)
+        num_entries = int(entries_counts.sum())
+
+        # Expand [first_entry_id, next_first_entry_id) ranges of all shapekeys into flat list of entry ids
+        entry_shapekey_ids = numpy.repeat(numpy.arange(num_shapekeys), entries_counts)
+        entry_ids = numpy.arange(num_entries) - numpy.repeat(numpy.cumsum(entries_counts) - entries_counts, entries_counts)
+        entry_ids += numpy.repeat(first_entry_ids, entries_counts)
+
+        entry_vertex_ids = vertex_ids[entry_ids]
+        entry_vertex_offsets = vertex_offsets[entry_ids[:, None] * 6 + numpy.arange(3)]
+
+        # Sort entries by VertexID and ShapeKeyID, for duplicate pairs the last entry takes priority
+        order = numpy.lexsort((numpy.arange(num_entries), entry_shapekey_ids, entry_vertex_ids))
+        entry_vertex_ids = entry_vertex_ids[order]
+        entry_shapekey_ids = entry_shapekey_ids[order]
+        is_last = numpy.ones(num_entries, dtype=bool)
+        is_last[:-1] = (entry_vertex_ids[1:] != entry_vertex_ids[:-1]) | (entry_shapekey_ids[1:] != entry_shapekey_ids[:-1])
+
+        shapekeys.vertex_ids = entry_vertex_ids[is_last]
+        shapekeys.shapekey_ids = entry_shapekey_ids[is_last]
+        shapekeys.vertex_offsets = entry_vertex_offsets[order][is_last]
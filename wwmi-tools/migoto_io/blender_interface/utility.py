@@ -1,8 +1,10 @@
+import sys
 import math
+import ctypes
 import mathutils
 
 from pathlib import Path
-from typing import Tuple
+from typing import Tuple, Optional
 
 import bpy
 
@@ -37,3 +39,39 @@ def get_rotation_matrix(rotation: Tuple[float], invert = False):
     if invert:
         rotation_matrix = rotation_matrix.inverted()
     return rotation_matrix
+
+
+def get_peak_memory_usage() -> Optional[int]:
+    """
+    Returns peak resident set size of current process in bytes or None if it cannot be queried
+    """
+    if sys.platform == 'win32':
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', ctypes.c_ulong),
+                ('PageFaultCount', ctypes.c_ulong),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        try:
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return None
+        except (AttributeError, OSError):
+            return None
+        return counters.PeakWorkingSetSize
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, while macOS reports bytes
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
@@ -0,0 +1,65 @@
+import re
+import hashlib
+import numpy
+import bpy
+
+from pathlib import Path
+from typing import Optional
+
+
+def get_cache_dir() -> Path:
+    """
+    Returns folder for cached arrays, Blender removes its temp dir on exit, so cache lives for one session only
+    """
+    cache_dir = Path(bpy.app.tempdir) / 'wwmi_tools_cache'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def get_mesh_fingerprint(mesh: bpy.types.Mesh) -> str:
+    """
+    Returns hash of mesh topology, it changes when any face of mesh gets different vertices
+    """
+    vertex_ids = numpy.empty(len(mesh.loops), dtype=numpy.uint32)
+    mesh.loops.foreach_get('vertex_index', vertex_ids)
+    fingerprint = hashlib.sha1(vertex_ids.tobytes())
+    fingerprint.update(f'{len(mesh.vertices)}:{len(mesh.polygons)}'.encode())
+    return fingerprint.hexdigest()
+
+
+def get_cache_key(name: str, fingerprint: str) -> str:
+    return f'{re.sub(r"[^0-9a-zA-Z_-]", "_", name)}-{fingerprint}'
+
+
+def is_cache_key_valid(key: str, fingerprint: str) -> bool:
+    return key.endswith(f'-{fingerprint}')
+
+
+def get_array_path(key: str) -> Optional[Path]:
+    """
+    Returns path of cache file for given key or None if key is empty or malformed
+    Keys from older versions held JSON data, so they don't pass the check and are treated as missing cache
+    """
+    if not key or len(key) > 255 or re.fullmatch(r'[0-9a-zA-Z_-]+', key) is None:
+        return None
+    return get_cache_dir() / f'{key}.npy'
+
+
+def save_array(key: str, data: numpy.ndarray):
+    numpy.save(get_array_path(key), numpy.ascontiguousarray(data), allow_pickle=False)
+
+
+def load_array(key: str) -> Optional[numpy.ndarray]:
+    """
+    Returns cached array or None if there's no cache file for given key
+    """
+    path = get_array_path(key)
+    if path is None or not path.is_file():
+        return None
+    return numpy.load(path, allow_pickle=False)
+
+
+def remove_array(key: str):
+    path = get_array_path(key)
+    if path is not None:
+        path.unlink(missing_ok=True)
@@ -1,14 +1,17 @@
 import io
 import copy
+import hashlib
 import textwrap
 import math
 import numpy
 
-from typing import Union, List, Optional, Dict
-from dataclasses import dataclass
+from pathlib import Path
+from typing import Union, List, Optional, Dict, Iterator, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 
 from .dxgi_format import *
+from .converters import ConverterPlanner
 
 
 class Semantic(Enum):
@@ -103,11 +106,34 @@ class BufferSemantic:
         return self.format.get_numpy_type(self.stride)
     
 
+class CompiledBufferLayout:
+    """
+    Immutable snapshot of BufferLayout with precomputed numpy dtype, semantic lookup tables and fingerprint
+    """
+    def __init__(self, layout: 'BufferLayout'):
+        self.semantics = tuple(layout.semantics)
+        self.stride = layout.stride
+        # AbstractSemantic -> BufferSemantic, the first one wins the same way as in linear search
+        self.elements = {}
+        for semantic in self.semantics:
+            self.elements.setdefault(semantic.abstract, semantic)
+        self.field_names = {semantic.abstract: semantic.abstract.get_name() for semantic in self.elements.values()}
+        self.dtype = numpy.dtype([(semantic.abstract.get_name(), semantic.get_numpy_type()) for semantic in self.semantics])
+        self.field_offsets = {abstract: self.dtype.fields[name][1] for abstract, name in self.field_names.items()}
+        # Unlike built-in hash(), fingerprint is stable between sessions and processes
+        fingerprint = ';'.join(f'{semantic.abstract}:{semantic.format.format}:{semantic.stride}:{semantic.offset}'
+                               for semantic in self.semantics)
+        fingerprint += f';stride={layout.stride};force_stride={layout.force_stride}'
+        self.fingerprint = hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
 @dataclass
 class BufferLayout:
     semantics: List[BufferSemantic]
     stride: int = 0
     force_stride: bool = False
+    # Compiled layout cache, it's dropped by layout mutating methods
+    compiled: Optional[CompiledBufferLayout] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         # Autofill byte Stride and Offsets
@@ -130,10 +156,16 @@ class BufferLayout:
                 groups[semantic] += 1
                 semantic.abstract.index = groups[semantic]
 
+    def compile(self) -> CompiledBufferLayout:
+        """
+        Returns compiled version of the layout, semantics must not be edited directly while it's in use
+        """
+        if self.compiled is None:
+            self.compiled = CompiledBufferLayout(self)
+        return self.compiled
+
     def get_element(self, abstract: AbstractSemantic):
-        for element in self.semantics:
-            if abstract == element.abstract:
-                return element
+        return self.compile().elements.get(abstract, None)
 
     def add_element(self, semantic: BufferSemantic):
         if self.get_element(semantic.abstract) is not None:
@@ -142,6 +174,7 @@ class BufferLayout:
         semantic.offset = self.stride
         self.semantics.append(semantic)
         self.stride += semantic.stride
+        self.compiled = None
 
     def merge(self, layout):
         for semantic in layout.semantics:
@@ -156,17 +189,25 @@ class BufferLayout:
         return ret
 
     def get_numpy_type(self):
-        dtype = numpy.dtype([])
-        for semantic in self.semantics:
-            dtype = numpy.dtype(dtype.descr + [(semantic.abstract.get_name(), (semantic.get_numpy_type()))])
-        return dtype
+        return self.compile().dtype
+
+    def get_field_name(self, abstract: AbstractSemantic):
+        return self.compile().field_names[abstract]
+
+    def get_field_offset(self, abstract: AbstractSemantic):
+        return self.compile().field_offsets[abstract]
+
+    def get_fingerprint(self):
+        return self.compile().fingerprint
     
 
 class NumpyBuffer:
     layout: BufferLayout
     data: numpy.ndarray
+    path: Optional[Path]
 
     def __init__(self, layout: BufferLayout, data: Optional[numpy.ndarray] = None, size = 0):
+        self.path = None
         self.set_layout(layout)
         self.set_data(data, size)
 
@@ -193,10 +234,24 @@ class NumpyBuffer:
             field = self.layout.semantics[field].get_name()
         return self.data[field]
 
+    def get_unique_rows(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Returns ids of rows with unique bytes in order of first occurrence along with unique row id of every row
+        Rows are compared as fixed-width void scalars, so all fields are checked in one pass of numpy.unique
+        """
+        data = numpy.ascontiguousarray(self.data)
+        rows = data.view(numpy.dtype((numpy.void, data.dtype.itemsize)))
+        _, unique_index, inverse = numpy.unique(rows, return_index=True, return_inverse=True)
+        # numpy.unique sorts rows by bytes, so lets restore order of first occurrence and renumber rows accordingly
+        order = numpy.argsort(unique_index)
+        row_ids = numpy.empty(len(order), dtype=inverse.dtype)
+        row_ids[order] = numpy.arange(len(order), dtype=inverse.dtype)
+        return unique_index[order], row_ids[inverse.ravel()]
+
     def remove_duplicates(self, keep_order = True):
         if keep_order:
-            _, unique_index = numpy.unique(self.data, return_index=True)
-            self.data = self.data[numpy.sort(unique_index)]
+            unique_index, _ = self.get_unique_rows()
+            self.data = self.data[unique_index]
         else:
             self.data = numpy.unique(self.data)
 
@@ -204,28 +259,33 @@ class NumpyBuffer:
                              data: numpy.ndarray, 
                              semantic: Union[BufferSemantic, int], 
                              semantic_converters: Optional[List[callable]] = None,
-                             format_converters: Optional[List[callable]] = None):
+                             format_converters: Optional[List[callable]] = None,
+                             converter_planner: Optional[ConverterPlanner] = None,
+                             copy: bool = True):
         
         if isinstance(semantic, int):
             semantic = self.layout.semantics[semantic]
         current_semantic = self.layout.get_element(semantic.abstract)
         if current_semantic is None:
             raise ValueError(f'NumpyBuffer is missing {semantic.abstract} semantic data!')
-        if semantic_converters is not None:
-            for data_converter in semantic_converters:
-                data = data_converter(data)
+        converters = list(semantic_converters or [])
         if current_semantic.format != semantic.format:
-            data = current_semantic.format.type_encoder(data)
-        if format_converters is not None:
-            for data_converter in format_converters:
-                data = data_converter(data)
+            converters.append(get_format_converter(semantic.format, current_semantic.format))
+        converters.extend(format_converters or [])
+        if len(converters) > 0:
+            if converter_planner is None:
+                converter_planner = ConverterPlanner()
+            data = converter_planner.get_plan(semantic.abstract, semantic.format, converters)(data, copy=copy)
         self.set_field(current_semantic.get_name(), data)
 
     def import_data(self,
                     data: 'NumpyBuffer',
                     semantic_converters: Dict[AbstractSemantic, List[callable]],
-                    format_converters: Dict[AbstractSemantic, List[callable]]):
-        
+                    format_converters: Dict[AbstractSemantic, List[callable]],
+                    converter_planner: Optional[ConverterPlanner] = None):
+        """
+        Imports semantics data from given buffer, its fields are consumed and may be converted in place
+        """
         for buffer_semantic in self.layout.semantics:
 
             data_semantic = data.layout.get_element(buffer_semantic.abstract)
@@ -238,11 +298,43 @@ class NumpyBuffer:
                 field_data, 
                 data_semantic,
                 semantic_converters.get(buffer_semantic.abstract, []),
-                format_converters.get(buffer_semantic.abstract, []))
+                format_converters.get(buffer_semantic.abstract, []),
+                converter_planner,
+                copy=False)
             
     def import_raw_data(self, data: numpy.ndarray):
         self.data = numpy.frombuffer(data, dtype=self.layout.get_numpy_type())
 
+    def import_file(self, path: Union[str, Path]):
+        """
+        Maps buffer file to data via read-only numpy.memmap, so file contents are read from disk only on access
+        """
+        self.path = Path(path)
+        if self.path.stat().st_size == 0:
+            # Zero-length files cannot be mapped
+            self.data = numpy.empty(0, dtype=self.layout.get_numpy_type())
+        else:
+            self.data = numpy.memmap(self.path, dtype=self.layout.get_numpy_type(), mode='r')
+
+    def iter_chunks(self, chunk_size: int = 16 * 1024 * 1024) -> Iterator['NumpyBuffer']:
+        """
+        Yields buffers with consecutive rows of data, each chunk holds up to chunk_size bytes
+        Chunks of file-backed buffer get their own mappings, so pages read for one chunk are released with it
+        """
+        num_rows = len(self.data)
+        if num_rows == 0:
+            yield self
+            return
+        itemsize = self.data.dtype.itemsize
+        chunk_rows = max(1, chunk_size // itemsize)
+        for start in range(0, num_rows, chunk_rows):
+            count = min(chunk_rows, num_rows - start)
+            if self.path is None:
+                data = self.data[start:start+count]
+            else:
+                data = numpy.memmap(self.path, dtype=self.data.dtype, mode='r', offset=start*itemsize, shape=(count,))
+            yield NumpyBuffer(self.layout, data)
+
     def get_bytes(self):
         return self.data.tobytes()
 
@@ -328,8 +420,7 @@ class BufferElement:
     def get_bytes(self, semantic, return_buffer_semantic=False):
         if isinstance(semantic, AbstractSemantic):
             semantic = self.layout.get_element(semantic)
-        byte_offset = self.index * semantic.stride
-        data_bytes = self.buffer.data[semantic][byte_offset : byte_offset + semantic.stride]
+        data_bytes = self.buffer.get_semantic_view(semantic)[self.index].tobytes()
         if not return_buffer_semantic:
             return data_bytes
         else:
@@ -338,8 +429,7 @@ class BufferElement:
     def set_bytes(self, semantic, data_bytes):
         if isinstance(semantic, AbstractSemantic):
             semantic = self.layout.get_element(semantic)
-        byte_offset = self.index * semantic.stride
-        self.buffer.data[semantic][byte_offset: byte_offset + semantic.stride] = data_bytes
+        self.buffer.get_semantic_view(semantic)[self.index] = numpy.frombuffer(data_bytes, dtype=numpy.uint8)
 
     def get_value(self, semantic):
         if isinstance(semantic, AbstractSemantic):
@@ -353,16 +443,18 @@ class BufferElement:
         self.set_bytes(semantic, semantic.format.encoder(value).tobytes())
 
     def get_all_bytes(self):
-        data_bytes = bytearray()
-        for semantic in self.layout.semantics:
-            data_bytes.extend(self.get_bytes(semantic))
-        return data_bytes
+        return self.buffer.data[self.index].tobytes()
 
 
 class ByteBuffer:
+    """
+    Stores interleaved buffer elements as numpy structured array with one field per layout semantic
+    Loading, fragmenting and interleaving are single numpy copies or views instead of per-element loops
+    """
     def __init__(self, layout, data_bytes=None):
         self.layout = None
-        self.data = {}
+        self.dtype = None
+        self.data = None
         self.num_elements = 0
 
         self.update_layout(layout)
@@ -371,64 +463,69 @@ class ByteBuffer:
             self.from_bytes(data_bytes)
 
     def validate(self):
-        result = {}
-        for semantic in self.layout.semantics:
-            result[semantic] = len(self.data[semantic]) / semantic.stride
-        if min(result.values()) != max(result.values()):
-            result = ', '.join([f'{k.abstract}: {v}' for k, v in result.items()])
-            raise ValueError(f'elements count mismatch in buffers: {result}')
-        if len(self.layout.semantics) != len(self.data):
+        if self.data.dtype != self.dtype:
             raise ValueError(f'data structure must match buffer layout!')
-        self.num_elements = int(min(result.values()))
+        self.num_elements = len(self.data)
 
     def update_layout(self, layout):
         self.layout = layout
-        if len(self.data) != 0:
-            self.validate()
+        self.dtype = layout.get_numpy_type()
+        if self.data is None or len(self.data) == 0:
+            self.data = numpy.zeros(0, dtype=self.dtype)
+        self.validate()
 
     def from_bytes(self, data_bytes):
         if self.layout.force_stride:
-            data_bytes.extend(bytearray((math.ceil(len(data_bytes) / self.layout.stride)) * self.layout.stride - len(data_bytes)))
+            padding = math.ceil(len(data_bytes) / self.layout.stride) * self.layout.stride - len(data_bytes)
+            if padding > 0:
+                data_bytes = bytes(data_bytes) + bytes(padding)
 
         num_elements = len(data_bytes) / self.layout.stride
         if num_elements % 1 != 0:
             raise ValueError(f'buffer stride {self.layout.stride} must be multiplier of bytes len {len(data_bytes)}')
         num_elements = int(num_elements)
 
-        self.data = {}
-        for semantic in self.layout.semantics:
-            self.data[semantic] = bytearray()
-
-        byte_offset = 0
-        for element_id in range(num_elements):
-            for semantic in self.layout.semantics:
-                self.data[semantic].extend(data_bytes[byte_offset:byte_offset+semantic.stride])
-                byte_offset += semantic.stride
+        if num_elements * self.dtype.itemsize != len(data_bytes):
+            raise ValueError(f'layout mismatch: input ended at {num_elements * self.dtype.itemsize} instead of {len(data_bytes)}')
 
-        if byte_offset != len(data_bytes):
-            raise ValueError(f'layout mismatch: input ended at {byte_offset} instead of {len(data_bytes)}')
+        # Copy is required, as input may be read-only or a view of file mapping that will be closed after the call
+        self.data = numpy.frombuffer(data_bytes, dtype=self.dtype).copy()
 
         self.validate()
 
     def get_element(self, index):
         return BufferElement(self, index)
 
+    def get_field(self, semantic):
+        """
+        Returns writable numpy view of values of given semantic in its storage type
+        """
+        if isinstance(semantic, AbstractSemantic):
+            semantic = self.layout.get_element(semantic)
+        return self.data[self.layout.get_field_name(semantic.abstract)]
+
+    def get_semantic_view(self, semantic):
+        """
+        Returns writable (num_elements, stride) numpy view of raw bytes of given semantic
+        """
+        if isinstance(semantic, AbstractSemantic):
+            semantic = self.layout.get_element(semantic)
+        field_offset = self.layout.get_field_offset(semantic.abstract)
+        data_bytes = self.data.view(numpy.uint8).reshape(self.num_elements, self.dtype.itemsize)
+        return data_bytes[:, field_offset:field_offset+semantic.stride]
+
     def extend(self, num_elements):
         if num_elements <= 0:
             raise ValueError(f'cannot extend buffer by {num_elements} elements')
-        for semantic in self.layout.semantics:
-            if semantic in self.data:
-                self.data[semantic].extend(bytearray(num_elements * semantic.stride))
-            else:
-                self.data[semantic] = bytearray(num_elements * semantic.stride)
+        self.data = numpy.concatenate((self.data, numpy.zeros(num_elements, dtype=self.dtype)))
         self.validate()
 
     def get_fragment(self, offset, element_count):
+        """
+        Returns buffer of given range of elements, fragment shares data with the source buffer
+        """
         fragment = ByteBuffer(self.layout)
-        for semantic in self.layout.semantics:
-            byte_offset = offset * semantic.stride
-            byte_count = element_count * semantic.stride
-            fragment.data[semantic] = self.data[semantic][byte_offset:byte_offset+byte_count]
+        fragment.data = self.data[offset:offset+element_count]
         fragment.validate()
         return fragment
 
@@ -446,37 +543,47 @@ class ByteBuffer:
         # Calculate semantic map
         semantic_map = self.map_semantics(src_byte_buffer, self, semantic_map=semantic_map, skip_missing=skip_missing)
 
-        # Import data bytes
+        # Import data values
         for src_semantic, dst_semantic in semantic_map.items():
-            if src_semantic.format == dst_semantic.format:
-                self.data[dst_semantic] = src_byte_buffer.data[src_semantic]
-            else:
-                src_values = src_semantic.format.decoder(src_byte_buffer.data[src_semantic]).tolist()
-                self.data[dst_semantic] = dst_semantic.format.encoder(src_values).tobytes()
+            data = src_byte_buffer.get_field(src_semantic)
+            if src_semantic.format != dst_semantic.format:
+                data = get_format_converter(src_semantic.format, dst_semantic.format)(data)
+            dst_data = self.get_field(dst_semantic)
+            if data.shape != dst_data.shape:
+                raise ValueError(f'values count mismatch in buffers: {src_semantic.abstract}: {data.shape} != {dst_data.shape}')
+            dst_data[...] = data
 
         self.validate()
 
     def get_bytes(self, semantic=None):
         if semantic is None:
-            data_bytes = bytearray()
-            for element_id in range(self.num_elements):
-                data_bytes.extend(self.get_element(element_id).get_all_bytes())
-            return data_bytes
+            return self.data.tobytes()
         else:
             if isinstance(semantic, AbstractSemantic):
                 semantic = self.layout.get_element(semantic)
-            return self.data[semantic]
+            return self.get_semantic_view(semantic).tobytes()
 
-    def get_values(self, semantic):
+    def get_array(self, semantic):
+        """
+        Returns flat numpy array of decoded values of given semantic
+        """
         if isinstance(semantic, AbstractSemantic):
             semantic = self.layout.get_element(semantic)
         data_bytes = self.get_bytes(semantic)
-        return semantic.format.decoder(data_bytes).tolist()
+        return semantic.format.decoder(data_bytes)
+
+    def get_values(self, semantic):
+        return self.get_array(semantic).tolist()
 
     def set_bytes(self, semantic, data_bytes):
         if isinstance(semantic, AbstractSemantic):
             semantic = self.layout.get_element(semantic)
-        self.data[semantic] = data_bytes
+        num_elements = len(data_bytes) / semantic.stride
+        if self.num_elements == 0 and num_elements >= 1:
+            self.extend(int(num_elements))
+        if num_elements != self.num_elements:
+            raise ValueError(f'elements count mismatch in buffers: {semantic.abstract}: {num_elements} != {self.num_elements}')
+        self.get_semantic_view(semantic)[:] = numpy.frombuffer(data_bytes, dtype=numpy.uint8).reshape(self.num_elements, semantic.stride)
         self.validate()
 
     def set_values(self, semantic, values):
@@ -568,28 +675,32 @@ class IndexBuffer(ByteBuffer):
                 break
 
     def parse_faces(self, f):
-        self.faces = []
-        for line in map(str.strip, f):
-            face = tuple(map(int, line.split()))
-            assert (len(face) == 3)
-            self.faces.append(face)
-        assert (len(self.faces) * 3 == self.index_count)
+        # Bulk conversion of whitespace-separated indices of the rest of the file
+        indices = numpy.fromstring(f.read(), dtype=numpy.int64, sep=' ')
+        assert (len(indices) == self.index_count)
+        self.faces = indices.reshape(-1, 3)
+
+    def parse_buffer(self, data_bytes):
+        """
+        Loads faces from binary index buffer using byte offset, first index, index count and format of parsed header
+        """
+        index_format = DXGIFormat(self.format)
+        byte_offset = self.offset + self.first_index * index_format.byte_width
+        byte_count = self.index_count * index_format.byte_width
+        if byte_offset + byte_count > len(data_bytes):
+            raise ValueError(f'index buffer range {byte_offset}:{byte_offset + byte_count} exceeds buffer size {len(data_bytes)}')
+        indices = index_format.decoder(data_bytes[byte_offset:byte_offset + byte_count]).astype(numpy.int64)
+        self.faces = indices.reshape(-1, 3)
 
     def faces_to_bytes(self):
-        indices = []
-        for face in self.faces:
-            assert (len(face) == 3)
-            indices.extend(list(face))
-        assert (len(indices) == self.index_count)
-        data_bytes = self.layout.semantics[0].format.encoder(indices).tobytes()
+        assert (self.faces.shape[1] == 3)
+        assert (self.faces.size == self.index_count)
+        data_bytes = self.layout.semantics[0].format.type_encoder(self.faces).tobytes()
         self.from_bytes(data_bytes)
         assert (self.num_elements * 3 == self.index_count)
 
     def bytes_to_faces(self):
-        self.faces = []
-        for element_id in range(self.num_elements):
-            face = self.get_element(element_id).get_value(self.layout.semantics[0])
-            self.faces.append(tuple(face))
+        self.faces = self.layout.semantics[0].format.decoder(self.get_bytes()).astype(numpy.int64).reshape(-1, 3)
 
     def get_bytes(self, semantic=None):
         if self.num_elements * 3 != self.index_count:
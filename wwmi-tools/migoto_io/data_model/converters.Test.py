@@ -0,0 +1,196 @@
+import math
+import time
+import numpy
+
+from converters import (AffineConverter, PartialConverter, ConverterPlan, ConverterPlanner, make_flip_vector_converter,
+                        make_mirror_vector_converter, make_scale_vector_converter, make_rotate_vector_converter,
+                        make_flip_texcoord_v_converter)
+
+
+def main():
+    test_flip_vector()
+    test_mirror_vector()
+    test_flip_texcoord_v()
+    test_fused_chain()
+    test_opaque_converters()
+    test_source_data_is_kept()
+    test_planner_cache()
+    benchmark_plan()
+
+
+# Reference converters, the way DataModel used to apply them one after another
+
+def reference_flip_vector(data):
+    return -data
+
+
+def reference_mirror_vector(data):
+    data[:, 0] *= -1
+    return data
+
+
+def reference_scale_vector(data, scale):
+    data *= scale
+    return data
+
+
+def reference_rotate_vector(data, rotation_matrix):
+    return data @ numpy.array(rotation_matrix).T
+
+
+def reference_flip_texcoord_v(data):
+    if data.dtype != numpy.float32:
+        data = data.astype(numpy.float32)
+    data[:, 1] = 1.0 - data[:, 1]
+    return data
+
+
+def reference_resize_second_dim(data, width, fill=0):
+    new_data = numpy.full((len(data), width), fill, dtype=data.dtype)
+    new_data[:, :data.shape[1]] = data
+    return new_data
+
+
+def get_rotation_matrix(rotation):
+    x, y, z = map(math.radians, rotation)
+    rotation_x = numpy.array([[1, 0, 0], [0, math.cos(x), -math.sin(x)], [0, math.sin(x), math.cos(x)]])
+    rotation_y = numpy.array([[math.cos(y), 0, math.sin(y)], [0, 1, 0], [-math.sin(y), 0, math.cos(y)]])
+    rotation_z = numpy.array([[math.cos(z), -math.sin(z), 0], [math.sin(z), math.cos(z), 0], [0, 0, 1]])
+    # Blender's mathutils stores matrices with single precision
+    return (rotation_z @ rotation_y @ rotation_x).astype(numpy.float32).astype(numpy.float64)
+
+
+def get_vectors(num_rows, width, dtype=numpy.float32):
+    rng = numpy.random.default_rng(0)
+    return (rng.random((num_rows, width)) * 2 - 1).astype(dtype)
+
+
+def test_flip_vector():
+    for dtype in [numpy.float16, numpy.float32]:
+        data = get_vectors(1000, 4, dtype)
+        assert(ConverterPlan([make_flip_vector_converter()])(data).tobytes() == reference_flip_vector(data).tobytes())
+    data = get_vectors(1000, 1).ravel()
+    result = ConverterPlan([make_flip_vector_converter()])(data)
+    assert(result.shape == data.shape)
+    assert(result.tobytes() == reference_flip_vector(data).tobytes())
+
+
+def test_mirror_vector():
+    for dtype in [numpy.float16, numpy.float32]:
+        data = get_vectors(1000, 3, dtype)
+        expected = reference_mirror_vector(data.copy())
+        assert(ConverterPlan([make_mirror_vector_converter()])(data).tobytes() == expected.tobytes())
+
+
+def test_flip_texcoord_v():
+    for dtype in [numpy.float16, numpy.float32, numpy.float64]:
+        data = get_vectors(1000, 2, dtype)
+        expected = reference_flip_texcoord_v(data.copy())
+        result = ConverterPlan([make_flip_texcoord_v_converter()])(data)
+        assert(result.dtype == numpy.float32)
+        assert(result.tobytes() == expected.tobytes())
+
+
+def test_fused_chain():
+    rotation_matrix = get_rotation_matrix((0, 0, 180))
+    plan = ConverterPlan([
+        make_rotate_vector_converter(rotation_matrix), make_scale_vector_converter(0.01), make_mirror_vector_converter()
+    ])
+    assert(len(plan.stages) == 1)
+    for dtype in [numpy.float16, numpy.float32]:
+        data = get_vectors(1000, 3, dtype)
+        expected = reference_rotate_vector(data, rotation_matrix)
+        expected = reference_scale_vector(expected, 0.01)
+        expected = reference_mirror_vector(expected)
+        result = plan(data)
+        # Matrix mixes values, so half floats are promoted to single precision
+        assert(result.dtype == numpy.float32)
+        assert(numpy.allclose(result, expected, rtol=1e-6, atol=1e-9))
+    # Any rotation must be fused as well
+    rotation_matrix = get_rotation_matrix((30, -45, 60))
+    data = get_vectors(1000, 3)
+    plan = ConverterPlan([make_mirror_vector_converter(), make_rotate_vector_converter(rotation_matrix)])
+    expected = reference_rotate_vector(reference_mirror_vector(data.copy()), rotation_matrix)
+    assert(numpy.allclose(plan(data), expected, rtol=1e-6, atol=1e-6))
+    # Flips of sign cancel each other out
+    plan = ConverterPlan([make_flip_vector_converter(), make_flip_vector_converter()])
+    assert(plan(data).tobytes() == data.tobytes())
+
+
+def test_opaque_converters():
+    data = get_vectors(1000, 3, numpy.float16)
+    resize = PartialConverter.make(reference_resize_second_dim, width=4, fill=1)
+    plan = ConverterPlan([make_mirror_vector_converter(), make_flip_vector_converter(), resize])
+    assert(len(plan.stages) == 2)
+    expected = reference_resize_second_dim(reference_flip_vector(reference_mirror_vector(data.copy())), 4, fill=1)
+    assert(plan(data).tobytes() == expected.tobytes())
+    # Converters modifying data in place must receive writeable copy of read-only data
+    data.flags.writeable = False
+    plan = ConverterPlan([reference_mirror_vector])
+    assert(plan(data).tobytes() == reference_mirror_vector(data.copy()).tobytes())
+
+
+def test_source_data_is_kept():
+    data = get_vectors(1000, 3)
+    source = data.copy()
+    plan = ConverterPlan([make_mirror_vector_converter(), make_scale_vector_converter(2.0)])
+    plan(data)
+    assert(data.tobytes() == source.tobytes())
+    # Views of source data are not owned by plan as well
+    plan = ConverterPlan([lambda data: data[:, :2], make_flip_vector_converter()])
+    plan(data)
+    assert(data.tobytes() == source.tobytes())
+    # Source is converted in place if allowed
+    plan = ConverterPlan([make_mirror_vector_converter()])
+    result = plan(data, copy=False)
+    assert(result is data)
+    assert(data.tobytes() == reference_mirror_vector(source.copy()).tobytes())
+
+
+def test_planner_cache():
+    planner = ConverterPlanner()
+    plan = planner.get_plan('POSITION', 'R32G32B32_FLOAT', [make_scale_vector_converter(0.01), make_mirror_vector_converter()])
+    # Converters are compared by value, so chains built for another component get the same plan
+    assert(plan is planner.get_plan('POSITION', 'R32G32B32_FLOAT', [make_scale_vector_converter(0.01), make_mirror_vector_converter()]))
+    assert(plan is not planner.get_plan('POSITION', 'R32G32B32_FLOAT', [make_scale_vector_converter(0.1), make_mirror_vector_converter()]))
+    assert(plan is not planner.get_plan('NORMAL', 'R32G32B32_FLOAT', [make_scale_vector_converter(0.01), make_mirror_vector_converter()]))
+
+
+def benchmark_plan(num_rows=1000000):
+    rotation_matrix = get_rotation_matrix((0, 0, 180))
+    data = get_vectors(num_rows, 3)
+
+    start_time = time.time()
+    expected = data.copy()
+    expected = reference_mirror_vector(expected)
+    expected = reference_scale_vector(expected, 0.01)
+    expected = reference_rotate_vector(expected, rotation_matrix)
+    chain_time = time.time() - start_time
+
+    plan = ConverterPlan([
+        make_mirror_vector_converter(), make_scale_vector_converter(0.01), make_rotate_vector_converter(rotation_matrix)
+    ])
+    start_time = time.time()
+    result = plan(data)
+    plan_time = time.time() - start_time
+
+    assert(numpy.allclose(result, expected, rtol=1e-6, atol=1e-9))
+    print(f'mirror + scale + rotate: chain {chain_time :.3f}s, plan {plan_time :.3f}s ({num_rows} rows)')
+
+    data = get_vectors(num_rows, 2)
+
+    start_time = time.time()
+    expected = reference_flip_texcoord_v(data.copy())
+    chain_time = time.time() - start_time
+
+    plan = ConverterPlan([make_flip_texcoord_v_converter()])
+    start_time = time.time()
+    result = plan(data)
+    plan_time = time.time() - start_time
+
+    assert(result.tobytes() == expected.tobytes())
+    print(f'flip texcoord v: chain {chain_time :.3f}s, plan {plan_time :.3f}s ({num_rows} rows)')
+
+
+if __name__ == '__main__':
+    main()
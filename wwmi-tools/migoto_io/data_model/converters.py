@@ -0,0 +1,214 @@
+import numpy
+
+from typing import Tuple, List, Dict, Optional, Sequence, Any
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class AffineConverter:
+    """
+    Converts every row of values as `matrix @ row * scale + offset`
+    Matrix and offset apply to first values of row, remaining values are only multiplied by scale
+    Converters are hashable by value, so chains built separately for each component share the same ConverterPlan
+    """
+    matrix: Tuple[Tuple[float, ...], ...] = ()
+    scale: float = 1.0
+    offset: Tuple[float, ...] = ()
+    dtype: Optional[type] = None
+
+    def get_transform(self, width: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        matrix = numpy.identity(width, dtype=numpy.float64)
+        if len(self.matrix) > 0:
+            if len(self.matrix) > width:
+                raise ValueError(f'cannot apply {len(self.matrix)}x{len(self.matrix)} matrix to rows of {width} values')
+            matrix[:len(self.matrix), :len(self.matrix)] = self.matrix
+        matrix *= self.scale
+        offset = numpy.zeros(width, dtype=numpy.float64)
+        offset[:len(self.offset)] = self.offset
+        return matrix, offset
+
+    def __call__(self, data: numpy.ndarray) -> numpy.ndarray:
+        return ConverterPlan([self])(data)
+
+
+@dataclass(frozen=True)
+class PartialConverter:
+    """
+    Hashable by value alternative of functools.partial for converters with extra arguments
+    """
+    func: callable
+    kwargs: Tuple[Tuple[str, Any], ...] = ()
+
+    @classmethod
+    def make(cls, func: callable, **kwargs):
+        return cls(func, tuple(sorted(kwargs.items())))
+
+    def __call__(self, data: numpy.ndarray) -> numpy.ndarray:
+        return self.func(data, **dict(self.kwargs))
+
+
+@dataclass(frozen=True)
+class NormalizedDecoder:
+    """
+    Decodes integer values of normalized format to floats, data with already decoded values is passed as is
+    """
+    dxgi_format: Any
+
+    def __call__(self, data: numpy.ndarray) -> numpy.ndarray:
+        if numpy.issubdtype(data.dtype, numpy.floating):
+            return data
+        return self.dxgi_format.type_decoder(data)
+
+
+def make_flip_vector_converter() -> AffineConverter:
+    return AffineConverter(scale=-1.0)
+
+
+def make_mirror_vector_converter() -> AffineConverter:
+    return AffineConverter(matrix=((-1.0,),))
+
+
+def make_scale_vector_converter(scale: float) -> AffineConverter:
+    return AffineConverter(scale=scale)
+
+
+def make_rotate_vector_converter(rotation_matrix: Sequence[Sequence[float]]) -> AffineConverter:
+    return AffineConverter(matrix=tuple(tuple(float(value) for value in row) for row in rotation_matrix))
+
+
+def make_flip_texcoord_v_converter() -> AffineConverter:
+    return AffineConverter(matrix=((1.0, 0.0), (0.0, -1.0)), offset=(0.0, 1.0), dtype=numpy.float32)
+
+
+class AffineStage:
+    """
+    Chain of consecutive affine converters fused into single matrix and offset per row width
+    """
+    def __init__(self, converters: List[AffineConverter]):
+        self.converters = converters
+        self.dtype = None
+        for converter in converters:
+            if converter.dtype is not None:
+                self.dtype = converter.dtype
+        self.transforms = {}
+
+    def get_transform(self, width: int) -> Tuple[numpy.ndarray, Optional[numpy.ndarray], Optional[numpy.ndarray]]:
+        """
+        Returns fused matrix, its diagonal if matrix has no other values and offset if it has non-zero values
+        """
+        transform = self.transforms.get(width, None)
+        if transform is None:
+            matrix = numpy.identity(width, dtype=numpy.float64)
+            offset = numpy.zeros(width, dtype=numpy.float64)
+            for converter in self.converters:
+                converter_matrix, converter_offset = converter.get_transform(width)
+                matrix = converter_matrix @ matrix
+                offset = converter_matrix @ offset + converter_offset
+            diagonal = numpy.diagonal(matrix).copy()
+            is_diagonal = numpy.count_nonzero(matrix - numpy.diag(diagonal)) == 0
+            transform = (matrix, diagonal if is_diagonal else None, offset if numpy.any(offset) else None)
+            self.transforms[width] = transform
+        return transform
+
+    def get_dtype(self, data: numpy.ndarray) -> numpy.dtype:
+        if self.dtype is not None:
+            return numpy.dtype(self.dtype)
+        if not numpy.issubdtype(data.dtype, numpy.floating):
+            return numpy.dtype(numpy.float32)
+        width = data.shape[1] if data.ndim > 1 else 1
+        _, diagonal, _ = self.get_transform(width)
+        if diagonal is None:
+            # Mixing of values requires at least single precision, so half floats are promoted
+            return numpy.result_type(data.dtype, numpy.float32)
+        return data.dtype
+
+    def apply(self, data: numpy.ndarray):
+        """
+        Converts values of given writeable array in place
+        """
+        rows = data.reshape(-1, 1) if data.ndim == 1 else data
+        matrix, diagonal, offset = self.get_transform(rows.shape[1])
+        if diagonal is None:
+            rows[...] = rows @ matrix.T
+            if offset is not None:
+                rows += offset.astype(rows.dtype)
+            return
+        if offset is None:
+            offset = numpy.zeros(len(diagonal))
+        columns = numpy.flatnonzero((diagonal != 1.0) | (offset != 0.0))
+        if len(columns) == rows.shape[1]:
+            rows *= diagonal.astype(rows.dtype)
+            if numpy.any(offset):
+                rows += offset.astype(rows.dtype)
+            return
+        # Convert only affected columns, like mirror of X or flip of V
+        for column in columns:
+            values = rows[:, column]
+            if diagonal[column] != 1.0:
+                values *= rows.dtype.type(diagonal[column])
+            if offset[column] != 0.0:
+                values += rows.dtype.type(offset[column])
+
+
+class ConverterPlan:
+    """
+    Compiled chain of data converters
+    Consecutive AffineConverters are fused into single AffineStage, which runs in place on array owned by plan
+    Source data is copied at most once and only when some stage is about to modify it
+    """
+    def __init__(self, converters: Sequence[callable]):
+        self.stages = []
+        for converter in converters:
+            if isinstance(converter, AffineConverter):
+                if len(self.stages) > 0 and isinstance(self.stages[-1], AffineStage):
+                    self.stages[-1].converters.append(converter)
+                    if converter.dtype is not None:
+                        self.stages[-1].dtype = converter.dtype
+                else:
+                    self.stages.append(AffineStage([converter]))
+            else:
+                self.stages.append(converter)
+
+    def __call__(self, data: numpy.ndarray, copy: bool = True) -> numpy.ndarray:
+        """
+        Returns converted data, with `copy=False` writeable source data may be converted in place
+        """
+        source = data
+        owned = not copy and data.flags.writeable
+        for stage in self.stages:
+            if isinstance(stage, AffineStage):
+                dtype = stage.get_dtype(data)
+                if not owned or not data.flags.writeable or data.dtype != dtype:
+                    data = numpy.array(data, dtype=dtype)
+                    owned = True
+                stage.apply(data)
+            else:
+                try:
+                    result = stage(data)
+                except ValueError:
+                    # Converter tried to modify read-only data, lets give it a copy
+                    if data.flags.writeable:
+                        raise
+                    data = data.copy()
+                    owned = True
+                    result = stage(data)
+                if result is not data:
+                    owned = result.flags.writeable and (not copy or not numpy.may_share_memory(result, source))
+                data = result
+        return data
+
+
+class ConverterPlanner:
+    """
+    Compiles converter chains to ConverterPlans and caches them for the whole import or export session
+    """
+    def __init__(self):
+        self.plans: Dict[Tuple, ConverterPlan] = {}
+
+    def get_plan(self, semantic: Any, dxgi_format: Any, converters: Sequence[callable]) -> ConverterPlan:
+        key = (semantic, dxgi_format, tuple(converters))
+        plan = self.plans.get(key, None)
+        if plan is None:
+            plan = ConverterPlan(converters)
+            self.plans[key] = plan
+        return plan
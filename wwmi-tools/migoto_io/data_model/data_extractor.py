@@ -1,4 +1,3 @@
-import collections
 import copy
 import numpy
 import time
@@ -9,6 +8,8 @@ from operator import attrgetter, itemgetter
 
 from .byte_buffer import AbstractSemantic, Semantic, BufferSemantic, NumpyBuffer, BufferLayout
 from .dxgi_format import DXGIFormat, DXGIType
+from .converters import ConverterPlanner
+from .mesh_data import MeshData
 
 
 class BlenderDataExtractor:
@@ -29,7 +30,8 @@ class BlenderDataExtractor:
                  semantic_converters: Dict[AbstractSemantic, List[callable]], 
                  format_converters: Dict[AbstractSemantic, List[callable]],
                  vertex_ids_cache: Optional[numpy.ndarray] = None,
-                 flip_winding= False) -> Tuple[numpy.ndarray, NumpyBuffer]:
+                 flip_winding= False,
+                 converter_planner: Optional[ConverterPlanner] = None) -> Tuple[numpy.ndarray, NumpyBuffer]:
         
         self.blender_data_formats = blender_data_formats
         
@@ -66,16 +68,19 @@ class BlenderDataExtractor:
         # Initialize vertex buffer with requested layout
         vertex_buffer = NumpyBuffer(layout, size=len(vertex_ids))
 
+        if converter_planner is None:
+            converter_planner = ConverterPlanner()
+
         # Convert received data and import it to output vertex buffer
         if loop_data is not None:
-            vertex_buffer.import_data(loop_data, semantic_converters, format_converters)
+            vertex_buffer.import_data(loop_data, semantic_converters, format_converters, converter_planner)
         if vertex_data is not None:
-            vertex_buffer.import_data(vertex_data, semantic_converters, format_converters)
+            vertex_buffer.import_data(vertex_data, semantic_converters, format_converters, converter_planner)
         if index_data is not None:
-            for index_converter in semantic_converters.get(AbstractSemantic(Semantic.Index), []):
-                index_data = index_converter(index_data)
-            for index_converter in format_converters.get(AbstractSemantic(Semantic.Index), []):
-                index_data = index_converter(index_data)
+            index_semantic = AbstractSemantic(Semantic.Index)
+            index_converters = semantic_converters.get(index_semantic, []) + format_converters.get(index_semantic, [])
+            index_format = proxy_layout.get_element(index_semantic).format
+            index_data = converter_planner.get_plan(index_semantic, index_format, index_converters)(index_data, copy=False)
 
         return index_data, vertex_buffer
 
@@ -203,18 +208,17 @@ class BlenderDataExtractor:
             # Swap every first with every third element of loop data array
             loop_data.data = loop_data.data[indices]
 
-        # Build IB
+        # Build IB and remove vertices with the exactly same attributes in a single pass
         index_data = None
         index_semantic = proxy_layout.get_element(AbstractSemantic(Semantic.Index))
-        if index_semantic is not None:
-            indexed_vertices = collections.OrderedDict()
+        if index_semantic is not None or dedupe:
             # Note: foreach_get provides loop data in the same order as iteration over polygons
-            index_data = [indexed_vertices.setdefault(data.tobytes(), len(indexed_vertices)) for data in loop_data.data]
-            index_data = numpy.array(index_data, dtype=index_semantic.get_numpy_type())
-                
-        # Remove vertices with the exactly same attributes
-        if dedupe:
-            loop_data.remove_duplicates()
+            # Vertices are indexed in order of first occurrence, so IB references rows of deduped loop data
+            unique_index, vertex_ids = loop_data.get_unique_rows()
+            if index_semantic is not None:
+                index_data = numpy.asarray(vertex_ids, dtype=index_semantic.get_numpy_type())
+            if dedupe:
+                loop_data.set_data(loop_data.get_data(unique_index))
 
         print(f'Loop data fetch time: {time.time() - start_time :.3f}s ({len(loop_data.get_data())} vertices, {len(index_data)} indices)')
 
@@ -243,8 +247,7 @@ class BlenderDataExtractor:
         vertex_groups = None
         for buffer_semantic in proxy_layout.semantics:
             if buffer_semantic.abstract.enum in [Semantic.Blendindices, Semantic.Blendweight]:
-                vertex_groups = [sorted(vertex.groups, key=attrgetter('weight'), reverse=True)
-                                 for vertex in mesh.vertices]
+                vertex_groups = self.get_vertex_groups(mesh)
                 break
 
         # Fetch data for requested semantics
@@ -257,13 +260,11 @@ class BlenderDataExtractor:
             elif semantic == Semantic.Blendindices:
                 dtype = numpy_type[0] if isinstance(numpy_type, tuple) else numpy_type
                 num_vgs = buffer_semantic.get_num_values()
-                data = numpy.array([[vg.group for vg in groups[:num_vgs]] + [0] * (num_vgs - len(groups))
-                                    for groups in vertex_groups], dtype=dtype)
+                data = self.get_top_vertex_groups(vertex_groups, 'group', num_vgs, dtype)
             elif semantic == Semantic.Blendweight:
                 dtype = numpy_type[0] if isinstance(numpy_type, tuple) else numpy_type
                 num_vgs = buffer_semantic.get_num_values()
-                data = numpy.array([[vg.weight for vg in groups[:num_vgs]] + [0] * (num_vgs - len(groups))
-                                    for groups in vertex_groups], dtype=dtype)
+                data = self.get_top_vertex_groups(vertex_groups, 'weight', num_vgs, dtype)
             else:
                 continue
             
@@ -275,6 +276,59 @@ class BlenderDataExtractor:
 
         return vertex_data
 
+    def get_vertex_groups(self, mesh: bpy.types.Mesh) -> Tuple[numpy.ndarray, numpy.ndarray, int]:
+        """
+        Returns VGs of all vertices as flat structured array of (vertex, group, weight) triplets, their ranks and vertex count
+        Triplets are sorted by vertex id and descending weight, VGs with equal weights keep their original order
+        """
+        if isinstance(mesh, MeshData):
+            vertices, groups, weights = mesh.vertex_group_weights
+        else:
+            vertices, groups, weights = self.get_vertex_group_weights(mesh.vertices)
+        num_vertices = len(mesh.vertices)
+
+        triplets = numpy.empty(len(vertices), dtype=[('vertex', numpy.int64), ('group', numpy.int64), ('weight', numpy.float64)])
+        triplets['vertex'] = vertices
+        triplets['group'] = groups
+        triplets['weight'] = weights
+        num_groups = numpy.bincount(triplets['vertex'], minlength=num_vertices)
+
+        # Stable sort matches sorted(vertex.groups, key=attrgetter('weight'), reverse=True) for every vertex
+        triplets = triplets[numpy.lexsort((-triplets['weight'], triplets['vertex']))]
+
+        # Store position of every VG in sorted list of its vertex
+        vertex_offsets = numpy.cumsum(num_groups) - num_groups
+        ranks = numpy.arange(len(triplets)) - vertex_offsets[triplets['vertex']]
+
+        return triplets, ranks, num_vertices
+
+    @staticmethod
+    def get_vertex_group_weights(vertices: bpy.types.MeshVertices) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Returns VGs of all vertices as flat (vertex, group, weight) arrays in order of vertices and their VGs
+        """
+        vertex_groups = [vertex.groups for vertex in vertices]
+        num_groups = numpy.fromiter(map(len, vertex_groups), dtype=numpy.int64, count=len(vertex_groups))
+        elements = [vg for groups in vertex_groups for vg in groups]
+        vertex_ids = numpy.repeat(numpy.arange(len(vertex_groups)), num_groups)
+        group_ids = numpy.fromiter(map(attrgetter('group'), elements), dtype=numpy.int64, count=len(elements))
+        weights = numpy.fromiter(map(attrgetter('weight'), elements), dtype=numpy.float64, count=len(elements))
+        return vertex_ids, group_ids, weights
+
+    def get_top_vertex_groups(self, 
+                              vertex_groups: Tuple[numpy.ndarray, numpy.ndarray, int],
+                              field: str, 
+                              num_vgs: int, 
+                              dtype: numpy.dtype) -> numpy.ndarray:
+        """
+        Returns (V, num_vgs) array of given field of num_vgs heaviest VGs of every vertex padded with zeroes
+        """
+        triplets, ranks, num_vertices = vertex_groups
+        selected = ranks < num_vgs
+        data = numpy.zeros((num_vertices, num_vgs), dtype=triplets.dtype[field])
+        data[triplets['vertex'][selected], ranks[selected]] = triplets[field][selected]
+        return data.astype(dtype)
+
     def get_shapekey_data(self, 
                           obj: bpy.types.Object, 
                           names_filter: Optional[List[str]] = None, 
@@ -310,7 +364,36 @@ class BlenderDataExtractor:
 
         return result
 
+    def get_stacked_shapekey_data(self,
+                                  obj: bpy.types.Object,
+                                  names: List[str],
+                                  deduct_basis = False) -> numpy.ndarray:
+        """
+        Returns data of shapekeys with given names stacked into single (shapekeys, vertices, values) array
+        """
+        start_time = time.time()
+
+        numpy_type = self.blender_data_formats[Semantic.ShapeKey].get_numpy_type()
+
+        key_blocks = obj.data.shape_keys.key_blocks
+
+        result = numpy.empty((len(names), len(obj.data.vertices)), dtype=numpy_type)
+
+        for shapekey_id, shapekey_name in enumerate(names):
+            key_blocks[shapekey_name].data.foreach_get('co', result[shapekey_id].ravel())
+
+        self.sanitize_blender_data(result)
+
+        if deduct_basis:
+            result -= self.fetch_data(key_blocks['Basis'].data, 'co', numpy_type)
+
+        print(f'Shape Keys fetch time: {time.time() - start_time :.3f}s ({len(names)} shapekeys)')
+
+        return result
+
     @staticmethod
     def sanitize_blender_data(arr: numpy.ndarray):
         if numpy.issubdtype(arr.dtype, numpy.floating):
-            numpy.nan_to_num(arr, copy=False)
+            # Check is much cheaper than replacement and data rarely has NaN or inf values
+            if not numpy.isfinite(arr).all():
+                numpy.nan_to_num(arr, copy=False)
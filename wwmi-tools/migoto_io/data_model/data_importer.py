@@ -5,6 +5,7 @@ from typing import List, Tuple, Dict, Optional
 
 from .byte_buffer import AbstractSemantic, Semantic, BufferSemantic, NumpyBuffer, BufferLayout
 from .dxgi_format import DXGIFormat, DXGIType
+from .converters import ConverterPlan, ConverterPlanner, NormalizedDecoder
 
 
 class BlenderDataImporter:
@@ -15,10 +16,15 @@ class BlenderDataImporter:
                  index_buffer: NumpyBuffer,
                  vertex_buffer: NumpyBuffer,
                  semantic_converters: Dict[AbstractSemantic, List[callable]], 
-                 format_converters: Dict[AbstractSemantic, List[callable]]):
+                 format_converters: Dict[AbstractSemantic, List[callable]],
+                 converter_planner: Optional[ConverterPlanner] = None):
+
+        if converter_planner is None:
+            converter_planner = ConverterPlanner()
         
         buffer_semantic = index_buffer.layout.get_element(AbstractSemantic(Semantic.Index))
-        index_data = self.get_semantic_data(index_buffer, buffer_semantic, format_converters, semantic_converters)
+        index_data = self.get_buffer_data(index_buffer, [buffer_semantic], format_converters, semantic_converters, converter_planner)
+        index_data = index_data[buffer_semantic.get_name()]
 
         self.import_faces(mesh, index_data)
 
@@ -31,16 +37,18 @@ class BlenderDataImporter:
         texcoords = {}
         shapekeys = {}
         normals = None
+
+        # Skip tangents import, we'll recalc them on export
+        buffer_semantics = [buffer_semantic for buffer_semantic in vertex_buffer.layout.semantics
+                            if buffer_semantic.abstract.enum not in [Semantic.Tangent, Semantic.BitangentSign]]
+
+        # Get converted data from vertex buffer
+        buffer_data = self.get_buffer_data(vertex_buffer, buffer_semantics, format_converters, semantic_converters, converter_planner)
         
-        for buffer_semantic in vertex_buffer.layout.semantics:
+        for buffer_semantic in buffer_semantics:
             semantic = buffer_semantic.abstract.enum
 
-            # Skip tangents import, we'll recalc them on export
-            if semantic in [Semantic.Tangent, Semantic.BitangentSign]:
-                continue
-
-            # Get converted data from vertex buffer
-            data = self.get_semantic_data(vertex_buffer, buffer_semantic, format_converters, semantic_converters)
+            data = buffer_data.pop(buffer_semantic.get_name())
 
             if semantic == Semantic.ShapeKey:
                 shapekeys[buffer_semantic.abstract.index] = data
@@ -69,34 +77,48 @@ class BlenderDataImporter:
 
         self.import_normals(mesh, normals, vertex_ids)
 
-    def get_semantic_data(self, 
-                          buffer: NumpyBuffer, 
+    def get_buffer_data(self,
+                        buffer: NumpyBuffer,
+                        buffer_semantics: List[BufferSemantic],
+                        format_converters: Dict[AbstractSemantic, List[callable]],
+                        semantic_converters: Dict[AbstractSemantic, List[callable]],
+                        converter_planner: ConverterPlanner) -> Dict[str, numpy.ndarray]:
+        """
+        Returns converted data of given semantics, converters are applied to one chunk of buffer rows at a time
+        So besides of converted arrays only one chunk of raw and intermediate data is held in memory at once
+        """
+        plans = {
+            buffer_semantic.get_name(): self.get_semantic_plan(buffer_semantic, format_converters, semantic_converters, converter_planner)
+            for buffer_semantic in buffer_semantics
+        }
+        result = {}
+        start = 0
+        for chunk in buffer.iter_chunks():
+            for buffer_semantic in buffer_semantics:
+                name = buffer_semantic.get_name()
+                data = plans[name](chunk.get_field(name))
+                if name not in result:
+                    # All converters work per row, so converted data of the first chunk defines result shape
+                    # Blender stores float attributes with single precision, so there's no point to keep doubles
+                    dtype = numpy.float32 if data.dtype == numpy.float64 else data.dtype
+                    result[name] = numpy.empty((len(buffer),) + data.shape[1:], dtype=dtype)
+                result[name][start:start+len(chunk)] = data
+            start += len(chunk)
+        return result
+
+    def get_semantic_plan(self,
                           buffer_semantic: BufferSemantic, 
                           format_converters: Dict[AbstractSemantic, List[callable]], 
-                          semantic_converters: Dict[AbstractSemantic, List[callable]]):
+                          semantic_converters: Dict[AbstractSemantic, List[callable]],
+                          converter_planner: ConverterPlanner) -> ConverterPlan:
         
-        data = buffer.get_field(buffer_semantic.get_name())
-    
-        for converter in format_converters.get(buffer_semantic.abstract, []):
-            try:
-                data = converter(data)
-            except ValueError:
-                if not data.flags.writeable:
-                    data = converter(data.copy())
-
+        converters = list(format_converters.get(buffer_semantic.abstract, []))
         # Any remaining normalized integers must be converted to floats before running semantic converters
         if buffer_semantic.format.dxgi_type in [DXGIType.UNORM16, DXGIType.UNORM8, DXGIType.SNORM16, DXGIType.SNORM8]:
-            if not numpy.issubdtype(data.dtype, numpy.floating):
-                data = buffer_semantic.format.type_decoder(data)
-            
-        for converter in semantic_converters.get(buffer_semantic.abstract, []):
-            try:
-                data = converter(data)
-            except ValueError:
-                if not data.flags.writeable:
-                    data = converter(data.copy())
-
-        return data
+            converters.append(NormalizedDecoder(buffer_semantic.format))
+        converters.extend(semantic_converters.get(buffer_semantic.abstract, []))
+
+        return converter_planner.get_plan(buffer_semantic.abstract, buffer_semantic.format, converters)
    
     def import_faces(self, 
                      mesh: bpy.types.Mesh, 
@@ -1,5 +1,4 @@
 import time
-import json
 import numpy
 import copy
 import math
@@ -13,6 +12,9 @@ from .dxgi_format import DXGIFormat, DXGIType
 from .byte_buffer import Semantic, AbstractSemantic, BufferSemantic, BufferLayout, NumpyBuffer
 from .data_extractor import BlenderDataExtractor
 from .data_importer import BlenderDataImporter
+from .array_cache import get_mesh_fingerprint, get_cache_key, is_cache_key_valid, save_array, load_array, remove_array
+from .converters import (ConverterPlanner, PartialConverter, make_flip_vector_converter, make_mirror_vector_converter,
+                         make_scale_vector_converter, make_rotate_vector_converter, make_flip_texcoord_v_converter)
 
 
 class DataModel:
@@ -26,6 +28,7 @@ class DataModel:
     buffers_format: Dict[str, BufferLayout] = {}
     semantic_converters: Dict[AbstractSemantic, List[callable]] = {}
     format_converters: Dict[AbstractSemantic, List[callable]] = {}
+    converter_planner = ConverterPlanner()
 
     blender_data_formats: Dict[Semantic, DXGIFormat] = {
         Semantic.Index: DXGIFormat.R32_UINT,
@@ -49,7 +52,8 @@ class DataModel:
                  vg_remap: Optional[numpy.ndarray],
                  mirror_mesh: bool = False,
                  mesh_scale: float = 1.0,
-                 mesh_rotation: Tuple[float] = (0.0, 0.0, 0.0)):
+                 mesh_rotation: Tuple[float] = (0.0, 0.0, 0.0),
+                 converter_planner: Optional[ConverterPlanner] = None):
 
         # Copy default converters
         semantic_converters, format_converters = {}, {}
@@ -63,6 +67,11 @@ class DataModel:
         if flip_winding:
             self._insert_converter(semantic_converters, AbstractSemantic(Semantic.Index), self.converter_rgb_to_bgr_vector)
 
+        # Converters are hashable by value, so converter planner reuses plans compiled for previous components
+        if mesh_rotation != (0.0, 0.0, 0.0):
+            rotation_matrix = mathutils.Euler(tuple(map(math.radians, mesh_rotation)), 'XYZ').to_matrix()
+            rotate_converter = make_rotate_vector_converter(rotation_matrix)
+
         for semantic in vertex_buffer.layout.semantics:
             # Skip tangents import, we'll recalc them on export
             if semantic.abstract.enum in [Semantic.Tangent, Semantic.BitangentSign]:
@@ -71,21 +80,19 @@ class DataModel:
             if semantic.abstract.enum in [Semantic.Position, Semantic.ShapeKey, Semantic.Normal]:
                 # Invert X coord of every vector in arrays required to mirror mesh
                 if mirror_mesh:
-                    self._insert_converter(semantic_converters, semantic.abstract, self.converter_mirror_vector)
+                    self._insert_converter(semantic_converters, semantic.abstract, make_mirror_vector_converter())
                 # Scale coords of every vector in arrays required to scale mesh
                 if mesh_scale != 1.0:
-                    converter = lambda data: self.converter_scale_vector(data, mesh_scale)
-                    self._insert_converter(semantic_converters, semantic.abstract, converter)
+                    self._insert_converter(semantic_converters, semantic.abstract, make_scale_vector_converter(mesh_scale))
                 # Rotate coords of every vector in arrays required to rotate mesh
                 if mesh_rotation != (0.0, 0.0, 0.0):
-                    converter = lambda data: self.converter_rotate_vector(data, mesh_rotation)
-                    self._insert_converter(semantic_converters, semantic.abstract, converter)
+                    self._insert_converter(semantic_converters, semantic.abstract, rotate_converter)
             # Flip V component of UV maps
             if self.flip_texcoord_v and semantic.abstract.enum == Semantic.TexCoord:
-                self._insert_converter(semantic_converters, semantic.abstract, self.converter_flip_texcoord_v)
+                self._insert_converter(semantic_converters, semantic.abstract, make_flip_texcoord_v_converter())
             # Flip normals
             if self.flip_normal and semantic.abstract.enum == Semantic.Normal:
-                self._insert_converter(semantic_converters, semantic.abstract, self.converter_flip_vector)
+                self._insert_converter(semantic_converters, semantic.abstract, make_flip_vector_converter())
             # Remap indicies of VG groups
             if vg_remap is not None:
                 if semantic.abstract.enum == Semantic.Blendindices:
@@ -94,12 +101,12 @@ class DataModel:
             if semantic.abstract.enum not in [Semantic.Blendindices, Semantic.Blendweight]:
                 blender_num_values = self.blender_data_formats[semantic.abstract.enum].get_num_values()
                 if semantic.get_num_values() != blender_num_values:
-                    converter = lambda data, width=blender_num_values: self.converter_resize_second_dim(data, width)
+                    converter = PartialConverter.make(self.converter_resize_second_dim, width=blender_num_values)
                     self._insert_converter(format_converters, semantic.abstract, converter)
 
         data_importer = BlenderDataImporter()
 
-        data_importer.set_data(obj, mesh, index_buffer, vertex_buffer, semantic_converters, format_converters)
+        data_importer.set_data(obj, mesh, index_buffer, vertex_buffer, semantic_converters, format_converters, converter_planner)
 
     def get_data(self, 
                  context: bpy.types.Context, 
@@ -205,25 +212,29 @@ class DataModel:
         flip_winding = self.flip_winding if not mirror_mesh else not self.flip_winding
         flip_bitangent_sign = self.flip_bitangent_sign if not mirror_mesh else not self.flip_bitangent_sign
 
+        settings = context.scene.wwmi_tools_settings
+        mesh_fingerprint = None
+
         if not fetch_loop_data:
-            if collection != context.scene.wwmi_tools_settings.vertex_ids_cached_collection:
+            if collection != settings.vertex_ids_cached_collection:
                 # Cache contains data for different object and must be cleared
-                context.scene.wwmi_tools_settings.vertex_ids_cache = ''
+                self.clear_loop_data_cache(settings)
                 fetch_loop_data = True
                 cache_vertex_ids = True
             else:
                 # Partial export is enabled
-                if context.scene.wwmi_tools_settings.vertex_ids_cache:
-                    # Valid vertex ids cache exists, lets load it
-                    vertex_ids_cache = numpy.array(json.loads(context.scene.wwmi_tools_settings.vertex_ids_cache))
-                else:
-                    # Cache is clear, we'll have to fetch loop data once 
+                mesh_fingerprint = get_mesh_fingerprint(mesh)
+                if is_cache_key_valid(settings.vertex_ids_cache, mesh_fingerprint):
+                    # Vertex ids cache exists and matches mesh topology, lets load it
+                    vertex_ids_cache = load_array(settings.vertex_ids_cache)
+                if vertex_ids_cache is None:
+                    # Cache is clear or outdated, we'll have to fetch loop data once 
+                    self.clear_loop_data_cache(settings)
                     fetch_loop_data = True
                     cache_vertex_ids = True
-        elif context.scene.wwmi_tools_settings.vertex_ids_cache:
+        elif settings.vertex_ids_cache:
             # We're going to fetch loop data, cache must be cleared
-            context.scene.wwmi_tools_settings.vertex_ids_cache = ''
-            context.scene.wwmi_tools_settings.index_data_cache = ''
+            self.clear_loop_data_cache(settings)
 
         # Copy default converters
         semantic_converters, format_converters = {}, {}
@@ -234,62 +245,47 @@ class DataModel:
         for semantic in export_layout.semantics:
             # Flip normals
             if self.flip_normal and semantic.abstract.enum == Semantic.Normal:
-                self._insert_converter(semantic_converters, semantic.abstract, self.converter_flip_vector)
+                self._insert_converter(semantic_converters, semantic.abstract, make_flip_vector_converter())
             # Flip tangents
             if self.flip_tangent and semantic.abstract.enum == Semantic.Tangent:
-                self._insert_converter(semantic_converters, semantic.abstract, self.converter_flip_vector)
+                self._insert_converter(semantic_converters, semantic.abstract, make_flip_vector_converter())
             # Flip bitangent sign
             if flip_bitangent_sign and semantic.abstract.enum == Semantic.BitangentSign:
-                self._insert_converter(semantic_converters, semantic.abstract, self.converter_flip_vector)
+                self._insert_converter(semantic_converters, semantic.abstract, make_flip_vector_converter())
             # Invert X coord of every vector in arrays required to mirror mesh
             if mirror_mesh and semantic.abstract.enum in [Semantic.Position, Semantic.Normal, Semantic.Tangent]:
-                    self._insert_converter(semantic_converters, semantic.abstract, self.converter_mirror_vector)
+                    self._insert_converter(semantic_converters, semantic.abstract, make_mirror_vector_converter())
             # Flip V component of UV maps
             if self.flip_texcoord_v and semantic.abstract.enum == Semantic.TexCoord:
-                self._insert_converter(semantic_converters, semantic.abstract, self.converter_flip_texcoord_v)
+                self._insert_converter(semantic_converters, semantic.abstract, make_flip_texcoord_v_converter())
 
         # If vertex_ids_cache is *not* None, get_data method will skip loop data fetching
         index_buffer, vertex_buffer = self.data_extractor.get_data(
-            mesh, export_layout, self.blender_data_formats, semantic_converters, format_converters, vertex_ids_cache, flip_winding=flip_winding)
+            mesh, export_layout, self.blender_data_formats, semantic_converters, format_converters, vertex_ids_cache,
+            flip_winding=flip_winding, converter_planner=self.converter_planner)
 
         if cache_vertex_ids:
             # As vertex_ids_cache is None, get_data fetched loop data for us and we can cache vertex ids
+            # Arrays are stored in binary files, while scene settings keep only their keys
+            if mesh_fingerprint is None:
+                mesh_fingerprint = get_mesh_fingerprint(mesh)
             vertex_ids = vertex_buffer.get_field(AbstractSemantic(Semantic.VertexId).get_name())
-            context.scene.wwmi_tools_settings.vertex_ids_cache = json.dumps(vertex_ids.tolist())
+            settings.vertex_ids_cache = get_cache_key(f'{collection.name}_vertex_ids', mesh_fingerprint)
+            save_array(settings.vertex_ids_cache, vertex_ids)
             if cache_index_data:
-                context.scene.wwmi_tools_settings.index_data_cache = json.dumps(index_buffer.tolist())
-            context.scene.wwmi_tools_settings.vertex_ids_cached_collection = collection
+                settings.index_data_cache = get_cache_key(f'{collection.name}_index_data', mesh_fingerprint)
+                save_array(settings.index_data_cache, index_buffer)
+            settings.vertex_ids_cached_collection = collection
 
         return index_buffer, vertex_buffer
 
     @staticmethod
-    def converter_flip_vector(data: numpy.ndarray) -> numpy.ndarray:
-        return -data
-    
-    @staticmethod
-    def converter_mirror_vector(data: numpy.ndarray) -> numpy.ndarray:
-        data[:, 0] *= -1
-        return data
-    
-    @staticmethod
-    def converter_rotate_vector(data: numpy.ndarray, rotation: Tuple[float]) -> numpy.ndarray:
-        rotation_matrix = mathutils.Euler(tuple(map(math.radians, rotation)), 'XYZ').to_matrix().to_4x4()
-        rotation_matrix_array = numpy.array(rotation_matrix)[:3, :3]
-        data = data @ rotation_matrix_array.T
-        return data
-        
-    @staticmethod
-    def converter_scale_vector(data: numpy.ndarray, scale: float) -> numpy.ndarray:
-        data *= scale
-        return data
-    
-    @staticmethod
-    def converter_flip_texcoord_v(data: numpy.ndarray) -> numpy.ndarray:
-        if data.dtype != numpy.float32:
-            data = data.astype(numpy.float32)
-        data[:, 1] = 1.0 - data[:, 1]
-        return data
-    
+    def clear_loop_data_cache(settings):
+        remove_array(settings.vertex_ids_cache)
+        remove_array(settings.index_data_cache)
+        settings.vertex_ids_cache = ''
+        settings.index_data_cache = ''
+
     @staticmethod
     def converter_reshape_second_dim(data: numpy.ndarray, width: int) -> numpy.ndarray:
         """
@@ -0,0 +1,159 @@
+import time
+import numpy
+
+from dxgi_format import DXGIFormat, DXGIType, get_format_converter, normalized_types
+
+
+def main():
+    test_converter_matches_list_encoding()
+    test_normalized_round_trip()
+    test_float_round_trip()
+    test_integer_round_trip()
+    test_converter_cache()
+    benchmark_converters()
+
+
+def get_all_values(dxgi_format, size=100000):
+    """
+    Returns all possible values of 8 and 16 bit formats and random values with edge cases of 32 bit ones
+    """
+    numpy_type = dxgi_format.numpy_base_type
+    if dxgi_format.value_byte_width == 1:
+        return numpy.arange(256, dtype=numpy.uint8).view(numpy_type)
+    if dxgi_format.value_byte_width == 2:
+        values = numpy.arange(65536, dtype=numpy.uint16).view(numpy_type)
+    else:
+        rng = numpy.random.default_rng(0)
+        values = rng.integers(0, 2**32, size, dtype=numpy.uint32).view(numpy_type)
+        if numpy.issubdtype(numpy_type, numpy.floating):
+            edge_values = [0.0, -0.0, 1.0, -1.0, 0.5, 65504.0, -65504.0, 1e-8, 1e30, -1e30]
+        else:
+            info = numpy.iinfo(numpy_type)
+            edge_values = [0, 1, info.max, info.min, 255, 256, 65535, 65536]
+        values = numpy.concatenate([numpy.array(edge_values, dtype=numpy_type), values])
+    if numpy.issubdtype(numpy_type, numpy.floating):
+        # NaN and infinity have no defined conversion to integers and no stable bit pattern after conversions
+        values = values[numpy.isfinite(values)]
+    return values
+
+
+def get_formats():
+    # One format per DXGI type is enough, as kernels depend only on types of values
+    formats = {}
+    for dxgi_format in DXGIFormat:
+        if dxgi_format.num_values == 1:
+            formats[dxgi_format.dxgi_type] = dxgi_format
+    return list(formats.values())
+
+
+def test_converter_matches_list_encoding():
+    for src_format in get_formats():
+        for dst_format in get_formats():
+            if src_format == dst_format:
+                continue
+            values = get_all_values(src_format)
+            # Reference conversion via Python list, the way ByteBuffer used to do it
+            try:
+                with numpy.errstate(all='ignore'):
+                    expected = dst_format.encoder(src_format.decoder(values.tobytes()).tolist())
+            except (OverflowError, ValueError):
+                # List conversion is undefined for out of range values, lets compare only values within range
+                try:
+                    values = get_values_in_range(values, src_format, dst_format)
+                    with numpy.errstate(all='ignore'):
+                        expected = dst_format.encoder(src_format.decoder(values.tobytes()).tolist())
+                except (OverflowError, ValueError):
+                    continue
+            with numpy.errstate(all='ignore'):
+                result = get_format_converter(src_format, dst_format)(values)
+            assert(result.dtype == dst_format.numpy_base_type)
+            assert(result.tobytes() == expected.tobytes()), f'{src_format} -> {dst_format}'
+
+
+def get_values_in_range(values, src_format, dst_format):
+    decoded = src_format.decoder(values.tobytes()).astype(numpy.float64)
+    dst_type = dst_format.numpy_base_type
+    if numpy.issubdtype(dst_type, numpy.integer) and dst_format.dxgi_type not in normalized_types:
+        info = numpy.iinfo(dst_type)
+        with numpy.errstate(all='ignore'):
+            return values[(decoded >= info.min) & (decoded <= info.max)]
+    return values
+
+
+def test_normalized_round_trip():
+    for dxgi_format in get_formats():
+        if dxgi_format.dxgi_type not in normalized_types:
+            continue
+        values = get_all_values(dxgi_format)
+        for float_format in [DXGIFormat.R32_FLOAT, DXGIFormat.R16_FLOAT]:
+            if dxgi_format.value_byte_width == 2 and float_format == DXGIFormat.R16_FLOAT:
+                # Float16 has only 11 bits of precision
+                continue
+            result = get_format_converter(dxgi_format, float_format)(values)
+            result = get_format_converter(float_format, dxgi_format)(result)
+            if dxgi_format.dxgi_type in (DXGIType.SNORM16, DXGIType.SNORM8):
+                # Both -MAX-1 and -MAX are decoded as values close to -1.0
+                values = values[values != numpy.iinfo(values.dtype).min]
+                result = result[result != numpy.iinfo(result.dtype).min]
+            assert(numpy.array_equal(result, values)), f'{dxgi_format} -> {float_format}'
+
+
+def test_float_round_trip():
+    values = get_all_values(DXGIFormat.R16_FLOAT)
+    result = get_format_converter(DXGIFormat.R16_FLOAT, DXGIFormat.R32_FLOAT)(values)
+    result = get_format_converter(DXGIFormat.R32_FLOAT, DXGIFormat.R16_FLOAT)(result)
+    assert(result.tobytes() == values.tobytes())
+
+
+def test_integer_round_trip():
+    for src_format, dst_format in [
+        (DXGIFormat.R8_UINT, DXGIFormat.R16_UINT), (DXGIFormat.R8_UINT, DXGIFormat.R32_UINT),
+        (DXGIFormat.R16_UINT, DXGIFormat.R32_UINT), (DXGIFormat.R8_SINT, DXGIFormat.R16_SINT),
+        (DXGIFormat.R8_SINT, DXGIFormat.R32_SINT), (DXGIFormat.R16_SINT, DXGIFormat.R32_SINT),
+        (DXGIFormat.R8_UINT, DXGIFormat.R32_FLOAT), (DXGIFormat.R16_UINT, DXGIFormat.R32_FLOAT),
+        (DXGIFormat.R16_SINT, DXGIFormat.R32_FLOAT), (DXGIFormat.R8_UINT, DXGIFormat.R16_FLOAT),
+    ]:
+        values = get_all_values(src_format)
+        result = get_format_converter(src_format, dst_format)(values)
+        result = get_format_converter(dst_format, src_format)(result)
+        assert(numpy.array_equal(result, values)), f'{src_format} <-> {dst_format}'
+
+
+def test_converter_cache():
+    converter = get_format_converter(DXGIFormat.R8G8B8A8_UNORM, DXGIFormat.R32G32B32A32_FLOAT)
+    assert(converter is get_format_converter(DXGIFormat.R8G8B8A8_UNORM, DXGIFormat.R32G32B32A32_FLOAT))
+    # Multi-value formats share values conversion with their single-value counterparts
+    values = numpy.arange(256, dtype=numpy.uint8).reshape(-1, 4)
+    assert(numpy.array_equal(converter(values), (values / 255.0).astype(numpy.float32)))
+
+
+def benchmark_converters(num_values=1000000):
+    rng = numpy.random.default_rng(0)
+    for src_format, dst_format in [
+        (DXGIFormat.R32G32B32A32_FLOAT, DXGIFormat.R16G16B16A16_FLOAT),
+        (DXGIFormat.R32G32B32A32_FLOAT, DXGIFormat.R8G8B8A8_UNORM),
+        (DXGIFormat.R8G8B8A8_UNORM, DXGIFormat.R32G32B32A32_FLOAT),
+        (DXGIFormat.R16G16_FLOAT, DXGIFormat.R32G32_FLOAT),
+        (DXGIFormat.R8G8B8A8_UINT, DXGIFormat.R32G32B32A32_UINT),
+    ]:
+        if numpy.issubdtype(src_format.numpy_base_type, numpy.floating):
+            values = rng.random(num_values).astype(src_format.numpy_base_type)
+        else:
+            values = rng.integers(0, 256, num_values).astype(src_format.numpy_base_type)
+
+        start_time = time.time()
+        expected = dst_format.encoder(src_format.decoder(values.tobytes()).tolist())
+        list_time = time.time() - start_time
+
+        converter = get_format_converter(src_format, dst_format)
+        start_time = time.time()
+        result = converter(values)
+        kernel_time = time.time() - start_time
+
+        assert(result.tobytes() == expected.tobytes())
+        print(f'{src_format.format} -> {dst_format.format}: list {list_time :.3f}s, '
+              f'kernel {kernel_time :.4f}s (x{list_time / max(kernel_time, 1e-6) :.0f}, {num_values} values)')
+
+
+if __name__ == '__main__':
+    main()
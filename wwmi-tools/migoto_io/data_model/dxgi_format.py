@@ -2,7 +2,7 @@ import numpy
 import struct
 
 from enum import Enum
-from typing import Tuple
+from typing import Tuple, Dict, Callable
 
 
 class DXGIType(Enum):
@@ -68,14 +68,17 @@ class DXGIFormat(Enum):
             obj.decoder = list_decoder
 
         if type_encoder is not None:
-            obj.encoder = lambda data: type_encoder(obj.encoder(data))
+            # Bind current encoder, as lambda would otherwise resolve obj.encoder to itself and recurse
+            base_encoder = obj.encoder
+            obj.encoder = lambda data: type_encoder(base_encoder(data))
         else:
             # Special encoder is not defined, lets use basic type conversion
             # We shouldn't do it earlier, as list encoder already does it via fromiter
             obj.type_encoder = lambda data: data.astype(obj.numpy_base_type)
 
         if type_decoder is not None:
-            obj.decoder = lambda data: type_decoder(obj.decoder(data))
+            base_decoder = obj.decoder
+            obj.decoder = lambda data: type_decoder(base_decoder(data))
         
         for value_bit_width, value_byte_width in {'32': 4, '16': 2, '8': 1}.items():
             if value_bit_width in obj.dxgi_type.name:
@@ -168,3 +171,45 @@ class DXGIFormat(Enum):
     R8G8B8_SNORM = 'R8G8B8_SNORM', DXGIType.SNORM8
     R8G8_SNORM = 'R8G8_SNORM', DXGIType.SNORM8
     R8_SNORM = 'R8_SNORM', DXGIType.SNORM8
+
+
+normalized_types = (DXGIType.UNORM16, DXGIType.UNORM8, DXGIType.SNORM16, DXGIType.SNORM8)
+
+# Registry of array-to-array conversion kernels, see get_format_converter
+format_converters: Dict[Tuple[DXGIFormat, DXGIFormat], Callable[[numpy.ndarray], numpy.ndarray]] = {}
+
+
+def build_format_converter(src_format: DXGIFormat, dst_format: DXGIFormat) -> Callable[[numpy.ndarray], numpy.ndarray]:
+    dst_type = dst_format.numpy_base_type
+
+    if src_format.dxgi_type == dst_format.dxgi_type:
+        # Formats differ only by number of values per row, stored values stay the same
+        return lambda data: data.astype(dst_type, copy=False)
+
+    src_decoder = src_format.type_decoder if src_format.dxgi_type in normalized_types else None
+
+    if dst_format.dxgi_type in normalized_types:
+        # Normalized values are encoded from float32, the same way as DXGIFormat.encoder does it
+        dst_encoder = dst_format.type_encoder
+        if src_decoder is None:
+            return lambda data: dst_encoder(data.astype(numpy.float32, copy=False))
+        else:
+            return lambda data: dst_encoder(src_decoder(data).astype(numpy.float32, copy=False))
+    else:
+        if src_decoder is None:
+            return lambda data: data.astype(dst_type, copy=False)
+        else:
+            return lambda data: src_decoder(data).astype(dst_type, copy=False)
+
+
+def get_format_converter(src_format: DXGIFormat, dst_format: DXGIFormat) -> Callable[[numpy.ndarray], numpy.ndarray]:
+    """
+    Returns cached kernel converting ndarray of values stored in src_format to ndarray of values stored in dst_format
+    Normalized integers are decoded to floats and encoded back, other types are converted via plain numpy cast
+    Result matches decoding of src_format to Python list and encoding it to dst_format, but runs without leaving numpy
+    """
+    converter = format_converters.get((src_format, dst_format), None)
+    if converter is None:
+        converter = build_format_converter(src_format, dst_format)
+        format_converters[(src_format, dst_format)] = converter
+    return converter
@@ -0,0 +1,83 @@
+import numpy
+
+from typing import List, Dict, Tuple, Optional
+
+
+class ArrayCollection:
+    """
+    Stand-in for bpy_prop_collection, provides foreach_get access to arrays named after Blender properties
+    """
+    def __init__(self, size: int, arrays: Optional[Dict[str, numpy.ndarray]] = None):
+        self.size = size
+        self.arrays = arrays if arrays is not None else {}
+
+    def __len__(self):
+        return self.size
+
+    def foreach_get(self, data_name: str, data: numpy.ndarray):
+        data[...] = self.arrays[data_name].reshape(data.shape)
+
+
+class MeshLayer:
+    def __init__(self, name: str, data: ArrayCollection):
+        self.name = name
+        self.data = data
+
+
+class KeyBlock(MeshLayer):
+    mute: bool = False
+
+
+class KeyBlocks(list):
+    """
+    List of key blocks, which can be accessed by name as well
+    """
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for key_block in self:
+                if key_block.name == key:
+                    return key_block
+            raise KeyError(key)
+        return super().__getitem__(key)
+
+
+class ShapeKeys:
+    def __init__(self, key_blocks: KeyBlocks):
+        self.key_blocks = key_blocks
+
+
+class MeshData:
+    """
+    Stand-in for triangulated bpy.types.Mesh built from numpy arrays, supports data access used by BlenderDataExtractor
+    Vertex groups are stored as flat (vertex, group, weight) arrays, as they're too slow to be accessed via vertices
+    """
+    def __init__(self,
+                 name: str,
+                 vertices: ArrayCollection,
+                 loops: ArrayCollection,
+                 uv_layers: Dict[str, MeshLayer],
+                 vertex_colors: Dict[str, MeshLayer],
+                 vertex_group_weights: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray],
+                 shape_keys: Optional[ShapeKeys] = None):
+        self.name = name
+        self.vertices = vertices
+        self.loops = loops
+        self.polygons = ArrayCollection(len(loops) // 3)
+        self.uv_layers = uv_layers
+        self.vertex_colors = vertex_colors
+        self.vertex_group_weights = vertex_group_weights
+        self.shape_keys = shape_keys
+
+    def calc_tangents(self):
+        # Tangents are calculated for source meshes
+        pass
+
+
+class MeshDataObject:
+    """
+    Stand-in for bpy.types.Object holding MeshData
+    """
+    def __init__(self, name: str, data: MeshData, vertex_groups: List[str]):
+        self.name = name
+        self.data = data
+        self.vertex_groups = vertex_groups
@@ -1,7 +1,9 @@
 
+import time
+
 from typing import Union, List, Dict
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from ..data_model.byte_buffer import ByteBuffer, IndexBuffer
 
@@ -45,6 +47,36 @@ class ShaderCallBranch:
                 return branch_call
 
 
+@dataclass
+class SlotResources:
+    """
+    Node of dump resource graph: all resources bound to specific shader slot, indexed in both directions
+    Lookup by call id resolves resources written by the call, lookup by hash resolves calls reading the resource
+    """
+    resources: Dict[str, ResourceDescriptor]
+    by_call_id: Dict[str, List[ResourceDescriptor]] = field(init=False)
+    by_hash: Dict[str, List[ResourceDescriptor]] = field(init=False)
+
+    def __post_init__(self):
+        self.by_call_id = {}
+        self.by_hash = {}
+        for resource in self.resources.values():
+            self.by_call_id.setdefault(resource.call_id, []).append(resource)
+            self.by_hash.setdefault(resource.hash, []).append(resource)
+
+    def get_call_resource(self, call_id):
+        result = self.by_call_id.get(call_id, [])
+        if len(result) == 1:
+            return result[0]
+        elif len(result) == 0:
+            return None
+        else:
+            raise ValueError(f'Found more than 1 resource with provided attributes!')
+
+    def get_hash_resources(self, resource_hash):
+        return self.by_hash.get(resource_hash, [])
+
+
 @dataclass
 class CallsCollector:
     dump: Dump
@@ -52,8 +84,26 @@ class CallsCollector:
     call_branches: Dict[str, ShaderCallBranch] = None
 
     def __post_init__(self):
-        self.cache = {}
+        start_time = time.time()
+        self.resource_graph = self.build_resource_graph()
+        # Branches depend only on shader, parent shader and parent resource, so lets resolve each of them once
+        self.branches_cache = {}
+        self.visited_nodes = 0
         self.call_branches = self.get_call_branches()
+        print(f'Call branches resolve time: {time.time() - start_time :.3f}s ({self.visited_nodes} nodes visited, '
+              f'{len(self.resource_graph)} slots)')
+
+    def build_resource_graph(self):
+        """
+        Builds producer/consumer graph for all shader slots used in data pattern
+        """
+        resource_graph = {}
+        for shader_map in self.shader_data_pattern.values():
+            for slot in shader_map.inputs + shader_map.outputs:
+                slot_key = self.get_slot_key(shader_map.shader_type, slot)
+                if slot_key not in resource_graph:
+                    resource_graph[slot_key] = SlotResources(self.get_all_slot_resources(shader_map.shader_type, slot))
+        return resource_graph
 
     def get_call_branches(self):
         call_branches = {}
@@ -68,7 +118,7 @@ class CallsCollector:
 
             for output_slot in shader_map.outputs:
 
-                root_shader_resource_candidates = self.get_all_slot_resources(shader_map.shader_type, output_slot)
+                root_shader_resource_candidates = self.get_slot_resources(shader_map.shader_type, output_slot).resources
 
                 output_hashes = []
 
@@ -80,14 +130,8 @@ class CallsCollector:
                         for input_slot in shader_map.inputs:
                             if input_slot.shader_id != shader_id:
                                 continue
-                            input_filter_attributes = {
-                                'call_id': root_resource.call_id,  # ID of child call should differ from parent call
-                            }
-                            input_candidate_resources = DictFilter(Filter(
-                                attributes=input_filter_attributes,
-                                dictionaries=self.get_all_slot_resources(shader_map.shader_type, input_slot)
-                            )).filtered_dict
-                            if len(input_candidate_resources) > 0:
+                            input_slot_resources = self.get_slot_resources(shader_map.shader_type, input_slot)
+                            if len(input_slot_resources.by_call_id.get(root_resource.call_id, [])) > 0:
                                 continue
 
                         branch.calls.append(BranchCall(call=root_resource.call))
@@ -116,6 +160,18 @@ class CallsCollector:
         return call_branches
 
     def resolve_branch(self, shader_id, shader_data_pattern, parent_resource, parent_shader_id):
+        """
+        Returns memoized branch, so sub-branch fed by the same resource is shared between all parents
+        """
+        cache_key = (shader_id, parent_shader_id, parent_resource.call_id, parent_resource.hash)
+        if cache_key in self.branches_cache:
+            return self.branches_cache[cache_key]
+        self.visited_nodes += 1
+        branch = self.build_branch(shader_id, shader_data_pattern, parent_resource, parent_shader_id)
+        self.branches_cache[cache_key] = branch
+        return branch
+
+    def build_branch(self, shader_id, shader_data_pattern, parent_resource, parent_shader_id):
         shader_map = shader_data_pattern[shader_id]
 
         input_slot = None
@@ -127,24 +183,22 @@ class CallsCollector:
 
         branch = ShaderCallBranch(shader_id=shader_id, calls=[], nested_branches=[])
 
-        input_filter_attributes = {
-            '!call_id': parent_resource.call_id,  # ID of child call should differ from parent call
-            'hash': parent_resource.hash,  # Hash of input resource should be the same as one of parent's output
-        }
-
-        input_candidate_resources = DictFilter(Filter(
-            attributes=input_filter_attributes,
-            dictionaries=self.get_all_slot_resources(shader_map.shader_type, input_slot)
-        )).filtered_dict
+        # Calls reading parent's output resource (same hash) via input slot, ID of child call should differ from parent call
+        input_candidate_resources = [
+            resource for resource in self.get_slot_resources(shader_map.shader_type, input_slot).get_hash_resources(parent_resource.hash)
+            if resource.call_id != parent_resource.call_id
+        ]
 
         if len(input_candidate_resources) == 0:
             return None
 
-        for _, input_candidate_resource in input_candidate_resources.items():
+        branch_call_ids = set()
+        for input_candidate_resource in input_candidate_resources:
             if int(input_candidate_resource.call_id) < int(parent_resource.call_id):
                 continue
-            if branch.get_call(input_candidate_resource.call_id) is not None:
+            if input_candidate_resource.call_id in branch_call_ids:
                 continue
+            branch_call_ids.add(input_candidate_resource.call_id)
             branch.calls.append(BranchCall(call=input_candidate_resource.call))
 
         # If shader doesn't have listed outputs, we've reached the end of current branch
@@ -159,18 +213,11 @@ class CallsCollector:
 
             output_branch = ShaderCallBranch(shader_id=shader_id, calls=[], nested_branches=[])
 
-            for branch_call in branch.calls:
+            output_slot_resources = self.get_slot_resources(shader_map.shader_type, output_slot)
 
-                output_filter_attributes = {
-                    'shaders:type': shader_map.shader_type,
-                    'slot_type': output_slot.slot_type,
-                }
-                if output_slot.slot_id is not None:
-                    output_filter_attributes['slot_id'] = output_slot.slot_id
-                if output_slot.shader_type != ShaderType.Empty:
-                    output_filter_attributes['slot_shader_type'] = output_slot.shader_type
+            for branch_call in branch.calls:
 
-                output_resource = branch_call.call.get_filtered_resource(output_filter_attributes)
+                output_resource = output_slot_resources.get_call_resource(branch_call.call.id)
 
                 if output_resource is None:
                     continue
@@ -222,12 +269,14 @@ class CallsCollector:
                 root_shaders.append(shader_id)
         return root_shaders
 
-    def get_all_slot_resources(self, shader_type, slot):
-        hash = (shader_type, slot.slot_type, slot.slot_id, slot.shader_type)
-        cached_result = self.cache.get(hash, None)
-        if cached_result is not None:
-            return cached_result
+    @staticmethod
+    def get_slot_key(shader_type, slot):
+        return shader_type, slot.slot_type, slot.slot_id, slot.shader_type
+
+    def get_slot_resources(self, shader_type, slot):
+        return self.resource_graph[self.get_slot_key(shader_type, slot)]
 
+    def get_all_slot_resources(self, shader_type, slot):
         input_filter_attributes = {
             'shaders:type': shader_type,
             'slot_type': slot.slot_type,
@@ -237,13 +286,7 @@ class CallsCollector:
         if slot.shader_type != ShaderType.Empty:
             input_filter_attributes['slot_shader_type'] = slot.shader_type
 
-        slot_resources = DictFilter(Filter(
+        return DictFilter(Filter(
             attributes=input_filter_attributes,
-            dictionaries=[self.dump.resources]
+            dictionaries=[self.dump.index]
         )).filtered_dict
-
-        self.cache[hash] = slot_resources
-
-        return slot_resources
-
-
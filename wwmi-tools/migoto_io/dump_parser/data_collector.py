@@ -1,11 +1,12 @@
 
 
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Callable
 
 from dataclasses import dataclass, field
 
 from .calls_collector import CallsCollector, ShaderMap, Slot, ShaderCallBranch
 from .resource_collector import ResourceCollector, DataMap
+from .resource_hasher import ResourceHasher
 
 from .dump_parser import Dump
 
@@ -16,12 +17,17 @@ class DataCollector:
     dump: Dump
     shader_data_pattern: Dict[str, ShaderMap]
     shader_resources: Dict[str, DataMap]
+    resource_hasher: ResourceHasher = None
+    # Optional callback to narrow down resolved call branches before their resources are collected
+    branch_filter: Callable[[Dict[str, ShaderCallBranch]], Dict[str, ShaderCallBranch]] = None
     # Output
     call_branches: Dict[str, ShaderCallBranch] = field(init=False)
 
     def __post_init__(self):
         self.calls_collector = CallsCollector(self.dump, self.shader_data_pattern)
         self.call_branches = self.calls_collector.call_branches
-        self.data_collector = ResourceCollector(self.shader_resources, self.call_branches)
+        if self.branch_filter is not None:
+            self.call_branches = self.branch_filter(self.call_branches)
+        self.data_collector = ResourceCollector(self.shader_resources, self.call_branches, self.resource_hasher)
 
 
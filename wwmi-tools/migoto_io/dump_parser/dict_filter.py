@@ -1,7 +1,9 @@
 
 import operator
 
-from typing import Union, List
+from typing import Union, List, Tuple, Callable, Optional
+from collections.abc import KeysView
+from functools import lru_cache
 from enum import Enum, auto
 from dataclasses import dataclass
 
@@ -21,6 +23,131 @@ class Filter:
     dictionaries: Union[list, dict, List['Filter']] = None
 
 
+@lru_cache(maxsize=None)
+def parse_attribute(attribute):
+    """
+    Parses filter attribute of `attr`, `!attr`, `attr:subattr` or `attr:!subattr` form
+    Returns tuple of (index_key, attribute_name, subattribute_name, must_contain_value)
+    """
+    parts = attribute.split(':')
+
+    attribute_name = parts[0]
+
+    # If attribute name has '!' prefix, search for values that aren't in 'filter_values'
+    must_contain_value = True
+    if attribute_name.startswith('!'):
+        must_contain_value = False
+        attribute_name = attribute_name[1:]
+
+    if len(parts) == 1:
+        return attribute_name, attribute_name, None, must_contain_value
+
+    subattribute_name = parts[1]
+
+    # Negation of dict-type attribute is controlled by its subattribute only
+    must_contain_value = True
+    if subattribute_name.startswith('!'):
+        must_contain_value = False
+        subattribute_name = subattribute_name[1:]
+
+    return f'{attribute_name}:{subattribute_name}', attribute_name, subattribute_name, must_contain_value
+
+
+@dataclass(frozen=True)
+class AttributeQuery:
+    index_key: str
+    getter: Callable
+    subattribute_getter: Optional[Callable]
+    must_contain_value: bool
+    values: Union[frozenset, Tuple]
+    is_hashable: bool
+
+    @classmethod
+    def compile(cls, attribute, values):
+        index_key, attribute_name, subattribute_name, must_contain_value = parse_attribute(attribute)
+
+        subattribute_getter = None
+        if subattribute_name == '__key__':
+            subattribute_getter = lambda key, value: key
+        elif subattribute_name is not None:
+            value_getter = operator.attrgetter(subattribute_name)
+            subattribute_getter = lambda key, value: value_getter(value)
+
+        if not isinstance(values, list):
+            values = [values]
+        try:
+            values, is_hashable = frozenset(values), True
+        except TypeError:
+            values, is_hashable = tuple(values), False
+
+        return cls(
+            index_key=index_key,
+            getter=operator.attrgetter(attribute_name),
+            subattribute_getter=subattribute_getter,
+            must_contain_value=must_contain_value,
+            values=values,
+            is_hashable=is_hashable,
+        )
+
+    def get_values(self, entry):
+        attribute_value = self.getter(entry)
+        if self.subattribute_getter is None:
+            return (attribute_value,)
+        items = attribute_value.items() if isinstance(attribute_value, dict) else enumerate(attribute_value)
+        return [self.subattribute_getter(key, value) for key, value in items]
+
+    def match(self, entry):
+        for value in self.get_values(entry):
+            if DictFilter.has_value(self.must_contain_value, value, self.values):
+                return True
+        return False
+
+
+class DictIndex:
+    """
+    Hash index of dict entries by values of listed attributes (both `attr` and `attr:subattr` forms are supported)
+    Allows DictFilter to resolve queries via set lookups instead of scanning through every entry of the dict
+    """
+    def __init__(self, data_dict, attributes):
+        self.dict = data_dict
+        self.positions = {}
+        self.index = {}
+
+        queries = [AttributeQuery.compile(attribute, []) for attribute in attributes]
+        for query in queries:
+            self.index[query.index_key] = {}
+
+        for position, (key, entry) in enumerate(data_dict.items()):
+            self.positions[key] = position
+            for query in queries:
+                value_index = self.index[query.index_key]
+                for value in query.get_values(entry):
+                    if value not in value_index:
+                        value_index[value] = set()
+                    value_index[value].add(key)
+
+    def __len__(self):
+        return len(self.dict)
+
+    def supports(self, query):
+        if query.index_key not in self.index or not query.is_hashable:
+            return False
+        # Negation of subattribute means 'any of values is not among filter values', so it cannot be done via lookup
+        return query.must_contain_value or query.subattribute_getter is None
+
+    def lookup(self, query):
+        value_index = self.index[query.index_key]
+        if len(query.values) == 1:
+            keys = value_index.get(next(iter(query.values)), frozenset())
+        else:
+            keys = set()
+            for value in query.values:
+                keys.update(value_index.get(value, ()))
+        if not query.must_contain_value:
+            keys = self.positions.keys() - keys
+        return keys
+
+
 class DictFilter:
     def __init__(self, filter):
         self.filter = self.validate_filter(filter)
@@ -45,9 +172,9 @@ class DictFilter:
             if isinstance(dictionary, Filter):
                 filter.dictionaries[i] = self.validate_filter(dictionary)
                 continue
-            if not isinstance(dictionary, dict):
+            if not isinstance(dictionary, (dict, DictIndex)):
                 raise ValueError(
-                    f'Invalid filter: expected "dict" or "Filter" type for dictionaries, got "{type(dictionary)}"!')
+                    f'Invalid filter: expected "dict", "DictIndex" or "Filter" type for dictionaries, got "{type(dictionary)}"!')
 
         if filter.keys is not None:
             if not isinstance(filter.keys, list):
@@ -65,6 +192,8 @@ class DictFilter:
             for dictionary in filter.dictionaries:
                 if isinstance(dictionary, Filter) or len(dictionary) == 0:
                     continue
+                if isinstance(dictionary, DictIndex):
+                    dictionary = dictionary.dict
 
                 first_dict_entry = next(iter(dictionary.values()))
 
@@ -104,10 +233,13 @@ class DictFilter:
         return filter
 
     def intersection(self, list1, list2):
+        if not isinstance(list2, (set, frozenset, dict, KeysView)):
+            list2 = set(list2)
         return [value for value in list1 if value in list2]
 
     def get_filtered_dict(self, filter, data_dict=None):
         result = {}
+        data_index = None
 
         # Optional usage of self.dict allows to compare external dict against default nested-filtered one
         if data_dict is None:
@@ -117,12 +249,17 @@ class DictFilter:
                 if isinstance(dictionary, Filter):
                     dictionary = self.get_filtered_dict(dictionary)
                 dictionaries.append(dictionary)
+            # Indexed dict can be queried directly only when it's the sole source of entries
+            if len(dictionaries) == 1 and isinstance(dictionaries[0], DictIndex):
+                data_index = dictionaries[0]
+            dictionaries = [dictionary.dict if isinstance(dictionary, DictIndex) else dictionary
+                            for dictionary in dictionaries]
             # Apply dictionaries filter condition
             found = {}
             if filter.dictionaries_condition == FilterCondition.AND:
                 found = dictionaries[0]
                 for i in range(1, len(dictionaries)):
-                    found = {key: found[key] for key in self.intersection(dictionaries[i].keys(), found.keys())}
+                    found = {key: found[key] for key in dictionaries[i].keys() if key in found}
             elif filter.dictionaries_condition == FilterCondition.OR:
                 for dictionary in dictionaries:
                     found.update(dictionary)
@@ -145,70 +282,38 @@ class DictFilter:
 
         # Filter by attributes of entries
         if filter.attributes_condition:
-            dictionaries = []
-            for filter_attribute, filter_values in filter.attributes.items():
-                dictionary = {}
-                for dict_key, dict_entry in data_dict.items():
-
-                    parts = filter_attribute.split(':')
-
-                    attribute_name = parts[0]
-
-                    # If attribute name has '!' prefix, search for values that aren't in 'filter_values'
-                    must_contain_value = True
-                    if attribute_name.startswith('!'):
-                        must_contain_value = False
-                        attribute_name = attribute_name[1:]
-
-                    attribute_value = operator.attrgetter(attribute_name)(dict_entry)
-
-                    if len(parts) == 1:
-                        # Check if given value of object's attribute is among 'filter_values' we're looking for
-                        if self.has_value(must_contain_value, attribute_value, filter_values):
-                            dictionary[dict_key] = dict_entry
-
-                    elif len(parts) == 2:
-                        # Check if any value in dict-type object's attribute is among 'filter_values' we're looking for
-                        detected = False
-                        for key, value in attribute_value.items() if isinstance(attribute_value, dict) else enumerate(attribute_value):
-
-                            filter_attribute_name = parts[1]
-
-                            # If attribute name has '!' prefix, search for values that aren't in 'filter_values'
-                            must_contain_value = True
-                            if filter_attribute_name.startswith('!'):
-                                must_contain_value = False
-                                filter_attribute_name = filter_attribute_name[1:]
-
-                            if filter_attribute_name == '__key__':
-                                # Search by dict key
-                                if self.has_value(must_contain_value, key, filter_values):
-                                    detected = True
-                                    break
-                            else:
-                                # Search by attribute of object contained in dict value
-                                value_attribute = operator.attrgetter(filter_attribute_name)(value)
-                                if self.has_value(must_contain_value, value_attribute, filter_values):
-                                    detected = True
-                                    break
-
-                        if detected:
-                            dictionary[dict_key] = dict_entry
-
-                dictionaries.append(dictionary)
+            # Compiled queries are resolved via hash index lookups when possible, falling back to full scan otherwise
+            queries = [AttributeQuery.compile(attribute, values) for attribute, values in filter.attributes.items()]
+            matches = [self.get_matching_keys(query, data_dict, data_index) for query in queries]
 
             if filter.condition == FilterCondition.AND:
-                found = dictionaries[0]
-                for i in range(1, len(dictionaries)):
-                    found = {key: found[key] for key in self.intersection(dictionaries[i].keys(), found.keys())}
-                result.update(found)
+                # Start from the most selective query to keep intersection cheap
+                matches.sort(key=len)
+                found_keys = matches[0]
+                for i in range(1, len(matches)):
+                    found_keys = found_keys & matches[i]
+                result.update(self.get_ordered_entries(found_keys, data_dict, data_index))
 
             elif filter.condition == FilterCondition.OR:
-                for dictionary in dictionaries:
-                    result.update(dictionary)
+                for keys in matches:
+                    result.update(self.get_ordered_entries(keys, data_dict, data_index))
 
         return result
 
+    def get_matching_keys(self, query, data_dict, data_index=None):
+        if data_index is not None and data_index.supports(query):
+            return data_index.lookup(query)
+        return {key: None for key, entry in data_dict.items() if query.match(entry)}.keys()
+
+    @staticmethod
+    def get_ordered_entries(keys, data_dict, data_index=None):
+        # Keep entries in the order of source dict, same as full scan would produce
+        if data_index is not None:
+            keys = sorted(keys, key=data_index.positions.__getitem__)
+        elif not isinstance(keys, KeysView):
+            keys = [key for key in data_dict if key in keys]
+        return {key: data_dict[key] for key in keys}
+
     @staticmethod
     def has_value(must_contain_value, attribute_value, filter_values):
         if must_contain_value:
@@ -0,0 +1,87 @@
+import os
+import json
+
+from pathlib import Path
+
+
+class DumpCache:
+    """
+    Versioned on-disk index of parsed frame dump, stored next to log.txt
+    Holds parsed resource descriptors, logged call parameters and content hashes of resources
+    Gets invalidated on any change of dump folder mtime, number of files in the folder or log.txt size
+    Variant allows to distinguish caches of partially parsed dumps (i.e. with DumpPrefilter)
+    Cache is stored as JSON, as frame dumps get shared and loading of their files must not be able to run code
+    """
+    version = 3
+    filename = 'wwmi_tools_dump.cache'
+
+    def __init__(self, dump_directory, variant=None):
+        self.dump_directory = Path(dump_directory)
+        self.variant = variant
+        self.path = self.dump_directory / self.filename
+        self.log_path = self.dump_directory / 'log.txt'
+        # Number of hashed resources in loaded cache, None if there's no valid cache to keep
+        self.num_hashed_resources = None
+
+    def get_signature(self):
+        # JSON has no tuples, so signature is made of lists to be comparable with loaded one
+        return [
+            self.version,
+            os.stat(self.dump_directory).st_mtime_ns,
+            len(os.listdir(self.dump_directory)),
+            os.stat(self.log_path).st_size,
+            list(self.variant) if self.variant is not None else None,
+        ]
+
+    def load(self):
+        """
+        Returns tuple of (cached_calls, cache_entries) or None if cache is missing or outdated
+        """
+        if not self.path.is_file():
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if not isinstance(cache, dict) or cache.get('signature', None) != self.get_signature():
+                return None
+            cached_calls = cache['calls']
+            cache_entries = [tuple(entry) for entry in cache['resources']]
+            # Resources must be files of the dump folder, lets not let cache point anywhere else
+            for entry in cache_entries:
+                if not isinstance(entry[0], str) or os.path.basename(entry[0]) != entry[0]:
+                    raise ValueError(f'unexpected resource file name "{entry[0]}"')
+        except Exception as e:
+            print(f'Warning! Failed to load frame dump cache: {e}')
+            return None
+        self.num_hashed_resources = cache['num_hashed_resources']
+        return cached_calls, cache_entries
+
+    def save(self, log, resources):
+        """
+        Writes cache to disk, skips writing if there are no new resource hashes to store
+        """
+        cache_entries = [resource.get_cache_entry() for resource in resources.values()]
+        num_hashed_resources = sum(1 for entry in cache_entries if entry[-1] is not None)
+
+        if self.num_hashed_resources is not None and num_hashed_resources <= self.num_hashed_resources:
+            return
+
+        # Creation of cache file changes mtime of dump folder, so file must exist before we get the signature
+        # Further writes to existing file don't affect folder mtime
+        self.path.touch()
+
+        cache = {
+            'signature': self.get_signature(),
+            'num_hashed_resources': num_hashed_resources,
+            'calls': log.get_cached_calls(),
+            'resources': cache_entries,
+        }
+
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, separators=(',', ':'))
+        except Exception as e:
+            print(f'Warning! Failed to write frame dump cache: {e}')
+            return
+
+        self.num_hashed_resources = num_hashed_resources
@@ -5,40 +5,81 @@ from pathlib import Path
 from dataclasses import dataclass, field
 
 from .log_parser import FrameDumpLog
-from .filename_parser import ResourceDescriptor, CallDescriptor
+from .filename_parser import ResourceDescriptor, CallDescriptor, resource_index_attributes
+from .dict_filter import DictIndex
+from .dump_cache import DumpCache
+from .dump_prefilter import DumpPrefilter
 
 
 @dataclass
 class Dump:
     # Input
     dump_directory: Path
+    use_cache: bool = False
+    prefilter: DumpPrefilter = None
     # Output
     log: FrameDumpLog = field(init=False)
     resources: Dict[str, ResourceDescriptor] = field(init=False)
     calls: Dict[str, CallDescriptor] = field(init=False)
+    index: DictIndex = field(init=False)
+    cache: DumpCache = field(init=False)
 
     def __post_init__(self):
-        self.log = FrameDumpLog(self.dump_directory)
         self.resources = {}
         self.calls = {}
 
-        for filename in os.listdir(self.dump_directory):
-            resource_path = os.path.join(self.dump_directory, filename)
+        if self.use_cache:
+            self.cache = DumpCache(self.dump_directory, self.prefilter.get_fingerprint() if self.prefilter else None)
+        else:
+            self.cache = None
 
-            if not os.path.isfile(resource_path):
-                continue
-            if filename.endswith('txt'):
-                continue
+        cached_data = self.cache.load() if self.cache is not None else None
 
-            resource_descriptor = ResourceDescriptor(resource_path)
-            self.resources[resource_descriptor.raw] = resource_descriptor
+        if cached_data is not None:
+            # Valid cache exists, lets skip both log parsing and filenames parsing
+            cached_calls, cache_entries = cached_data
+            self.log = FrameDumpLog(self.dump_directory, cached_calls=cached_calls)
+            for cache_entry in cache_entries:
+                resource_path = os.path.join(self.dump_directory, cache_entry[0])
+                self.import_resource_descriptor(ResourceDescriptor(resource_path, cache_entry=cache_entry))
+        else:
+            filenames = os.listdir(self.dump_directory)
+            call_ids = None
+            if self.prefilter is not None:
+                # Skip files of calls that cannot be reached by calls collector
+                filenames = self.prefilter.filter_filenames(filenames)
+                call_ids = self.prefilter.call_ids
+            self.log = FrameDumpLog(self.dump_directory, call_ids=call_ids)
+            for filename in filenames:
+                resource_path = os.path.join(self.dump_directory, filename)
 
-            if resource_descriptor.call_id not in self.calls:
-                self.calls[resource_descriptor.call_id] = CallDescriptor(resource_descriptor.call_id)
-            call = self.calls[resource_descriptor.call_id]
-            resource_descriptor.call = call
+                if not os.path.isfile(resource_path):
+                    continue
+                if filename.endswith('txt'):
+                    continue
+                if filename == DumpCache.filename:
+                    continue
 
-            call.import_resource_descriptor(resource_descriptor)
-            logged_call = self.log.calls.get(call.id, None)
-            if logged_call is not None:
-                call.parameters = logged_call.parameters
+                self.import_resource_descriptor(ResourceDescriptor(resource_path))
+
+        self.index = DictIndex(self.resources, resource_index_attributes)
+
+    def import_resource_descriptor(self, resource_descriptor):
+        self.resources[resource_descriptor.raw] = resource_descriptor
+
+        if resource_descriptor.call_id not in self.calls:
+            self.calls[resource_descriptor.call_id] = CallDescriptor(resource_descriptor.call_id)
+        call = self.calls[resource_descriptor.call_id]
+        resource_descriptor.call = call
+
+        call.import_resource_descriptor(resource_descriptor)
+        logged_call = self.log.calls.get(call.id, None)
+        if logged_call is not None:
+            call.parameters = logged_call.parameters
+
+    def save_cache(self):
+        """
+        Stores parsed dump data along with already calculated resource hashes to speed up the next run
+        """
+        if self.cache is not None:
+            self.cache.save(self.log, self.resources)
@@ -0,0 +1,91 @@
+import re
+import time
+
+from .filename_parser import ShaderType, shader_type_codepage, slot_type_codepage
+
+
+# Cheap version of ResourceDescriptor.parse_raw_call: call id, optional slot shader type, slot type and slot id
+call_id_pattern = re.compile(r'^(\d+)-')
+raw_call_pattern = re.compile(r'^(\d+)-(?:([a-z]s)-)?([a-z]+)(\d*)=')
+raw_shader_type_pattern = re.compile(r'-([a-z]s)=[a-f0-9]+')
+
+
+class DumpPrefilter:
+    """
+    Selects dump files that can possibly be reached by calls collector for given shader data pattern
+    Any call of resulting call branches has at least one resource bound to one of pattern slots,
+    so files of calls without such resources can be skipped before ResourceDescriptor construction
+    """
+    def __init__(self, shader_data_pattern):
+        self.slots = set()
+        for shader_map in shader_data_pattern.values():
+            for slot in shader_map.inputs + shader_map.outputs:
+                self.slots.add((shader_map.shader_type, slot.slot_type, slot.slot_id, slot.shader_type))
+        self.num_files = 0
+        self.num_calls = 0
+        self.call_ids = None
+
+    def get_fingerprint(self):
+        return tuple(sorted(
+            f'{shader_type.value}-{slot_shader_type.value}-{slot_type.value}{slot_id if slot_id is not None else ""}'
+            for shader_type, slot_type, slot_id, slot_shader_type in self.slots
+        ))
+
+    def match_filename(self, filename):
+        """
+        Returns call id of the file along with match result, files with unknown slot format are always matched
+        """
+        raw_call = filename.replace('!U!=', '')
+        result = raw_call_pattern.match(raw_call)
+        if result is None:
+            result = call_id_pattern.match(raw_call)
+            return (result.group(1) if result is not None else None), True
+        call_id, raw_slot_shader_type, raw_slot_type, raw_slot_id = result.groups()
+        slot_type = slot_type_codepage.get(raw_slot_type, None)
+        if slot_type is None:
+            return call_id, True
+        slot_shader_type = shader_type_codepage.get(raw_slot_shader_type, None)
+        slot_id = int(raw_slot_id) if raw_slot_id != '' else None
+        shader_types = set(shader_type_codepage.get(raw_shader_type, None)
+                           for raw_shader_type in raw_shader_type_pattern.findall(raw_call))
+        for shader_type, slot_slot_type, slot_slot_id, slot_shader_type_filter in self.slots:
+            if shader_type not in shader_types:
+                continue
+            if slot_slot_type != slot_type:
+                continue
+            if slot_slot_id is not None and slot_slot_id != slot_id:
+                continue
+            if slot_shader_type_filter != ShaderType.Empty and slot_shader_type_filter != slot_shader_type:
+                continue
+            return call_id, True
+        return call_id, False
+
+    def filter_filenames(self, filenames):
+        """
+        Returns list of filenames belonging to calls with at least one pattern slot resource
+        """
+        start_time = time.time()
+
+        filenames = [filename for filename in filenames if not filename.endswith('txt')]
+
+        file_call_ids = []
+        self.call_ids = set()
+
+        for filename in filenames:
+            call_id, is_matched = self.match_filename(filename)
+            file_call_ids.append(call_id)
+            if is_matched and call_id is not None:
+                self.call_ids.add(call_id)
+
+        # Keep original order of files, as it defines order of resources in dump
+        result = [
+            filename for filename, call_id in zip(filenames, file_call_ids) if call_id is None or call_id in self.call_ids
+        ]
+
+        self.num_files = len(filenames)
+        self.num_calls = len(set(file_call_ids) - {None})
+
+        print(f'Dump prefilter time: {time.time() - start_time :.3f}s '
+              f'({len(result)} of {self.num_files} files kept, {len(self.call_ids)} of {self.num_calls} calls kept)')
+
+        return result
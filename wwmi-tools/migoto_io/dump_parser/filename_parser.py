@@ -1,12 +1,15 @@
 
 import os
+import mmap
 import shutil
 import hashlib
 import re
 
+from contextlib import contextmanager
+
 from enum import Enum, auto
 
-from .dict_filter import DictFilter, FilterCondition, Filter
+from .dict_filter import DictFilter, DictIndex, FilterCondition, Filter
 
 
 class ShaderType(Enum):
@@ -60,6 +63,16 @@ slot_type_codepage = {
     'vb': SlotType.VertexBuffer,
 }
 
+# List of ResourceDescriptor attributes to build hash indexes for, covers all filters used by dump parser
+resource_index_attributes = [
+    'call_id',
+    'slot_type',
+    'slot_id',
+    'slot_shader_type',
+    'hash',
+    'shaders:type',
+]
+
 
 class ShaderRef:
     def __init__(self, raw_shader_ref):
@@ -89,30 +102,32 @@ class ShaderRef:
 class ResourceData:
     def __init__(self, file_path):
         self.path = file_path
-        self.bytes = None
         self.len = None
         self.sha256 = None
 
-    def load(self):
+    @contextmanager
+    def view(self):
+        """
+        Yields read-only memoryview of file contents backed by mmap, so data can be accessed without copying
+        View is released on exit, so any objects built on it via numpy.frombuffer must not outlive the context
+        """
         with open(self.path, "rb") as f:
-            self.bytes = bytearray(f.read())
-
-    def unload(self):
-        self.bytes = None
-
-    def update_hash(self):
-        if self.bytes is None:
-            raise ValueError("Failed to update resource hash: file not loaded!")
-        self.sha256 = hashlib.sha256(self.bytes).hexdigest()
+            # Empty files cannot be mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b'')
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data_map:
+                with memoryview(data_map) as data_view:
+                    yield data_view
 
-    def update_len(self):
-        if self.bytes is None:
-            raise ValueError("Failed to update resource data len: file not loaded!")
-        self.len = len(self.bytes)
+    def update(self):
+        with self.view() as data_view:
+            self.len = len(data_view)
+            self.sha256 = hashlib.sha256(data_view).hexdigest()
 
 
 class ResourceDescriptor:
-    def __init__(self, resource_file_path, calculate_sha256=False):
+    def __init__(self, resource_file_path, calculate_sha256=False, cache_entry=None):
         self.path = resource_file_path
         self.raw = os.path.basename(resource_file_path)
         self.marked = False
@@ -126,14 +141,23 @@ class ResourceDescriptor:
         self.old_hash = None
         self.data = ResourceData(self.path)
         self.shaders = []
+        if cache_entry is not None:
+            self.import_cache_entry(cache_entry)
+        else:
+            self.parse_raw_call()
         if calculate_sha256:
             self.hash_data()
-        self.parse_raw_call()
         self.validate()
 
     def __repr__(self):
         return self.raw
 
+    def __getstate__(self):
+        # Parent call links the whole call graph, lets not drag it along when descriptor is sent to another process
+        state = self.__dict__.copy()
+        state['call'] = None
+        return state
+
     def validate(self):
         if self.call_id is None:
             raise ValueError(f'Failed to parse raw descriptor "{self.raw}": no call id detected!')
@@ -142,43 +166,54 @@ class ResourceDescriptor:
         if len(self.shaders) == 0:
             raise ValueError(f'Failed to parse raw descriptor "{self.raw}": no shader refs detected!')
 
+    def get_cache_entry(self):
+        """
+        Returns parsed descriptor data as tuple of primitives, allows to skip filename parsing on the next run
+        """
+        return (
+            self.raw,
+            self.marked,
+            self.call_id,
+            self.ext,
+            self.slot_type.value if self.slot_type is not None else None,
+            self.slot_id,
+            self.slot_shader_type.value if self.slot_shader_type is not None else None,
+            self.hash,
+            self.old_hash,
+            tuple(shader.raw for shader in self.shaders),
+            self.data.len,
+            self.data.sha256,
+        )
+
+    def import_cache_entry(self, cache_entry):
+        (raw, self.marked, self.call_id, self.ext, slot_type, self.slot_id, slot_shader_type,
+         self.hash, self.old_hash, raw_shader_refs, self.data.len, self.data.sha256) = cache_entry
+        if raw != self.raw:
+            raise ValueError(f'Failed to import cached descriptor "{raw}": file name mismatch with "{self.raw}"!')
+        self.slot_type = SlotType(slot_type) if slot_type is not None else None
+        self.slot_shader_type = ShaderType(slot_shader_type) if slot_shader_type is not None else None
+        self.parse_raw_shader_refs(raw_shader_refs)
+
     def get_sha256(self):
-        is_unloaded = self.data.sha256 is None
-        if is_unloaded:
-            self.data.load()
-            self.data.update_hash()
-            self.data.update_len()
-        sha256 = self.data.sha256
-        if is_unloaded:
-            self.data.unload()
-        return sha256
+        if self.data.sha256 is None:
+            self.data.update()
+        return self.data.sha256
 
     def get_len(self):
-        is_unloaded = self.data.len is None
-        if is_unloaded:
-            self.data.load()
-            self.data.update_hash()
-            self.data.update_len()
-        data_len = self.data.len
-        if is_unloaded:
-            self.data.unload()
-        return data_len
+        if self.data.len is None:
+            self.data.update()
+        return self.data.len
 
     def hash_data(self):
-        self.data.load()
-        self.data.update_hash()
-        self.data.update_len()
-        self.data.unload()
+        self.data.update()
+
+    def get_view(self):
+        return self.data.view()
 
     def get_bytes(self):
-        is_unloaded = self.data.bytes is None
-        if is_unloaded:
-            self.data.load()
-        data_bytes = self.data.bytes
-        if is_unloaded:
-            self.data.unload()
-        return data_bytes
-    
+        with self.data.view() as data_view:
+            return bytearray(data_view)
+
     def get_slot(self):
         return f'{self.slot_shader_type.value}-{self.slot_type.value}{self.slot_id}'
     
@@ -274,6 +309,7 @@ class CallDescriptor:
         self.parameters = {}
         self.shaders = {}
         self.resources = {}
+        self.resources_index = None
 
     def import_resource_descriptor(self, resource_descriptor):
         if resource_descriptor.call_id != self.id:
@@ -284,9 +320,15 @@ class CallDescriptor:
             self.shaders[shader.raw] = shader
 
         self.resources[resource_descriptor.raw] = resource_descriptor
+        self.resources_index = None
+
+    def get_resources_index(self):
+        if self.resources_index is None:
+            self.resources_index = DictIndex(self.resources, resource_index_attributes)
+        return self.resources_index
 
     def hash_resources(self):
-        for resource in self.resources:
+        for resource in self.resources.values():
             resource.hash_data()
 
     def get_filtered_resources(self, filter_attributes):
@@ -296,7 +338,7 @@ class CallDescriptor:
             attributes=filter_attributes,
             dictionaries_condition=FilterCondition.AND,
             dictionaries=[
-                self.resources
+                self.get_resources_index()
             ]
         )
         return DictFilter(resource_filter).filtered_dict
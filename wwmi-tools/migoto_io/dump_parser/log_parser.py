@@ -1,8 +1,9 @@
 import os
 import re
+import time
 
 from enum import Enum, auto
-from dataclasses import dataclass
+from dataclasses import dataclass, astuple
 
 
 @dataclass
@@ -24,68 +25,131 @@ class CallParameters(Enum):
     DrawIndexed = auto()
 
 
+call_parameters = {
+    CallParameters.Dispatch: Dispatch,
+    CallParameters.DrawIndexed: DrawIndexed,
+}
+
+
+# Patterns are matched against raw log line bytes right after the `000123 ` call id prefix
+call_parameters_patterns = {
+    CallParameters.Dispatch: re.compile(
+        rb'Dispatch\(ThreadGroupCountX:(\d+), ThreadGroupCountY:(\d+), ThreadGroupCountZ:(\d+)\)'),
+    CallParameters.DrawIndexed: re.compile(
+        rb'DrawIndexed\(IndexCount:(\d+), StartIndexLocation:(\d+), BaseVertexLocation:(\d+)\)'),
+}
+
+
+def read_numbered_log_lines(log_path, buffer_size=1024*1024):
+    """
+    Yields (raw_call_id, line) for each log line starting with 6-digit call id, log is read in chunks of buffer_size
+    Continuation lines are skipped, as call parameters are always located at the start of numbered lines
+    """
+    with open(log_path, 'rb', buffering=buffer_size) as f:
+        for line in f:
+            raw_call_id = line[0:6]
+            if raw_call_id.isdigit():
+                yield raw_call_id, line
+
+
 class FrameDumpCall:
+    # Heavy scenes log hundreds of thousands of calls, lets keep per-call footprint small
+    __slots__ = ('id', 'raw_parameters', 'decoded_parameters')
+
     def __init__(self, call_id):
         self.id = call_id
-        self.parameters = {}
-        self.patterns = {
-            CallParameters.Dispatch: (
-                re.compile(r'^Dispatch\(ThreadGroupCountX:(\d+), ThreadGroupCountY:(\d+), ThreadGroupCountZ:(\d+)\)'),
-                lambda data: Dispatch(int(data[0]), int(data[1]), int(data[2]))
-            ),
-            CallParameters.DrawIndexed: (
-                re.compile(r'^DrawIndexed\(IndexCount:(\d+), StartIndexLocation:(\d+), BaseVertexLocation:(\d+)\)'),
-                lambda data: DrawIndexed(int(data[0]), int(data[1]), int(data[2]))
-            ),
-        }
-
-    def import_data(self, raw_log_entry):
-        raw_log_entry = ' '.join(raw_log_entry)
-        for name, (pattern, decoder) in self.patterns.items():
-            result = pattern.findall(raw_log_entry)
-            if len(result) == 0:
-                continue
-            if len(result) != 1:
-                raise ValueError(f'More than 1 data entries for pattern {pattern} in {raw_log_entry}')
-            self.parameters[name] = decoder(result[0])
+        self.raw_parameters = {}
+        self.decoded_parameters = None
+
+    @property
+    def parameters(self):
+        """
+        Decodes call parameters on the first access, so only calls referenced by dump resources pay for it
+        """
+        if self.decoded_parameters is None:
+            self.decoded_parameters = {}
+            for name, line in self.raw_parameters.items():
+                data = call_parameters_patterns[name].match(line, 7)
+                self.decoded_parameters[name] = call_parameters[name](*map(int, data.groups()))
+        return self.decoded_parameters
+
+    def import_log_line(self, line):
+        # Both Dispatch and DrawIndexed start with `D`, lets skip the rest of lines without running regex
+        if not line.startswith(b'D', 7):
+            return
+        for name, pattern in call_parameters_patterns.items():
+            if pattern.match(line, 7) is not None:
+                self.raw_parameters[name] = line
 
 
 class FrameDumpLog:
-    def __init__(self, dump_path):
+    def __init__(self, dump_path, cached_calls=None, call_ids=None):
         self.path = os.path.join(dump_path, 'log.txt')
+        # Optional set of raw call ids to store, data of other calls is skipped
+        self.call_ids = set(call_id.encode() for call_id in call_ids) if call_ids is not None else None
         self.calls = {}
-        self.parse_log()
+        if cached_calls is not None:
+            self.import_cached_calls(cached_calls)
+        else:
+            self.parse_log()
         self.validate()
 
     def validate(self):
         pass
 
+    def get_cached_calls(self):
+        """
+        Returns parsed call parameters as dict of primitives, allows to skip log parsing on the next run
+        """
+        cached_calls = {}
+        for raw_call_id, call in self.calls.items():
+            cached_calls[raw_call_id] = (call.id, {
+                name.name: astuple(parameters) for name, parameters in call.parameters.items()
+            })
+        return cached_calls
+
+    def import_cached_calls(self, cached_calls):
+        self.calls = {}
+        for raw_call_id, (call_id, parameters) in cached_calls.items():
+            call = FrameDumpCall(call_id)
+            call.decoded_parameters = {
+                CallParameters[name]: call_parameters[CallParameters[name]](*values)
+                for name, values in parameters.items()
+            }
+            self.calls[raw_call_id] = call
+
     def parse_log(self):
+        start_time = time.time()
         self.calls = {}
-        with (open(self.path, "r") as f):
-            lines = f.readlines()
-            call = None
-            raw_log_entry = []
-            for line_id, line in enumerate(lines):
-                raw_call_id = line[0:6]
-                if raw_call_id.isnumeric():
-                    line_call_id = int(raw_call_id)
-                    if call is None:
-                        call = FrameDumpCall(line_call_id)
-                        self.calls[raw_call_id] = call
-                    elif line_call_id != call.id:
-                        call = FrameDumpCall(line_call_id)
-                        if line_call_id in self.calls:
-                            raise ValueError(f'Malformed log line {line_id}: '
-                                             f'data collection for call id {raw_call_id} was already finished, '
-                                             f'current call id: {call.id}')
-                        self.calls[raw_call_id] = call
-                    call.import_data(raw_log_entry)
-                    raw_log_entry = [line[7:]]
-                elif call is None:
-                    continue
+        call = None
+        current_raw_call_id = None
+        raw_log_entry = None
+        for raw_call_id, line in read_numbered_log_lines(self.path):
+            if raw_call_id != current_raw_call_id:
+                current_raw_call_id = raw_call_id
+                if self.call_ids is None or raw_call_id in self.call_ids:
+                    call = FrameDumpCall(int(raw_call_id))
+                    self.calls[raw_call_id.decode()] = call
                 else:
-                    raw_log_entry.append(line.strip())
-            # Handle last line of the log
-            call.import_data(raw_log_entry)
+                    call = None
+            # Log entry is finished by the next numbered line and goes to the call it belongs to
+            if raw_log_entry is not None and call is not None:
+                call.import_log_line(raw_log_entry)
+            raw_log_entry = line
+        # Handle last line of the log
+        if call is not None and raw_log_entry is not None:
+            call.import_log_line(raw_log_entry)
+        print(f'Log parse time: {time.time() - start_time :.3f}s ({len(self.calls)} calls)')
+
+
+if __name__ == '__main__':
+    # Usage: python log_parser.py <dump_path>
+    import sys
+    import tracemalloc
 
+    tracemalloc.start()
+    log = FrameDumpLog(sys.argv[1])
+    current_memory, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'Log parse peak memory: {peak_memory / 1024 / 1024 :.1f}MB '
+          f'(retained: {current_memory / 1024 / 1024 :.1f}MB)')
@@ -1,3 +1,4 @@
+import os
 import time
 
 from typing import Union, List, Dict
@@ -6,6 +7,8 @@ from dataclasses import dataclass
 from ..data_model.byte_buffer import ByteBuffer, BufferLayout, IndexBuffer
 
 from .filename_parser import SlotType, ShaderType, SlotId, ResourceDescriptor
+from .log_parser import CallParameters
+from .resource_hasher import ResourceHasher
 
 from .calls_collector import ShaderMap, Slot, CallsCollector, ShaderCallBranch
 
@@ -26,27 +29,102 @@ class DataMap:
     layout: BufferLayout = None
 
 
+class LazyResource:
+    """
+    Deferred ByteBuffer or IndexBuffer, resource data is parsed only on the first access
+    IndexBuffer with validated header is loaded from the binary .buf resource, otherwise it's parsed from .txt
+    """
+    def __init__(self, resource: ResourceDescriptor, source: Source, layout: BufferLayout, index_header: IndexBuffer = None):
+        self.resource = resource
+        self.source = source
+        self.layout = layout
+        self.index_header = index_header
+        self.buffer = None
+
+    def get(self) -> Union[ByteBuffer, IndexBuffer]:
+        if self.buffer is None:
+            if self.index_header is not None:
+                with self.resource.get_view() as data_view:
+                    self.index_header.parse_buffer(data_view)
+                self.buffer = self.index_header
+            elif self.source.slot_type == SlotType.IndexBuffer and self.source.file_ext == 'txt':
+                with open(self.resource.path, 'r') as f:
+                    self.buffer = IndexBuffer(self.layout, f)
+            else:
+                with self.resource.get_view() as data_view:
+                    self.buffer = ByteBuffer(self.layout, data_view)
+        return self.buffer
+
+
+class BranchCallResources(dict):
+    """
+    Dict of branch call resources that materializes LazyResource entries on access
+    Only indexing and get() parse entries, iteration, values(), items() and copy() return raw LazyResource entries
+    """
+    def __getitem__(self, resource_tag):
+        value = super().__getitem__(resource_tag)
+        if isinstance(value, LazyResource):
+            return value.get()
+        return value
+
+    def get(self, resource_tag, default=None):
+        if resource_tag in self:
+            return self[resource_tag]
+        return default
+
+    def get_lazy(self, resource_tag):
+        """
+        Returns entry without materializing it, LazyResource gets parsed only once its get() is called
+        """
+        return super().__getitem__(resource_tag)
+
+
 @dataclass
 class ResourceCollector:
     shader_resources: Dict[str, DataMap]
     call_branches: Dict[str, ShaderCallBranch] = None
-    cache: Dict[str, Union[ByteBuffer, IndexBuffer]] = None
+    resource_hasher: ResourceHasher = None
+    cache: Dict[str, LazyResource] = None
 
     def __post_init__(self):
         self.cache = {}
+        # Headers of index buffers that passed validation and will be loaded from .buf, keyed by .buf path
+        self.index_headers = {}
+        # Located index buffers, resource may be located multiple times via different branches and gets counted each time
+        self.num_buf_index_buffers = 0
+        self.num_txt_index_buffers = 0
+        if self.resource_hasher is None:
+            self.resource_hasher = ResourceHasher()
+        # Locate resources for all branch calls first, so all of them can be hashed in one batch
+        located_resources = []
+        visited_branches = set()
         for shader_id, shader_call_branch in self.call_branches.items():
-            self.collect_branch_data(shader_id, shader_call_branch)
+            self.locate_branch_resources(shader_id, shader_call_branch, located_resources, visited_branches)
+        self.resource_hasher.hash_resources([
+            resource for _, _, _, layout, resource in located_resources if layout is not None and resource is not None
+        ])
+        for branch_call, resource_tag, source, layout, resource in located_resources:
+            self.collect_branch_call_resource(branch_call, resource_tag, source, layout, resource)
+        num_index_buffers = self.num_buf_index_buffers + self.num_txt_index_buffers
+        if num_index_buffers > 0:
+            print(f'Index buffers: {self.num_buf_index_buffers} of {num_index_buffers} loaded from .buf '
+                  f'({self.num_txt_index_buffers} fallbacks to .txt, {self.num_txt_index_buffers / num_index_buffers * 100 :.1f}%)')
 
-    def collect_branch_data(self, shader_id, shader_call_branch):
+    def locate_branch_resources(self, shader_id, shader_call_branch, located_resources, visited_branches):
+        # Resolved branches are shared between parents fed by the same resource, so lets process each of them once
+        if id(shader_call_branch) in visited_branches:
+            return
+        visited_branches.add(id(shader_call_branch))
         for branch_call in shader_call_branch.calls:
             for resource_tag, data_map in self.shader_resources.items():
                 for source in data_map.sources:
                     if source.shader_id == shader_id:
-                        self.collect_branch_call_resource(branch_call, resource_tag, source, data_map.layout)
+                        resource = self.locate_branch_call_resource(branch_call, resource_tag, source, data_map.layout)
+                        located_resources.append((branch_call, resource_tag, source, data_map.layout, resource))
         for nested_branch in shader_call_branch.nested_branches:
-            self.collect_branch_data(nested_branch.shader_id, nested_branch)
+            self.locate_branch_resources(nested_branch.shader_id, nested_branch, located_resources, visited_branches)
 
-    def collect_branch_call_resource(self, branch_call, resource_tag, source, layout):
+    def locate_branch_call_resource(self, branch_call, resource_tag, source, layout):
 
         filter_attributes = {
             'slot_type': source.slot_type,
@@ -60,34 +138,74 @@ class ResourceCollector:
 
         if resource is None:
             if source.ignore_missing:
-                layout = None
+                return None
             else:
                 raise ValueError(f'Failed to locate required resource {resource_tag} at {source} in call {branch_call.call}!')
 
+        # Contents of .buf IB isn't always accurate, so it's used only if it matches .txt header and DrawIndexed
+        if layout is not None and source.slot_type == SlotType.IndexBuffer and source.file_ext == 'txt':
+            txt_path = resource.path.replace('.buf', '.txt')
+            index_header = self.load_index_header(branch_call, resource, txt_path, layout)
+            if index_header is not None:
+                self.index_headers[resource.path] = index_header
+                self.num_buf_index_buffers += 1
+            else:
+                resource = ResourceDescriptor(txt_path)
+                self.num_txt_index_buffers += 1
+
+        return resource
+
+    @staticmethod
+    def load_index_header(branch_call, resource, txt_path, layout):
+        """
+        Returns header of .txt IB if binary .buf IB can be used instead of it, otherwise returns None
+        """
+        if resource.ext != 'buf' or not os.path.isfile(txt_path):
+            return None
+        draw_indexed = branch_call.call.parameters.get(CallParameters.DrawIndexed, None)
+        if draw_indexed is None:
+            return None
+        try:
+            with open(txt_path, 'r') as f:
+                index_header = IndexBuffer(layout, f, load_indices=False)
+        except ValueError:
+            return None
+        if index_header.format not in ['R16_UINT', 'R32_UINT']:
+            return None
+        if index_header.first_index != draw_indexed.StartIndexLocation:
+            return None
+        if index_header.index_count != draw_indexed.IndexCount or index_header.index_count % 3 != 0:
+            return None
+        index_width = 2 if index_header.format == 'R16_UINT' else 4
+        byte_end = index_header.offset + (index_header.first_index + index_header.index_count) * index_width
+        if byte_end > resource.get_len():
+            return None
+        return index_header
+
+    def collect_branch_call_resource(self, branch_call, resource_tag, source, layout, resource):
+
+        if resource is None:
+            layout = None
+
         if layout is not None:
 
-            # Contents of .buf IB isn't always accurate, so it can make sense to use .txt instead
-            if source.slot_type == SlotType.IndexBuffer and source.file_ext == 'txt':
-                txt_path = resource.path.replace('.buf', '.txt')
-                resource = ResourceDescriptor(txt_path)
+            cache_id = (resource.get_sha256(), layout.get_fingerprint())
 
-            cache_id = (resource.get_sha256(), layout.to_string())
+            index_header = self.index_headers.get(resource.path, None)
+            if index_header is not None:
+                # Different draw calls may use different ranges of the same .buf IB
+                cache_id += (index_header.offset, index_header.first_index, index_header.index_count, index_header.format)
 
             cached_resource = self.cache.get(cache_id, None)
 
             if cached_resource is None:
-                if source.slot_type == SlotType.IndexBuffer and source.file_ext == 'txt':
-                    with open(resource.path, 'r') as f:
-                        resource = IndexBuffer(layout, f)
-                else:
-                    resource = ByteBuffer(layout, resource.get_bytes())
-
+                resource = LazyResource(resource, source, layout, index_header)
                 self.cache[cache_id] = resource
             else:
                 resource = cached_resource
 
         if branch_call.resources is None:
-            branch_call.resources = {}
+            branch_call.resources = BranchCallResources()
 
         branch_call.resources[resource_tag] = resource
 
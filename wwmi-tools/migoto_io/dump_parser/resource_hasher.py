@@ -0,0 +1,45 @@
+import time
+
+from typing import Iterable, Optional
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+from .filename_parser import ResourceDescriptor
+
+
+@dataclass
+class ResourceHasher:
+    """
+    Calculates len and sha256 of dump resources in batches using thread pool
+    hashlib releases GIL while hashing, so reading and hashing of multiple files runs in parallel
+    Results are stored in descriptors, so all consumers of the same descriptor share them
+    """
+    max_workers: Optional[int] = None
+
+    def hash_resources(self, resources: Iterable[ResourceDescriptor]):
+        start_time = time.time()
+
+        # Group descriptors by file path, as some of them may be created separately for the same file
+        pending = {}
+        for resource in resources:
+            if resource.data.sha256 is not None:
+                continue
+            pending.setdefault(resource.path, []).append(resource)
+
+        if len(pending) == 0:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            executor_results = executor.map(lambda descriptors: descriptors[0].hash_data(), pending.values())
+            # Iterate results to raise exceptions from workers if any
+            for _ in executor_results:
+                pass
+
+        data_len = 0
+        for descriptors in pending.values():
+            for resource in descriptors[1:]:
+                resource.data.len = descriptors[0].data.len
+                resource.data.sha256 = descriptors[0].data.sha256
+            data_len += descriptors[0].data.len
+
+        print(f'Resources hashing time: {time.time() - start_time :.3f}s ({len(pending)} files, {data_len / 1024 / 1024 :.1f}MB)')